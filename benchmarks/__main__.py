@@ -0,0 +1,105 @@
+import json
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+from .runner import STAGES, Measurement, measure_workload
+from .workloads import WORKLOADS
+
+
+def main() -> int:
+    names = [workload.name for workload in WORKLOADS]
+    parser = ArgumentParser(
+        prog="python -m benchmarks",
+        description="Measure the throughput and memory of split and of each of its stages.",
+    )
+    parser.add_argument("--workload", action="append", choices=names)
+    parser.add_argument("--stage", action="append", choices=STAGES)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiplies the number of resources of every workload",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best of N runs")
+    parser.add_argument("--save", type=Path, help="write the results to this JSON file")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="compare with results saved before, and fail on a regression",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="how much slower or bigger than the baseline still passes (0.2 = 20%%)",
+    )
+    args = parser.parse_args()
+
+    results: dict[str, Measurement] = {}
+    print(
+        f"{'case':<30} {'inputs/s':>12} {'outputs/s':>12} "
+        f"{'first (ms)':>11} {'peak (KiB)':>11}"
+    )
+    for workload in WORKLOADS:
+        if args.workload and workload.name not in args.workload:
+            continue
+        measurements = measure_workload(
+            workload=workload,
+            scale=args.scale,
+            repeat=args.repeat,
+            stages=args.stage or STAGES,
+        )
+        for stage, measurement in measurements.items():
+            case = f"{workload.name}/{stage}"
+            results[case] = measurement
+            print(
+                f"{case:<30} {measurement.inputs_per_second:>12,.0f} "
+                f"{measurement.outputs_per_second:>12,.0f} "
+                f"{measurement.first_seconds * 1000:>11.2f} "
+                f"{measurement.peak_bytes / 1024:>11,.0f}"
+            )
+
+    document = {
+        "scale": args.scale,
+        "results": {case: m.to_json() for case, m in results.items()},
+    }
+    if args.save is not None:
+        args.save.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+
+    if args.baseline is None:
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline["scale"] != args.scale:
+        print(f"baseline was measured at scale {baseline['scale']}", file=sys.stderr)
+        return 2
+    regressions = _find_regressions(
+        document["results"], baseline["results"], args.tolerance
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def _find_regressions(
+    results: dict[str, dict], baseline: dict[str, dict], tolerance: float
+) -> list[str]:
+    regressions: list[str] = []
+    for case, result in results.items():
+        before = baseline.get(case)
+        if before is None:
+            continue
+        for key in ("seconds", "first_seconds", "peak_bytes"):
+            limit = before[key] * (1.0 + tolerance)
+            if key != "peak_bytes":
+                # below a millisecond, timings are mostly noise
+                limit = max(limit, before[key] + 0.001)
+            if result[key] > limit:
+                regressions.append(
+                    f"{case} {key}: {before[key]:.6g} -> {result[key]:.6g}"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import tracemalloc
+from dataclasses import asdict, dataclass
+from math import floor
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator
+
+from resource_segmentation import Group, Resource, Segment, split
+from resource_segmentation.group import group_items
+from resource_segmentation.segment import allocate_segments
+from resource_segmentation.truncation import truncate_gap
+
+from .workloads import Workload
+
+STAGES = ("split", "allocate_segments", "group_items", "truncate_gap")
+
+
+@dataclass
+class Measurement:
+    # `inputs`/`outputs` are what the stage reads and yields: resources, items
+    # (resources and segments) or groups
+    seconds: float
+    first_seconds: float
+    inputs: int
+    outputs: int
+    peak_bytes: int
+
+    @property
+    def inputs_per_second(self) -> float:
+        return self.inputs / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def outputs_per_second(self) -> float:
+        return self.outputs / self.seconds if self.seconds > 0 else 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "inputs_per_second": self.inputs_per_second,
+            "outputs_per_second": self.outputs_per_second,
+        }
+
+
+def measure_workload(
+    workload: Workload,
+    scale: float,
+    repeat: int,
+    stages: Iterable[str] = STAGES,
+) -> dict[str, Measurement]:
+    resources = workload.resources(scale)
+    body_max_count = workload.max_segment_count - (
+        floor(workload.max_segment_count * workload.gap_rate) * 2
+    )
+
+    def run_split() -> Iterator[Group[int]]:
+        return split(
+            resources=iter(resources),
+            max_segment_count=workload.max_segment_count,
+            border_incision=0,
+            gap_rate=workload.gap_rate,
+            tail_rate=workload.tail_rate,
+        )
+
+    def run_allocate() -> Iterator[Resource[int] | Segment[int]]:
+        return allocate_segments(
+            resources_iter=iter(resources),
+            border_incision=0,
+            max_count=body_max_count,
+        )
+
+    # later stages read the output of the one before, made beforehand
+    items: list[Resource[int] | Segment[int]] = (
+        list(resources) if workload.group_resources else list(run_allocate())
+    )
+
+    def run_group() -> Iterator[Group[int]]:
+        return group_items(
+            items_iter=iter(items),
+            max_count=workload.max_segment_count,
+            gap_rate=workload.gap_rate,
+            tail_rate=workload.tail_rate,
+        )
+
+    groups = list(run_group())
+
+    def run_truncate() -> Iterator[Group[int]]:
+        return map(truncate_gap, groups)
+
+    runs: dict[str, tuple[Callable[[], Iterator[Any]], int]] = {
+        "split": (run_split, len(resources)),
+        "allocate_segments": (run_allocate, len(resources)),
+        "group_items": (run_group, len(items)),
+        "truncate_gap": (run_truncate, len(groups)),
+    }
+    return {
+        stage: _measure(*runs[stage], repeat=repeat)
+        for stage in stages
+        if stage in runs
+    }
+
+
+def _measure(run: Callable[[], Iterator[Any]], inputs: int, repeat: int) -> Measurement:
+    seconds, first_seconds, outputs = min(_time(run) for _ in range(max(repeat, 1)))
+    return Measurement(
+        seconds=seconds,
+        first_seconds=first_seconds,
+        inputs=inputs,
+        outputs=outputs,
+        peak_bytes=_peak_bytes(run),
+    )
+
+
+def _time(run: Callable[[], Iterator[Any]]) -> tuple[float, float, int]:
+    begin = perf_counter()
+    first = 0.0
+    outputs = 0
+    for _ in run():
+        if outputs == 0:
+            first = perf_counter() - begin
+        outputs += 1
+    return perf_counter() - begin, first, outputs
+
+
+def _peak_bytes(run: Callable[[], Iterator[Any]]) -> int:
+    # in a run of its own, since tracing allocations slows everything down.
+    # Outputs are dropped as they come, so only what the stage holds is counted.
+    tracemalloc.start()
+    try:
+        for _ in run():
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
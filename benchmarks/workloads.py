@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from random import Random
+from typing import Callable
+
+from resource_segmentation import Resource
+
+
+@dataclass
+class Workload:
+    name: str
+    size: int
+    max_segment_count: int
+    gap_rate: float
+    tail_rate: float
+    generate: Callable[[int, Random], list[Resource[int]]]
+    # the `group_items` stage reads the resources themselves instead of the
+    # segmented items, as many small items as grouping can be given
+    group_resources: bool = False
+
+    def resources(self, scale: float, seed: int = 0) -> list[Resource[int]]:
+        return self.generate(max(1, round(self.size * scale)), Random(seed))
+
+
+def _flat(size: int, random: Random) -> list[Resource[int]]:
+    # one level only: every resource joins the outermost segment
+    return [Resource(random.randint(1, 120), 0, 0, i) for i in range(size)]
+
+
+def _paragraphs(size: int, random: Random) -> list[Resource[int]]:
+    # sentences of a few levels, like text split at commas, periods and paragraphs
+    return [
+        Resource(
+            count=random.choice((3, 8, 15, 30, 60, 120)),
+            start_incision=random.randint(0, 3),
+            end_incision=random.randint(0, 3),
+            payload=i,
+        )
+        for i in range(size)
+    ]
+
+
+def _nested(size: int, random: Random) -> list[Resource[int]]:
+    # incision levels that keep descending for hundreds of resources before
+    # climbing back, so the stack of open segments gets deep
+    resources: list[Resource[int]] = []
+    depth = 0
+    while len(resources) < size:
+        for _ in range(random.randint(50, 500)):
+            depth -= 1
+            resources.append(Resource(random.randint(1, 40), depth, 0, len(resources)))
+        depth = 0
+    return resources[:size]
+
+
+def _oversize(size: int, random: Random) -> list[Resource[int]]:
+    # one resource in four exceeds `max_segment_count` on its own
+    return [
+        Resource(
+            count=random.randint(1200, 5000)
+            if random.random() < 0.25
+            else random.randint(1, 200),
+            start_incision=random.randint(0, 2),
+            end_incision=random.randint(0, 2),
+            payload=i,
+        )
+        for i in range(size)
+    ]
+
+
+def _units(size: int, _: Random) -> list[Resource[int]]:
+    return [Resource(1, 0, 0, i) for i in range(size)]
+
+
+def _tiny(size: int, random: Random) -> list[Resource[int]]:
+    return [
+        Resource(random.randint(0, 3), random.randint(0, 1), random.randint(0, 1), i)
+        for i in range(size)
+    ]
+
+
+WORKLOADS: list[Workload] = [
+    Workload("flat", 200_000, 1000, 0.0, 0.5, _flat),
+    Workload("paragraphs", 200_000, 1000, 0.1, 0.5, _paragraphs),
+    Workload("nested", 200_000, 1000, 0.1, 0.5, _nested),
+    Workload("oversize", 100_000, 1000, 0.1, 0.5, _oversize),
+    Workload("high_gap", 200_000, 1000, 0.4, 0.5, _paragraphs),
+    Workload("tiny", 2_000_000, 1000, 0.1, 0.5, _tiny),
+    # heads of 16,000 items, each taking in the whole previous body
+    Workload("fine_high_gap", 100_000, 40_000, 0.4, 0.5, _units, group_resources=True),
+]
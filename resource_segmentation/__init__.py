@@ -1,2 +1,16 @@
-from .splitter import split
-from .types import Group, Resource, Segment
+from .budgets import Budget, split_budgets
+from .cache import SplitCache
+from .checkpoint import SplitCheckpoint, split_checkpointed
+from .columnar import GroupArrays, split_arrays
+from .count import CountCache, LazyResource, LRUCountCache, payload_fingerprint
+from .documents import PackedGroup, split_documents
+from .incremental import GroupEdit, IncrementalSplit
+from .mapped import MappedResources, split_file, write_resources
+from .parallel import split_many, split_parallel
+from .segment import BufferLimitWarning
+from .prefetch import prefetch
+from .splitter import asplit, split, split_spans
+from .stats import SplitStats
+from .tree import LevelStats, SegmentTree
+from .types import Group, GroupSpan, Resource, Segment
+from .view import GroupView, ResourceSpan
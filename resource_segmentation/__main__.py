@@ -0,0 +1,271 @@
+import gzip
+import io
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict
+from math import floor
+from typing import IO, Any, Generator, Iterable, Iterator, cast
+
+from .mapped import MappedResources, split_file
+from .splitter import split, split_spans
+from .types import Group, Resource, Segment
+
+_BUFFER_SIZE = 1 << 20
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class _InputError(Exception):
+    pass
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = ArgumentParser(
+        prog="python -m resource_segmentation",
+        description=(
+            "Group resources read as JSONL, one resource per line, "
+            "and write the groups as JSONL, one group per line."
+        ),
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="the resources, or - for stdin (default)",
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="where to write groups (default stdout)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=("jsonl", "binary"),
+        default="jsonl",
+        help="JSONL objects with count, start_incision, end_incision and payload, "
+        "or a file written by write_resources",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=("auto", "none", "gzip", "zstd"),
+        default="auto",
+        help="of JSONL input; auto looks at its first bytes (zstd needs zstandard)",
+    )
+    parser.add_argument("--max-segment-count", type=int, required=True)
+    parser.add_argument("--border-incision", type=int, default=0)
+    parser.add_argument("--gap-rate", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.5)
+    parser.add_argument(
+        "--packing",
+        choices=("greedy", "min_groups", "balanced"),
+        default="greedy",
+        help="non-greedy packings read all resources before the first group",
+    )
+    parser.add_argument(
+        "--max-buffered-items",
+        type=int,
+        help="the most resources held in open segments and groups (default no limit)",
+    )
+    parser.add_argument(
+        "--max-buffered-count",
+        type=int,
+        help="the most count held in open segments and groups (default no limit)",
+    )
+    parser.add_argument(
+        "--spans",
+        action="store_true",
+        help="write the resource index ranges of each group instead of its resources",
+    )
+    args = parser.parse_args(argv)
+
+    if args.max_segment_count < 1:
+        parser.error("--max-segment-count must be at least 1")
+    for option, rate in (
+        ("--gap-rate", args.gap_rate),
+        ("--tail-rate", args.tail_rate),
+    ):
+        if not 0.0 <= rate <= 1.0:
+            parser.error(f"{option} must be between 0 and 1")
+    if args.max_segment_count - floor(args.max_segment_count * args.gap_rate) * 2 < 1:
+        # the gaps on both sides of a body would leave no room for the body
+        parser.error("--gap-rate leaves no room for bodies in --max-segment-count")
+    for option, limit in (
+        ("--max-buffered-items", args.max_buffered_items),
+        ("--max-buffered-count", args.max_buffered_count),
+    ):
+        if limit is not None and limit < 1:
+            parser.error(f"{option} must be at least 1")
+    if args.spans and args.packing != "greedy":
+        parser.error("--spans only supports greedy packing")
+    if args.format == "binary" and (args.input == "-" or args.compression != "auto"):
+        parser.error("binary input must be an uncompressed file")
+
+    try:
+        output = _open_output(args.output)
+    except OSError as error:
+        return _fail(error)
+    try:
+        _run(args, output)
+        output.flush()
+    except BrokenPipeError:
+        # the reader went away, e.g. `| head`: stop quietly. What is left in
+        # the buffer goes to devnull, so flushing it later raises nothing
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, output.fileno())
+        os.close(devnull)
+        return 0
+    except (_InputError, OSError, ValueError) as error:
+        # a bad line, a missing file or a file `write_resources` did not write
+        return _fail(error)
+    finally:
+        if args.output != "-":
+            output.close()
+    return 0
+
+
+def _fail(error: Exception) -> int:
+    print(f"error: {error}", file=sys.stderr)
+    return 1
+
+
+def _run(args: Any, output: IO[bytes]) -> None:
+    options = {
+        "max_segment_count": args.max_segment_count,
+        "border_incision": args.border_incision,
+        "gap_rate": args.gap_rate,
+        "tail_rate": args.tail_rate,
+        "max_buffered_items": args.max_buffered_items,
+        "max_buffered_count": args.max_buffered_count,
+    }
+    if args.format == "binary":
+        if args.spans:
+            spans = split_file(args.input, **options)
+            output.writelines(_encode(asdict(span) for span in spans))
+            return
+        with MappedResources(args.input) as mapped:
+            resources = (_decode_payload(resource) for resource in mapped)
+            groups = split(resources, **options, packing=args.packing)
+            output.writelines(_encode(_group_to_json(group) for group in groups))
+        return
+
+    with _open_input(args.input, args.compression) as stream:
+        resources = _read_jsonl(stream)
+        if args.spans:
+            spans = split_spans(resources, **options)
+            output.writelines(_encode(asdict(span) for span in spans))
+        else:
+            groups = split(resources, **options, packing=args.packing)
+            output.writelines(_encode(_group_to_json(group) for group in groups))
+
+
+@contextmanager
+def _open_input(path: str, compression: str) -> Generator[IO[bytes], None, None]:
+    with ExitStack() as stack:
+        # buffered binary files, whatever the buffer size
+        stream = cast(
+            io.BufferedReader,
+            stack.enter_context(
+                open(sys.stdin.fileno(), "rb", buffering=_BUFFER_SIZE, closefd=False)
+                if path == "-"
+                else open(path, "rb", buffering=_BUFFER_SIZE)
+            ),
+        )
+        if compression == "auto":
+            magic = stream.peek(len(_ZSTD_MAGIC))
+            if magic.startswith(_GZIP_MAGIC):
+                compression = "gzip"
+            elif magic.startswith(_ZSTD_MAGIC):
+                compression = "zstd"
+        if compression == "gzip":
+            decompressed = stack.enter_context(gzip.GzipFile(fileobj=stream))
+            yield io.BufferedReader(decompressed, _BUFFER_SIZE)
+        elif compression == "zstd":
+            decompressed = stack.enter_context(_zstd_reader(stream))
+            yield io.BufferedReader(decompressed, _BUFFER_SIZE)
+        else:
+            yield stream
+
+
+def _zstd_reader(stream: IO[bytes]) -> Any:
+    try:
+        import zstandard  # pyright: ignore[reportMissingImports] # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError(
+            "zstd input requires zstandard: pip install resource-segmentation[zstd]"
+        ) from error
+    return zstandard.ZstdDecompressor().stream_reader(stream, closefd=False)
+
+
+def _open_output(path: str) -> IO[bytes]:
+    if path == "-":
+        return open(sys.stdout.fileno(), "wb", buffering=_BUFFER_SIZE, closefd=False)
+    return open(path, "wb", buffering=_BUFFER_SIZE)
+
+
+def _read_jsonl(lines: Iterable[bytes]) -> Generator[Resource[Any], None, None]:
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            yield Resource(
+                count=int(record["count"]),
+                start_incision=int(record.get("start_incision", 0)),
+                end_incision=int(record.get("end_incision", 0)),
+                payload=record.get("payload"),
+            )
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            raise _InputError(f"line {line_number}: {error!r}") from error
+
+
+def _decode_payload(resource: Resource[bytes]) -> Resource[str]:
+    try:
+        payload = resource.payload.decode("utf-8")
+    except UnicodeDecodeError as error:
+        raise _InputError(f"payload is not UTF-8 text: {error}") from error
+    return Resource(
+        count=resource.count,
+        start_incision=resource.start_incision,
+        end_incision=resource.end_incision,
+        payload=payload,
+    )
+
+
+def _encode(records: Iterator[dict[str, Any]]) -> Generator[bytes, None, None]:
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode()
+        yield b"\n"
+
+
+def _group_to_json(group: Group[Any]) -> dict[str, Any]:
+    return {
+        "head_remain_count": group.head_remain_count,
+        "tail_remain_count": group.tail_remain_count,
+        "head": [_item_to_json(item) for item in group.head],
+        "body": [_item_to_json(item) for item in group.body],
+        "tail": [_item_to_json(item) for item in group.tail],
+    }
+
+
+def _item_to_json(item: Resource[Any] | Segment[Any]) -> dict[str, Any]:
+    if isinstance(item, Segment):
+        return {
+            "count": item.count,
+            "resources": [_resource_to_json(resource) for resource in item.resources],
+        }
+    return _resource_to_json(item)
+
+
+def _resource_to_json(resource: Resource[Any]) -> dict[str, Any]:
+    # not `asdict`, which would deep-copy every payload
+    return {
+        "count": resource.count,
+        "start_incision": resource.start_incision,
+        "end_incision": resource.end_incision,
+        "payload": resource.payload,
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(main())
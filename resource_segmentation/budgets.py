@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import floor
+from typing import Generator, Generic, Iterable, Sequence
+
+from .group import Grouper
+from .segment import Segmenter
+from .truncation import PrefixSums, report_truncated
+from .types import Group, P, Resource, Segment
+
+# the most resources handed to the budgets at once
+_RUN_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class Budget:
+    # `gap_rate` and `tail_rate` default to those given to `split_budgets`
+    max_segment_count: int
+    gap_rate: float | None = None
+    tail_rate: float | None = None
+
+
+def split_budgets(
+    resources: Iterable[Resource[P]],
+    budgets: Sequence[Budget | int],
+    border_incision: int,
+    gap_rate: float = 0.0,
+    tail_rate: float = 0.5,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> Generator[tuple[int, Group[P]], None, None]:
+    """Group resources for several budgets at once, reading them only once.
+
+    For each budget, the groups are exactly those `split` would yield with its `max_segment_count`, `gap_rate` and `tail_rate`. The source is iterated once, and the incision level between each resource and the one before is worked out once for all budgets. Resources are handed to the budgets in runs whose resources after the first all join by the same level, up to 1024 at a time, and a budget whose innermost open segment has that level takes the rest of the run in bulk, as `SegmentTree.group` does, instead of resource by resource. Budgets with the same settings share all of their work.
+    Budgets with the same settings still get a `Group` of their own, with its own lists and segments, so changing one does not change the others. The resources themselves are the ones read, shared by every group, as with `split`.
+    Groups of the different budgets are yielded interleaved, as soon as the run that completes them has been handed over.
+
+    Args:
+      resources (Iterable[Resource]): The collection of resources to be grouped.
+      budgets (Sequence[Budget | int]): The budgets, each a `Budget` or just a `max_segment_count`.
+      border_incision (int): Border incision level for segmentation.
+      gap_rate (float): The `gap_rate` of the budgets that do not set their own.
+      tail_rate (float): The `tail_rate` of the budgets that do not set their own.
+      max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups, as in `split`, for each budget. With a limit, runs are fed resource by resource, since bulk feeding skips the checks.
+      max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups, as in `split`, for each budget.
+
+    Yields:
+      Generator[tuple[int, Group], None, None]: The index of the budget in `budgets` and one of its groups.
+    """
+    _ = border_incision
+    pipelines: dict[Budget, _Pipeline[P]] = {}
+    for index, budget in enumerate(budgets):
+        if isinstance(budget, int):
+            budget = Budget(budget)
+        budget = Budget(
+            max_segment_count=budget.max_segment_count,
+            gap_rate=gap_rate if budget.gap_rate is None else budget.gap_rate,
+            tail_rate=tail_rate if budget.tail_rate is None else budget.tail_rate,
+        )
+        pipeline = pipelines.get(budget)
+        if pipeline is None:
+            pipeline = _Pipeline[P](budget, max_buffered_items, max_buffered_count)
+            pipelines[budget] = pipeline
+        pipeline.indexes.append(index)
+
+    # Incision levels are the same for every budget, so they are worked out
+    # once. Resources are handed to the budgets in runs whose resources after
+    # the first all join by the same level: a budget whose innermost open
+    # segment has that level takes the rest of the run in bulk.
+    window: _Window[P] = _Window()
+    begin = 0
+    level = 0
+    end_incision = 0
+    for resource in resources:
+        end = window.end
+        size = end - begin
+        if size > 1 and (
+            end_incision + resource.start_incision != level or size >= _RUN_SIZE
+        ):
+            yield from _hand_over(pipelines, window, begin, end, level)
+            begin = end
+        elif size == 1:
+            level = end_incision + resource.start_incision
+        window.append(resource)
+        end_incision = resource.end_incision
+
+    if window.end > begin:
+        yield from _hand_over(pipelines, window, begin, window.end, level)
+    for pipeline in pipelines.values():
+        for group in pipeline.close(window):
+            yield from _share(group, pipeline.indexes)
+
+
+def _hand_over(
+    pipelines: dict[Budget, _Pipeline[P]],
+    window: _Window[P],
+    begin: int,
+    end: int,
+    level: int,
+) -> Generator[tuple[int, Group[P]], None, None]:
+    for pipeline in pipelines.values():
+        for group in pipeline.feed(window, begin, end, level):
+            yield from _share(group, pipeline.indexes)
+    window.forget_before(
+        min((pipeline.emitted_end for pipeline in pipelines.values()), default=end)
+    )
+
+
+def _share(
+    group: Group[P], indexes: list[int]
+) -> Generator[tuple[int, Group[P]], None, None]:
+    # the first budget takes the group, the others a copy each
+    yield indexes[0], group
+    for index in indexes[1:]:
+        yield index, _copy_group(group)
+
+
+def _copy_group(group: Group[P]) -> Group[P]:
+    return Group(
+        head_remain_count=group.head_remain_count,
+        tail_remain_count=group.tail_remain_count,
+        head=[_copy_item(item) for item in group.head],
+        body=[_copy_item(item) for item in group.body],
+        tail=[_copy_item(item) for item in group.tail],
+    )
+
+
+def _copy_item(item: Resource[P] | Segment[P]) -> Resource[P] | Segment[P]:
+    if isinstance(item, Segment):
+        return Segment(count=item.count, resources=list(item.resources))
+    return item
+
+
+class _Window(Generic[P]):
+    # The resources read and their cumulative counts, by absolute index, from
+    # the first resource that some budget has not turned into an item yet.
+    def __init__(self):
+        self.sums: PrefixSums = PrefixSums()
+        self._resources: list[Resource[P]] = []
+        self._offset: int = 0
+
+    @property
+    def end(self) -> int:
+        return self._offset + len(self._resources)
+
+    def __getitem__(self, index: int) -> Resource[P]:
+        return self._resources[index - self._offset]
+
+    def append(self, resource: Resource[P]) -> None:
+        self._resources.append(resource)
+        self.sums.append(resource.count)
+
+    def slice(self, begin: int, end: int) -> list[Resource[P]]:
+        return self._resources[begin - self._offset : end - self._offset]
+
+    def forget_before(self, index: int) -> None:
+        drop_count = index - self._offset
+        if drop_count > len(self._resources) // 2:
+            del self._resources[:drop_count]
+            self._offset = index
+        self.sums.forget_before(index)
+
+
+class _Pipeline(Generic[P]):
+    # What `split` runs for one budget, fed one run of resources at a time.
+    def __init__(
+        self,
+        budget: Budget,
+        max_buffered_items: int | None,
+        max_buffered_count: int | None,
+    ):
+        assert budget.gap_rate is not None and budget.tail_rate is not None
+        max_count = budget.max_segment_count
+        body_max_count = max_count - floor(max_count * budget.gap_rate) * 2
+        self.indexes: list[int] = []
+        # the resources before it are all in items handed to the grouper
+        self.emitted_end: int = 0
+        # bulk feeding skips the buffer limit checks
+        self._bulk: bool = max_buffered_items is None and max_buffered_count is None
+        self._segmenter: Segmenter = Segmenter(
+            body_max_count,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        )
+        self._grouper: Grouper[Resource[P] | Segment[P]] = Grouper(
+            max_count=max_count,
+            gap_rate=budget.gap_rate,
+            tail_rate=budget.tail_rate,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        )
+
+    def feed(
+        self, window: _Window[P], begin: int, end: int, level: int
+    ) -> Generator[Group[P], None, None]:
+        # the same walk as `SegmentTree.group`, over one run
+        segmenter = self._segmenter
+        index = begin
+        while index < end:
+            resource = window[index]
+            segmenter.feed(
+                resource.count, resource.start_incision, resource.end_incision
+            )
+            index += 1
+            if self._bulk and index < end and segmenter.open_level == level:
+                segmenter.extend(window.sums, end, window[end - 1].end_incision)
+                index = end
+            yield from self._pop_chunks(window)
+
+    def close(self, window: _Window[P]) -> Generator[Group[P], None, None]:
+        self._segmenter.close()
+        yield from self._pop_chunks(window)
+        for group in self._grouper.close():
+            yield report_truncated(group)
+
+    def _pop_chunks(self, window: _Window[P]) -> Generator[Group[P], None, None]:
+        chunks = self._segmenter.chunks
+        while chunks:
+            chunk = chunks.popleft()
+            item: Resource[P] | Segment[P]
+            if chunk.end - chunk.begin == 1:
+                item = window[chunk.begin]
+            else:
+                item = Segment(
+                    count=chunk.count, resources=window.slice(chunk.begin, chunk.end)
+                )
+            self.emitted_end = chunk.end
+            for group in self._grouper.push(item):
+                yield report_truncated(group)
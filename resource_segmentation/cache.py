@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from array import array
+from hashlib import blake2b
+from struct import Struct
+from threading import Lock
+from typing import Iterable
+
+from .splitter import split_spans
+from .types import GroupSpan, Resource
+
+# bumped whenever grouping would give different spans for the same key
+_VERSION = 1
+_PARAMETERS = Struct("<qqqddqq")
+_SPAN_FIELD_COUNT = 6
+_SUFFIX = ".spans"
+_FLUSH_SIZE = 4096
+
+
+class SplitCache:
+    """Spans of documents split before, kept in a directory with a size limit.
+
+    Entries are keyed by a digest of the count and incisions of every resource and of the `split` parameters, so a document whose resources have not changed is not segmented or grouped again, whatever its payloads. Reading an entry marks it used; once the entries take more than `max_bytes`, the least recently used ones are removed.
+    Several processes can share the directory: each entry is written to a temporary file and renamed into place, and a reader never sees half an entry. The size limit is only checked when writing, against what this process knows of the directory, so it may be exceeded for a while.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int = 1 << 28):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        os.makedirs(directory, exist_ok=True)
+        self._directory: str = os.fspath(directory)
+        self._max_bytes: int = max_bytes
+        # `None` until the directory is first scanned
+        self._total_bytes: int | None = None
+        self._lock: Lock = Lock()
+
+    def split_spans(
+        self,
+        resources: Iterable[Resource],
+        max_segment_count: int,
+        border_incision: int,
+        gap_rate: float = 0.0,
+        tail_rate: float = 0.5,
+        max_buffered_items: int | None = None,
+        max_buffered_count: int | None = None,
+    ) -> list[GroupSpan]:
+        """Same spans as `split_spans`, taken from the cache when the document was split before.
+
+        Heads included, the spans are those of `split_spans`, so they can differ from the heads of `split` in the same cases (see `split_spans`).
+
+        Args:
+          resources (Iterable[Resource]): The collection of resources to be grouped.
+          max_segment_count (int): The maximum number of resource segments.
+          border_incision (int): Border incision level for segmentation.
+          gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
+          tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail. For an even distribution, use 0.5.
+          max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups, as in `split`. Part of the key, since forced cuts change the spans.
+          max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups, as in `split`. Part of the key as well.
+
+        Returns:
+          list[GroupSpan]: The index ranges of each group.
+        """
+        resources = list(resources)
+        key = _fingerprint(
+            resources,
+            max_segment_count,
+            border_incision,
+            gap_rate,
+            tail_rate,
+            max_buffered_items,
+            max_buffered_count,
+        )
+        spans = self._load(key)
+        if spans is None:
+            spans = list(
+                split_spans(
+                    resources,
+                    max_segment_count,
+                    border_incision,
+                    gap_rate,
+                    tail_rate,
+                    max_buffered_items,
+                    max_buffered_count,
+                )
+            )
+            self._store(key, spans)
+        return spans
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key + _SUFFIX)
+
+    def _load(self, key: str) -> list[GroupSpan] | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # never written, or removed by another process in the meantime
+            return None
+        values = array("q")
+        if len(data) % (values.itemsize * _SPAN_FIELD_COUNT) != 0:
+            return None
+        values.frombytes(data)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return [
+            GroupSpan(
+                head_remain_count=values[index + 4],
+                tail_remain_count=values[index + 5],
+                head_begin=values[index],
+                body_begin=values[index + 1],
+                body_end=values[index + 2],
+                tail_end=values[index + 3],
+            )
+            for index in range(0, len(values), _SPAN_FIELD_COUNT)
+        ]
+
+    def _store(self, key: str, spans: list[GroupSpan]) -> None:
+        values = array("q")
+        for span in spans:
+            values.extend(
+                (
+                    span.head_begin,
+                    span.body_begin,
+                    span.body_end,
+                    span.tail_end,
+                    span.head_remain_count,
+                    span.tail_remain_count,
+                )
+            )
+        if sys.byteorder == "big":
+            values.byteswap()
+        data = values.tobytes()
+
+        descriptor, temporary = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self._max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # rescans, since other processes may have added or removed entries too
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total_bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total_bytes <= self._max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+        self._total_bytes = total_bytes
+
+    def _scan(self) -> list[tuple[str, int, float]]:
+        # (path, size, last use) of every entry
+        entries: list[tuple[str, int, float]] = []
+        with os.scandir(self._directory) as scanned:
+            for entry in scanned:
+                if not entry.name.endswith(_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+
+def _fingerprint(
+    resources: list[Resource],
+    max_segment_count: int,
+    border_incision: int,
+    gap_rate: float,
+    tail_rate: float,
+    max_buffered_items: int | None,
+    max_buffered_count: int | None,
+) -> str:
+    digest = blake2b(digest_size=20)
+    digest.update(
+        _PARAMETERS.pack(
+            _VERSION,
+            max_segment_count,
+            border_incision,
+            gap_rate,
+            tail_rate,
+            # -1 for no limit, which is never a limit itself
+            -1 if max_buffered_items is None else max_buffered_items,
+            -1 if max_buffered_count is None else max_buffered_count,
+        )
+    )
+    values = array("q")
+    for resource in resources:
+        values.append(resource.count)
+        values.append(resource.start_incision)
+        values.append(resource.end_incision)
+        if len(values) >= _FLUSH_SIZE:
+            _update(digest, values)
+            del values[:]
+    _update(digest, values)
+    return digest.hexdigest()
+
+
+def _update(digest: blake2b, values: array[int]) -> None:
+    # little-endian, like the entries, so hosts of either byte order share keys
+    if sys.byteorder == "big":
+        values.byteswap()
+    digest.update(values)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import pickle
+from dataclasses import dataclass
+from itertools import islice
+from math import floor
+from typing import Callable, Generator, Generic, Iterable, cast
+
+from .group import Grouper
+from .segment import Chunk, Segmenter
+from .truncation import truncate_gap
+from .types import Group, P, Resource, Segment
+
+
+@dataclass
+class SplitCheckpoint:
+    # `offset` is the index of the first resource a resumed run has to be given
+    # and `group_count` the number of groups yielded before the checkpoint.
+    # `state` holds the open segments and the grouping buffers, by resource index.
+    offset: int
+    group_count: int
+    state: bytes
+
+
+def split_checkpointed(
+    resources: Iterable[Resource[P]],
+    max_segment_count: int,
+    border_incision: int,
+    gap_rate: float = 0.0,
+    tail_rate: float = 0.5,
+    checkpoint_every: int = 1,
+    on_checkpoint: Callable[[SplitCheckpoint], None] | None = None,
+    resume_from: SplitCheckpoint | None = None,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> Generator[Group[P], None, None]:
+    """Group resources like `split`, taking checkpoints a run can be resumed from.
+
+    Once at least `checkpoint_every` groups were yielded since the last checkpoint, and the caller asks for the next group, `on_checkpoint` receives a `SplitCheckpoint` of everything the split is in the middle of. Resources themselves are not part of it, so it stays small whatever their payloads.
+    To resume, pass it as `resume_from` together with the resources from index `checkpoint.offset` on and the same settings: the groups yielded are exactly those an uninterrupted run would have yielded after the first `checkpoint.group_count` ones.
+    The state is a pickle, so only resume from checkpoints you stored yourself.
+
+    Args:
+      resources (Iterable[Resource]): The collection of resources to be grouped, from `resume_from.offset` on when resuming.
+      max_segment_count (int): The maximum number of resource segments.
+      border_incision (int): Border incision level for segmentation.
+      gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
+      tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail. For an even distribution, use 0.5.
+      checkpoint_every (int): How many groups to yield at least between two checkpoints.
+      on_checkpoint (Callable[[SplitCheckpoint], None] | None): Receives each checkpoint. No checkpoint is taken without it.
+      resume_from (SplitCheckpoint | None): The checkpoint to go on from.
+      max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups, as in `split`. A resumed run keeps the limits of its checkpoint.
+      max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups, as in `split`.
+
+    Yields:
+      Generator[Group, None, None]: A generator yielding grouped resource sets. Each group is a `Group` object.
+    """
+    _ = border_incision
+    if checkpoint_every < 1:
+        raise ValueError("checkpoint_every must be at least 1")
+
+    if resume_from is None:
+        gap_max_count = floor(max_segment_count * gap_rate)
+        segmenter = Segmenter(
+            max_segment_count - gap_max_count * 2,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        )
+        grouper: Grouper[Chunk] = Grouper(
+            max_segment_count,
+            gap_rate,
+            tail_rate,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        )
+        window: _Window[P] = _Window(0)
+        chunk_end = 0
+        group_count = 0
+    else:
+        segmenter, grouper, chunk_end = pickle.loads(resume_from.state)
+        window = _Window(resume_from.offset)
+        group_count = resume_from.group_count
+
+    resources_iter = iter(resources)
+    # resources the segmenter has already read are only needed to report groups
+    index = segmenter.fed_count
+    window.extend(islice(resources_iter, index - window.end))
+    if window.end < index:
+        raise ValueError("resources end before the checkpoint")
+
+    checked_count = group_count
+    is_closed = False
+    while not is_closed:
+        resource = next(resources_iter, None)
+        if resource is None:
+            segmenter.close()
+            is_closed = True
+        else:
+            window.append(resource)
+            segmenter.feed(
+                count=resource.count,
+                start_incision=resource.start_incision,
+                end_incision=resource.end_incision,
+            )
+        groups: list[Group] = []
+        while segmenter.chunks:
+            chunk = segmenter.chunks.popleft()
+            chunk_end = chunk.end
+            groups.extend(group.report() for group in grouper.push(chunk))
+        if is_closed:
+            groups.extend(group.report() for group in grouper.close())
+        if not groups:
+            continue
+
+        for group in groups:
+            yield truncate_gap(window.to_group(group))
+        group_count += len(groups)
+        offset = min((chunk.begin for chunk in grouper.held_items()), default=chunk_end)
+        window.forget_before(offset)
+
+        if (
+            on_checkpoint is not None
+            and not is_closed
+            and group_count - checked_count >= checkpoint_every
+        ):
+            checked_count = group_count
+            on_checkpoint(
+                SplitCheckpoint(
+                    offset=offset,
+                    group_count=group_count,
+                    state=pickle.dumps((segmenter, grouper, chunk_end)),
+                )
+            )
+
+
+class _Window(Generic[P]):
+    # The resources from `begin` on, addressed by their index in the whole input.
+    def __init__(self, begin: int):
+        self._resources: list[Resource[P]] = []
+        self._begin: int = begin
+
+    @property
+    def end(self) -> int:
+        return self._begin + len(self._resources)
+
+    def append(self, resource: Resource[P]):
+        self._resources.append(resource)
+
+    def extend(self, resources: Iterable[Resource[P]]):
+        self._resources.extend(resources)
+
+    def forget_before(self, index: int):
+        drop_count = index - self._begin
+        if drop_count > len(self._resources) // 2:
+            del self._resources[:drop_count]
+            self._begin = index
+
+    def to_group(self, report: Group) -> Group[P]:
+        return Group(
+            head_remain_count=report.head_remain_count,
+            tail_remain_count=report.tail_remain_count,
+            head=[self._to_item(chunk) for chunk in cast(list[Chunk], report.head)],
+            body=[self._to_item(chunk) for chunk in cast(list[Chunk], report.body)],
+            tail=[self._to_item(chunk) for chunk in cast(list[Chunk], report.tail)],
+        )
+
+    def _to_item(self, chunk: Chunk) -> Resource[P] | Segment[P]:
+        begin = chunk.begin - self._begin
+        if chunk.end - chunk.begin == 1:
+            return self._resources[begin]
+        return Segment(
+            count=chunk.count,
+            resources=self._resources[begin : begin + chunk.end - chunk.begin],
+        )
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from math import floor
+from typing import TYPE_CHECKING, Any, Generator, NamedTuple
+
+from .group import group_chunks
+from .segment import Chunk, Segmenter
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import ArrayLike, NDArray
+
+
+class GroupArrays(NamedTuple):
+    head_begin: NDArray[np.int64]
+    head_end: NDArray[np.int64]
+    body_begin: NDArray[np.int64]
+    body_end: NDArray[np.int64]
+    tail_begin: NDArray[np.int64]
+    tail_end: NDArray[np.int64]
+    head_remain_count: NDArray[np.int64]
+    tail_remain_count: NDArray[np.int64]
+
+
+def split_arrays(
+    counts: ArrayLike,
+    start_incisions: ArrayLike,
+    end_incisions: ArrayLike,
+    max_segment_count: int,
+    border_incision: int,
+    gap_rate: float = 0.0,
+    tail_rate: float = 0.5,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> GroupArrays:
+    """Group resources given as parallel integer arrays.
+
+    This is the columnar counterpart of `split`: the i-th resource is described by `counts[i]`, `start_incisions[i]` and `end_incisions[i]`, and no `Resource` object is ever created.
+    Groups are returned as index arrays over the input, one entry per group, with half-open `[begin, end)` ranges for head, body and tail, already truncated. They are the groups `split_spans` gives, heads included: where `split` keeps a head out of order, the head here is the resources right before the body, as described there.
+
+    Requires NumPy.
+
+    Args:
+      counts (ArrayLike): Non-negative count of each resource.
+      start_incisions (ArrayLike): Start incision of each resource.
+      end_incisions (ArrayLike): End incision of each resource.
+      max_segment_count (int): The maximum number of resource segments.
+      border_incision (int): Border incision level for segmentation.
+      gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
+      tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail.
+      max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups, as in `split`. With a limit, resources are fed one by one instead of in bulk.
+      max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups, as in `split`.
+
+    Returns:
+      GroupArrays: The offsets and remain counts of every group.
+    """
+    np = _import_numpy()
+    _ = border_incision
+
+    counts_array = np.asarray(counts, dtype=np.int64)
+    starts_array = np.asarray(start_incisions, dtype=np.int64)
+    ends_array = np.asarray(end_incisions, dtype=np.int64)
+    if counts_array.ndim != 1 or not (
+        counts_array.shape == starts_array.shape == ends_array.shape
+    ):
+        raise ValueError("counts and incisions must be 1-D arrays of the same length")
+    if counts_array.size > 0 and counts_array.min() < 0:
+        raise ValueError("counts must not be negative")
+
+    bases_array = np.zeros(counts_array.size + 1, dtype=np.int64)
+    np.cumsum(counts_array, out=bases_array[1:])
+
+    gap_max_count = floor(max_segment_count * gap_rate)
+    body_max_count = max_segment_count - gap_max_count * 2
+
+    bounds = np.array(
+        list(
+            group_chunks(
+                chunks_iter=_iter_chunks(
+                    counts_array,
+                    starts_array,
+                    ends_array,
+                    bases_array,
+                    Segmenter(
+                        body_max_count,
+                        max_buffered_items=max_buffered_items,
+                        max_buffered_count=max_buffered_count,
+                    ),
+                    bulk=max_buffered_items is None and max_buffered_count is None,
+                ),
+                max_count=max_segment_count,
+                gap_rate=gap_rate,
+                tail_rate=tail_rate,
+                max_buffered_items=max_buffered_items,
+                max_buffered_count=max_buffered_count,
+            )
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 6)
+    head_begin, body_begin, body_end, tail_end, head_remain, tail_remain = bounds.T
+
+    # head keeps resources from the back while the kept count is below its remain
+    # count, tail keeps them from the front: both ends are found by bisection
+    kept_head_begin = (
+        np.searchsorted(bases_array, bases_array[body_begin] - head_remain, "right") - 1
+    )
+    head_begin = np.maximum(head_begin, np.minimum(kept_head_begin, body_begin))
+    kept_tail_end = np.searchsorted(
+        bases_array, bases_array[body_end] + tail_remain, "left"
+    )
+    tail_end = np.minimum(tail_end, np.maximum(kept_tail_end, body_end))
+
+    return GroupArrays(
+        head_begin=head_begin,
+        head_end=body_begin.copy(),
+        body_begin=body_begin,
+        body_end=body_end,
+        tail_begin=body_end.copy(),
+        tail_end=tail_end,
+        head_remain_count=head_remain,
+        tail_remain_count=tail_remain,
+    )
+
+
+def _iter_chunks(
+    counts: NDArray[np.int64],
+    starts: NDArray[np.int64],
+    ends: NDArray[np.int64],
+    bases: NDArray[np.int64],
+    segmenter: Segmenter,
+    bulk: bool,
+) -> Generator[Chunk, None, None]:
+    np = _import_numpy()
+    size = counts.size
+    if size == 0:
+        return
+
+    # levels[i] is the incision level between resource i - 1 and i. Where it
+    # repeats, resources join the innermost open segment one after another and
+    # are fed in bulk.
+    levels = np.zeros(size, dtype=np.int64)
+    levels[1:] = ends[:-1] + starts[1:]
+    changes: list[int] = (np.flatnonzero(levels[2:] != levels[1:-1]) + 2).tolist()
+
+    count_list: list[int] = counts.tolist()
+    start_list: list[int] = starts.tolist()
+    end_list: list[int] = ends.tolist()
+    level_list: list[int] = levels.tolist()
+    base_list: list[int] = bases.tolist()
+
+    index = 0
+    while index < size:
+        segmenter.feed(count_list[index], start_list[index], end_list[index])
+        index += 1
+        if bulk and index < size and segmenter.open_level == level_list[index]:
+            position = bisect_right(changes, index)
+            stop = changes[position] if position < len(changes) else size
+            segmenter.extend(base_list, stop, end_list[stop - 1])
+            index = stop
+        while segmenter.chunks:
+            yield segmenter.chunks.popleft()
+
+    segmenter.close()
+    yield from segmenter.chunks
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError(
+            "split_arrays requires NumPy: pip install resource-segmentation[numpy]"
+        ) from error
+    return numpy
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from typing import Callable, Generic, Hashable, Protocol
+
+from .types import P, Resource
+
+
+class CountCache(Protocol):
+    def get(self, key: Hashable) -> int | None: ...
+
+    def put(self, key: Hashable, count: int) -> None: ...
+
+
+class LRUCountCache:
+    """A bounded count cache that evicts the least recently used entry first.
+
+    Safe to share between threads, e.g. across the documents of `split_many` on a thread pool.
+    """
+
+    def __init__(self, max_size: int = 65536):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._max_size: int = max_size
+        self._counts: OrderedDict[Hashable, int] = OrderedDict()
+        self._lock: Lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def get(self, key: Hashable) -> int | None:
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+            return count
+
+    def put(self, key: Hashable, count: int) -> None:
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            while len(self._counts) > self._max_size:
+                self._counts.popitem(last=False)
+
+
+def payload_fingerprint(payload: object) -> Hashable:
+    """Default cache key: a digest of text and bytes, the payload itself otherwise.
+
+    Raises `TypeError` for any other payload that is not hashable: pass a `fingerprint` of your own to cache such payloads.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return blake2b(payload, digest_size=16).digest()
+    if not isinstance(payload, Hashable):
+        raise TypeError(
+            f"a payload of type {type(payload).__name__} is not hashable and "
+            "cannot be cached without a fingerprint"
+        )
+    return payload
+
+
+class LazyResource(Resource[P], Generic[P]):
+    """A resource whose count is computed from its payload on first use.
+
+    `counter(payload)` is called at most once per resource, when something first reads `count`. Since `split` reads resources one by one as it goes, counting is spread over the run instead of being done up front.
+    With a `cache`, counts are shared between resources whose payloads have the same fingerprint (by default `payload_fingerprint`), so repeated payloads are counted once.
+    """
+
+    # pylint: disable=super-init-not-called
+    def __init__(
+        self,
+        counter: Callable[[P], int],
+        start_incision: int,
+        end_incision: int,
+        payload: P,
+        cache: CountCache | None = None,
+        fingerprint: Callable[[P], Hashable] = payload_fingerprint,
+    ):
+        self.start_incision = start_incision
+        self.end_incision = end_incision
+        self.payload = payload
+        self._counter: Callable[[P], int] = counter
+        self._cache: CountCache | None = cache
+        self._fingerprint: Callable[[P], Hashable] = fingerprint
+        self._count: int | None = None
+
+    @property
+    def is_counted(self) -> bool:
+        return self._count is not None
+
+    @property
+    def count(self) -> int:  # pyright: ignore[reportIncompatibleVariableOverride]
+        if self._count is None:
+            self._count = self._resolve()
+        return self._count
+
+    def _resolve(self) -> int:
+        cache = self._cache
+        if cache is None:
+            return self._counter(self.payload)
+        key = self._fingerprint(self.payload)
+        count = cache.get(key)
+        if count is None:
+            count = self._counter(self.payload)
+            cache.put(key, count)
+        return count
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Generator, Generic, Iterable
+
+from .splitter import split
+from .types import Group, P, Resource
+
+
+@dataclass
+class PackedGroup(Generic[P]):
+    # `parts` are `(document index, group)` pairs, in document order, and
+    # `count` is what they hold together
+    count: int = 0
+    parts: list[tuple[int, Group[P]]] = field(default_factory=list)
+
+
+def split_documents(
+    documents: Iterable[Iterable[Resource[P]]],
+    max_segment_count: int,
+    border_incision: int,
+    gap_rate: float = 0.0,
+    tail_rate: float = 0.5,
+    lookahead: int = 16,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> Generator[PackedGroup[P], None, None]:
+    """Group many documents, packing the small ones together.
+
+    Each document is grouped on its own, exactly as `split` would group it, so nothing ever overlaps across documents. The groups that fill a context window alone are yielded as they are. The last group of each document, which is the whole document when it is small, is packed with those of other documents into shared groups of at most `max_segment_count`.
+    Packing goes as documents come: each last group goes into the open shared group it fills best, and when more than `lookahead` are open, the fullest one is yielded.
+
+    Args:
+      documents (Iterable[Iterable[Resource]]): The documents, each a collection of resources to be grouped on its own.
+      max_segment_count (int): The maximum number of resource segments.
+      border_incision (int): Border incision level for segmentation.
+      gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
+      tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail. For an even distribution, use 0.5.
+      lookahead (int): Number of shared groups kept open at once.
+      max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups, as in `split`, within each document.
+      max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups, as in `split`, within each document.
+
+    Yields:
+      Generator[PackedGroup, None, None]: Groups of one or more documents, each part with the index of its document in `documents`.
+    """
+    if lookahead < 1:
+        raise ValueError("lookahead must be at least 1")
+
+    bins: list[PackedGroup[P]] = []
+    for index, document in enumerate(documents):
+        last: Group[P] | None = None
+        for group in split(
+            iter(document),
+            max_segment_count=max_segment_count,
+            border_incision=border_incision,
+            gap_rate=gap_rate,
+            tail_rate=tail_rate,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        ):
+            if last is not None:
+                yield PackedGroup(_group_count(last), [(index, last)])
+            last = group
+        if last is None:
+            continue
+
+        count = _group_count(last)
+        room = max_segment_count - count
+        fitting = [packed for packed in bins if packed.count <= room]
+        if not fitting:
+            if room <= 0:
+                yield PackedGroup(count, [(index, last)])
+                continue
+            packed = PackedGroup()
+            bins.append(packed)
+        else:
+            packed = max(fitting, key=lambda packed: packed.count)
+        packed.count += count
+        packed.parts.append((index, last))
+
+        if packed.count >= max_segment_count:
+            bins.remove(packed)
+            yield packed
+        elif len(bins) > lookahead:
+            fullest = max(bins, key=lambda packed: packed.count)
+            bins.remove(fullest)
+            yield fullest
+
+    yield from bins
+
+
+def _group_count(group: Group[P]) -> int:
+    return sum(
+        item.count for part in (group.head, group.body, group.tail) for item in part
+    )
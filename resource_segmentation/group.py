@@ -1,53 +1,461 @@
 from __future__ import annotations
 
+import warnings
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 from math import floor
-from typing import Generator, Generic, Iterator
-
-from .stream import Stream
+from typing import (
+    Generator,
+    Generic,
+    Iterator,
+    NamedTuple,
+    Protocol,
+    Sequence,
+    TypeVar,
+    cast,
+)
+
+from .segment import BufferLimitWarning, Chunk
+from .stats import SplitStats
 from .types import Group, P, Resource, Segment
 
 
+class _Countable(Protocol):
+    @property
+    def count(self) -> int: ...
+
+
+_I = TypeVar("_I", bound=_Countable)
+
+
 def group_items(
     items_iter: Iterator[Resource[P] | Segment],
     max_count: int,
     gap_rate: float,
     tail_rate: float,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
 ) -> Generator[Group[P], None, None]:
-    gap_max_count = floor(max_count * gap_rate)
-    assert gap_max_count >= 0
+    for group in _iter_groups(
+        items_iter,
+        max_count,
+        gap_rate,
+        tail_rate,
+        max_buffered_items,
+        max_buffered_count,
+    ):
+        yield group.report()
+
+
+# (head_begin, body_begin, body_end, tail_end, head_remain_count, tail_remain_count)
+GroupBounds = tuple[int, int, int, int, int, int]
+
+
+def group_chunks(
+    chunks_iter: Iterator[Chunk],
+    max_count: int,
+    gap_rate: float,
+    tail_rate: float,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> Generator[GroupBounds, None, None]:
+    """Same as `group_items`, but reports each group by its resource offsets.
+
+    Head and tail are reported as buffered, before gap truncation: a head or
+    tail whose remain count is 0 still has to be dropped by the caller.
+    A head is reported from its lowest resource up to the body. `group_items`
+    keeps a head that never got sealed in the order it was taken, which may
+    skip resources or put them out of order; an offset range cannot say that,
+    so it covers every resource in between instead.
+    """
+    for group in _iter_groups(
+        chunks_iter,
+        max_count,
+        gap_rate,
+        tail_rate,
+        max_buffered_items,
+        max_buffered_count,
+    ):
+        head_remain_count, tail_remain_count = group.remain_counts()
+        body_begin = group.body[0].begin
+        body_end = group.body[-1].end
+        head_begin = min((chunk.begin for chunk in group.head), default=body_begin)
+        tail_end = group.tail[-1].end if group.tail.has_any else body_end
+        yield (
+            head_begin,
+            body_begin,
+            body_end,
+            tail_end,
+            head_remain_count,
+            tail_remain_count,
+        )
+
 
-    curr_group: _Group[P] = _Group(
+class GroupStart(NamedTuple):
+    # Everything the grouping carries from one group to the next, by resource
+    # index: where the group starts reading and the chunks already in its head.
+    # The head is kept as a list because an unsealed head keeps the reversed
+    # order in which `_Group.next` collected it.
+    begin: int
+    head: tuple[int, ...]
+    head_sealed: bool
+
+
+def group_from(
+    chunks: Sequence[Chunk],
+    start: GroupStart,
+    stop: int,
+    max_count: int,
+    gap_rate: float,
+    tail_rate: float,
+) -> Generator[tuple[_Group[Chunk], GroupStart], None, None]:
+    """Groups `chunks` from `start` on, the way `group_chunks` groups a stream.
+
+    Yields each group with the start of the group after it. Grouping from
+    `GroupStart(0, (), True)` to the end of `chunks` gives the same groups as
+    `group_chunks`. If `stop` (an index into `chunks`) is not the end, a group
+    still waiting for chunks beyond `stop` is not yielded.
+    """
+    group: _Group[Chunk] = _Group(
         _Attributes(
             max_count=max_count,
-            gap_max_count=gap_max_count,
+            gap_max_count=floor(max_count * gap_rate),
             tail_rate=tail_rate,
         )
     )
-    curr_group.head.seal()
-    stream: Stream[_Item] = Stream(items_iter)
+    for begin in start.head:
+        group.head.append(chunks[_find_chunk(chunks, begin)])
+    if start.head_sealed:
+        group.head.seal()
 
+    is_end = stop >= len(chunks)
+    index = _find_chunk(chunks, start.begin)
     while True:
-        item = stream.get()
-        if item is not None:
-            success = curr_group.append(item)
-            if success:
-                continue
+        chunk = chunks[index] if index < stop else None
+        if chunk is None and not is_end:
+            break
+        if chunk is not None and group.append(chunk):
+            index += 1
+            continue
+
+        # the overflowing chunk and the tail are read again by the next group
+        index -= len(group.tail)
+        next_group = group.next()
+        if group.body.has_any:
+            yield (
+                group,
+                GroupStart(
+                    begin=chunks[index].begin
+                    if index < len(chunks)
+                    else group.body[-1].end,
+                    head=tuple(c.begin for c in next_group.head),
+                    head_sealed=next_group.head.is_sealed,
+                ),
+            )
+        if chunk is None and not group.tail.has_any:
+            break
+        group = next_group
 
-        if curr_group.body.has_any:
-            yield curr_group.report()
-        if item is not None:
-            stream.recover(item)
-        for tail_item in reversed(list(curr_group.tail)):
-            stream.recover(tail_item)
 
-        if not stream.has_buffer and item is None:
-            # next item never comes
-            break
-        curr_group = curr_group.next()
+def _find_chunk(chunks: Sequence[Chunk], begin: int) -> int:
+    return bisect_left(chunks, begin, key=lambda chunk: chunk.begin)
 
 
-_Item = Resource[P] | Segment[P]
+def _iter_groups(
+    items_iter: Iterator[_I],
+    max_count: int,
+    gap_rate: float,
+    tail_rate: float,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> Generator[_Group[_I], None, None]:
+    grouper: Grouper[_I] = Grouper(
+        max_count,
+        gap_rate,
+        tail_rate,
+        max_buffered_items=max_buffered_items,
+        max_buffered_count=max_buffered_count,
+    )
+    for item in items_iter:
+        yield from grouper.push(item)
+    yield from grouper.close()
+
+
+class Grouper(Generic[_I]):
+    # Push-based form of the grouping loop, over a sliding window of the items
+    # that open groups may still contain. The item that overflowed a group and
+    # the tail it left behind are read again by the next group straight from
+    # the window, and running counts tell where each buffer ends, so no item is
+    # appended again or checked one by one whatever the size of the overlap.
+    # Same groups as appending items to `_Group` and rebuilding heads with
+    # `_Group.next`, including the order of a head that never got sealed.
+    # Items that never overflow a body (e.g. endless items of count 0) keep the
+    # open group waiting. Past `max_buffered_items` resources or
+    # `max_buffered_count` count held, the open groups are completed where the
+    # input stands, as if it ended there, and grouping starts afresh.
+    def __init__(
+        self,
+        max_count: int,
+        gap_rate: float,
+        tail_rate: float,
+        stats: SplitStats | None = None,
+        max_buffered_items: int | None = None,
+        max_buffered_count: int | None = None,
+    ):
+        gap_max_count = floor(max_count * gap_rate)
+        assert gap_max_count >= 0
+        self._attr: _Attributes = _Attributes(
+            max_count=max_count,
+            gap_max_count=gap_max_count,
+            tail_rate=tail_rate,
+        )
+        self._body_max_count: int = max_count - gap_max_count * 2
+        assert self._body_max_count > 0
+        self._stats: SplitStats | None = stats
+        self._max_buffered_items: int | None = max_buffered_items
+        self._max_buffered_count: int | None = max_buffered_count
+
+        # `_items[i - _offset]` is item `i`; `_sums[i - _offset]` the count before it
+        # and, with a buffer limit, `_sizes[i - _offset]` the resources before it
+        self._items: list[_I] = []
+        self._sums: list[int] = [0]
+        self._sizes: list[int] | None = (
+            None if max_buffered_items is None and max_buffered_count is None else [0]
+        )
+        self._offset: int = 0
+
+        # the open group, by item index: its head, where its body begins and,
+        # once the body is sealed, where it ends
+        self._head: list[int] = []
+        # lowest index in `_head`, which may be out of order; unused while empty
+        self._head_min: int = 0
+        self._head_count: int = 0
+        self._head_sealed: bool = True
+        self._body_begin: int = 0
+        self._body_end: int | None = None
+
+    def push(self, item: _I) -> list[_Group[_I]]:
+        self._items.append(item)
+        self._sums.append(self._sums[-1] + item.count)
+        sizes = self._sizes
+        if sizes is None:
+            return list(self._drain(is_closed=False))
+        sizes.append(sizes[-1] + _item_size(item))
+        groups = list(self._drain(is_closed=False))
+        if self._is_over_limit():
+            groups.extend(self._force_cut())
+        return groups
+
+    def close(self) -> list[_Group[_I]]:
+        return list(self._drain(is_closed=True))
+
+    def held_items(self) -> Generator[_I, None, None]:
+        # every item that a group not reported yet may still contain
+        offset = self._offset
+        for index in self._head:
+            yield self._items[index - offset]
+        yield from self._items[self._body_begin - offset :]
+
+    def _drain(self, is_closed: bool) -> Generator[_Group[_I], None, None]:
+        end = self._offset + len(self._items)
+        gap_max_count = self._attr.gap_max_count
+        while True:
+            if not self._head_sealed:
+                # an unsealed head goes on taking items until one does not fit
+                begin = self._body_begin
+                fit_end = self._fit_end(
+                    begin, end, gap_max_count - self._head_count, not self._head
+                )
+                if not self._head:
+                    self._head_min = begin
+                self._head.extend(range(begin, fit_end))
+                self._head_count += self._count(begin, fit_end)
+                self._body_begin = fit_end
+                if fit_end == end:
+                    # with the input closed, this group has no body and no next group
+                    break
+                self._head_sealed = True
+
+            body_end = self._body_end
+            if self._body_begin == end:
+                # nothing for the body yet, or ever once closed
+                break
+            if body_end is None:
+                body_end = self._fit_end(
+                    self._body_begin, end, self._body_max_count, True
+                )
+                if body_end == end and not is_closed:
+                    break
+                self._body_end = body_end
+
+            tail_end = self._fit_end(body_end, end, gap_max_count, True)
+            if tail_end == end and not is_closed:
+                break
+
+            yield self._complete(body_end, tail_end)
+            if self._stats is not None:
+                self._record(body_end, tail_end, end)
+            if tail_end == body_end and is_closed:
+                break
+            self._next(body_end)
+
+        self._forget_read()
+
+    def _fit_end(self, begin: int, end: int, max_count: int, first_free: bool) -> int:
+        # end of the items from `begin` on that a buffer with `max_count` left
+        # takes; a buffer that is still empty takes its first item anyway
+        offset = self._offset
+        fit_end = begin
+        if max_count >= 0:
+            sums = self._sums
+            fit_end = (
+                bisect_right(
+                    sums,
+                    sums[begin - offset] + max_count,
+                    begin - offset,
+                    end - offset + 1,
+                )
+                - 1
+                + offset
+            )
+        if first_free and fit_end == begin < end:
+            fit_end = begin + 1
+        return fit_end
+
+    def _count(self, begin: int, end: int) -> int:
+        return self._sums[end - self._offset] - self._sums[begin - self._offset]
+
+    def _complete(self, body_end: int, tail_end: int) -> _Group[_I]:
+        offset = self._offset
+        items = self._items
+        body_begin = self._body_begin
+        group: _Group[_I] = _Group(self._attr)
+        group.head.extend(
+            [items[index - offset] for index in self._head], self._head_count
+        )
+        group.body.extend(
+            items[body_begin - offset : body_end - offset],
+            self._count(body_begin, body_end),
+        )
+        group.tail.extend(
+            items[body_end - offset : tail_end - offset],
+            self._count(body_end, tail_end),
+        )
+        return group
+
+    def _record(self, body_end: int, tail_end: int, end: int) -> None:
+        stats = self._stats
+        assert stats is not None
+        # the next group reads the tail and the item that overflowed it again,
+        # after which the items that were already waiting come
+        stats.pushbacks += tail_end - body_end + (1 if tail_end < end else 0)
+        stats.max_pushback_buffer = max(stats.max_pushback_buffer, end - body_end)
+
+    def _next(self, body_end: int) -> None:
+        # Same head as `_Group.next`: taken from the back of the body, then of
+        # the head, as long as it fits. Sealed in order once an item does not
+        # fit, left in the reversed order it was taken in otherwise.
+        gap_max_count = self._attr.gap_max_count
+        body_begin = self._body_begin
+        sums = self._sums
+        offset = self._offset
+        if self._count(body_end - 1, body_end) > gap_max_count:
+            begin = body_end - 1
+        else:
+            begin = (
+                bisect_left(
+                    sums,
+                    sums[body_end - offset] - gap_max_count,
+                    body_begin - offset,
+                    body_end - offset,
+                )
+                + offset
+            )
+        count = self._count(begin, body_end)
+        if begin > body_begin:
+            head = list(range(begin, body_end))
+            head_sealed = True
+        else:
+            taken: list[int] = []
+            head_sealed = False
+            for index in reversed(self._head):
+                index_count = self._count(index, index + 1)
+                if count + index_count > gap_max_count:
+                    head_sealed = True
+                    break
+                count += index_count
+                taken.append(index)
+            if head_sealed:
+                head = [*reversed(taken), *range(body_begin, body_end)]
+            else:
+                head = [*range(body_end - 1, body_begin - 1, -1), *taken]
+
+        self._head = head
+        # once per group: the head is rebuilt here anyway
+        self._head_min = min(head, default=body_end)
+        self._head_count = count
+        self._head_sealed = head_sealed
+        self._body_begin = body_end
+        self._body_end = None
+
+    def _is_over_limit(self) -> bool:
+        sizes = self._sizes
+        assert sizes is not None
+        begin = self._hold_begin() - self._offset
+        return (
+            self._max_buffered_items is not None
+            and sizes[-1] - sizes[begin] > self._max_buffered_items
+        ) or (
+            self._max_buffered_count is not None
+            and self._sums[-1] - self._sums[begin] > self._max_buffered_count
+        )
+
+    def _force_cut(self) -> list[_Group[_I]]:
+        sizes = self._sizes
+        assert sizes is not None
+        begin = self._hold_begin() - self._offset
+        warnings.warn(
+            f"{sizes[-1] - sizes[begin]} resources counting "
+            f"{self._sums[-1] - self._sums[begin]} were held in open groups; "
+            f"cutting them off at resource {sizes[-1]}",
+            BufferLimitWarning,
+            stacklevel=3,
+        )
+        if self._stats is not None:
+            self._stats.forced_cuts += 1
+        groups = list(self._drain(is_closed=True))
+        # the next group starts from the next item, without a head
+        self._head = []
+        self._head_count = 0
+        self._head_sealed = True
+        self._body_begin = self._offset + len(self._items)
+        self._body_end = None
+        self._forget_read()
+        return groups
+
+    def _hold_begin(self) -> int:
+        # a head is always before the body
+        return self._head_min if self._head else self._body_begin
+
+    def _forget_read(self) -> None:
+        # items before the open group are never read again
+        begin = self._hold_begin()
+        drop_count = begin - self._offset
+        if drop_count > len(self._items) // 2:
+            del self._items[:drop_count]
+            del self._sums[:drop_count]
+            if self._sizes is not None:
+                del self._sizes[:drop_count]
+            self._offset = begin
+
+
+def _item_size(item: _Countable) -> int:
+    # the number of resources an item holds
+    if isinstance(item, Chunk):
+        return item.end - item.begin
+    if isinstance(item, Segment):
+        return len(item.resources)
+    return 1
 
 
 @dataclass
@@ -57,17 +465,17 @@ class _Attributes:
     tail_rate: float
 
 
-class _Group(Generic[P]):
+class _Group(Generic[_I]):
     def __init__(self, attr: _Attributes):
         self._attr: _Attributes = attr
         body_max_count = attr.max_count - attr.gap_max_count * 2
         assert body_max_count > 0
 
-        self.head: _Buffer = _Buffer(attr.gap_max_count)
-        self.tail: _Buffer = _Buffer(attr.gap_max_count)
-        self.body: _Buffer = _Buffer(body_max_count)
+        self.head: _Buffer[_I] = _Buffer(attr.gap_max_count)
+        self.tail: _Buffer[_I] = _Buffer(attr.gap_max_count)
+        self.body: _Buffer[_I] = _Buffer(body_max_count)
 
-    def append(self, item: _Item) -> bool:
+    def append(self, item: _I) -> bool:
         success: bool = False
         for buffer in (self.head, self.body, self.tail):
             if buffer.is_sealed:
@@ -80,8 +488,8 @@ class _Group(Generic[P]):
             break
         return success
 
-    def next(self) -> _Group[P]:
-        next_group: _Group[P] = _Group(self._attr)
+    def next(self) -> _Group[_I]:
+        next_group: _Group[_I] = _Group(self._attr)
         next_head = next_group.head
         for item in reversed([*self.head, *self.body]):
             if next_head.can_append(item):
@@ -91,7 +499,25 @@ class _Group(Generic[P]):
                 break
         return next_group
 
-    def report(self) -> Group[P]:
+    def report(self) -> Group:
+        head_remain_count, tail_remain_count = self.remain_counts()
+        head = list(self.head)
+        tail = list(self.tail)
+
+        if head_remain_count == 0:
+            head = []
+        if tail_remain_count == 0:
+            tail = []
+
+        return Group(
+            head_remain_count=head_remain_count,
+            tail_remain_count=tail_remain_count,
+            head=cast(list, head),
+            body=cast(list, list(self.body)),
+            tail=cast(list, tail),
+        )
+
+    def remain_counts(self) -> tuple[int, int]:
         count: int = 0
         for buffer in (self.head, self.body, self.tail):
             count += buffer.count
@@ -114,27 +540,13 @@ class _Group(Generic[P]):
                     head_remain_count = round(remain_count * (1.0 - tail_rate))
                     tail_remain_count = round(remain_count * tail_rate)
 
-        head = list(self.head)
-        tail = list(self.tail)
+        return head_remain_count, tail_remain_count
 
-        if head_remain_count == 0:
-            head = []
-        if tail_remain_count == 0:
-            tail = []
 
-        return Group(
-            head_remain_count=head_remain_count,
-            tail_remain_count=tail_remain_count,
-            head=head,
-            body=list(self.body),
-            tail=tail,
-        )
-
-
-class _Buffer:
+class _Buffer(Generic[_I]):
     def __init__(self, max_count: int):
         self._max_count: int = max_count
-        self._items: list[_Item] = []
+        self._items: list[_I] = []
         self._count: int = 0
         self._is_sealed: bool = False
 
@@ -153,18 +565,39 @@ class _Buffer:
     def seal(self):
         self._is_sealed = True
 
-    def reverse(self) -> _Buffer:
+    def reverse(self) -> _Buffer[_I]:
         self._items.reverse()
         return self
 
+    @property
+    def items(self) -> list[_I]:
+        return self._items
+
     def __iter__(self):
         return iter(self._items)
 
-    def append(self, item: _Item):
+    def __reversed__(self):
+        return reversed(self._items)
+
+    def __getitem__(self, index: int) -> _I:
+        return self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def append(self, item: _I):
         self._items.append(item)
         self._count += item.count
 
-    def can_append(self, item: _Item) -> bool:
+    def extend(self, items: list[_I], count: int):
+        # an empty buffer takes over `items`, which the caller has just built
+        if self._items:
+            self._items.extend(items)
+        else:
+            self._items = items
+        self._count += count
+
+    def can_append(self, item: _I) -> bool:
         if self._is_sealed:
             return False
         if len(self._items) == 0:
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from math import floor
+from typing import Generic, Iterable, Sequence, cast
+
+from .group import GroupStart, group_from
+from .segment import Chunk, Segmenter, iter_cuts, merge_shards
+from .truncation import truncate_gap
+from .types import Group, P, Resource, Segment
+
+
+@dataclass
+class GroupEdit(Generic[P]):
+    # `groups` replace the `removed_count` old groups starting at index `begin`
+    begin: int
+    removed_count: int
+    groups: list[Group[P]]
+
+
+@dataclass
+class _GroupMark:
+    start: GroupStart
+    next_start: GroupStart
+    # end of the last resource the group had to read to be complete
+    read_end: int
+
+
+class IncrementalSplit(Generic[P]):
+    """The result of `split` that can be kept up to date as the resources change.
+
+    After an edit, only the shards of the segment tree around it are segmented again, and grouping only runs from the first group that read an edited chunk until it reaches a group start it had before: the groups after that are reused as they are.
+    Each edit returns a `GroupEdit` telling which groups changed.
+    """
+
+    def __init__(
+        self,
+        resources: Iterable[Resource[P]],
+        max_segment_count: int,
+        border_incision: int,
+        gap_rate: float = 0.0,
+        tail_rate: float = 0.5,
+    ):
+        # border_incision never takes part in a level comparison
+        _ = border_incision
+        self._max_segment_count: int = max_segment_count
+        self._gap_rate: float = gap_rate
+        self._tail_rate: float = tail_rate
+        self._body_max_count: int = (
+            max_segment_count - floor(max_segment_count * gap_rate) * 2
+        )
+        self._resources: list[Resource[P]] = []
+        self._cuts: list[int] = []
+        self._cut_levels: list[int | None] = []
+        self._shards: list[list[Chunk]] = []
+        self._chunks: list[Chunk] = []
+        self._groups: list[Group[P]] = []
+        self._marks: list[_GroupMark] = []
+        self.replace(0, 0, resources)
+
+    @property
+    def resources(self) -> Sequence[Resource[P]]:
+        return self._resources
+
+    @property
+    def groups(self) -> Sequence[Group[P]]:
+        return self._groups
+
+    def insert(self, index: int, resources: Iterable[Resource[P]]) -> GroupEdit[P]:
+        return self.replace(index, index, resources)
+
+    def delete(self, begin: int, end: int) -> GroupEdit[P]:
+        return self.replace(begin, end, ())
+
+    def replace(
+        self, begin: int, end: int, resources: Iterable[Resource[P]]
+    ) -> GroupEdit[P]:
+        """Replaces the resources `[begin, end)` with `resources`."""
+        if not 0 <= begin <= end <= len(self._resources):
+            raise IndexError("edit range out of bounds")
+        inserted = list(resources)
+        delta = len(inserted) - (end - begin)
+        edit_end = begin + len(inserted)
+        self._resources[begin:end] = inserted
+
+        old_chunks = self._chunks
+        self._update_shards(begin, edit_end, delta)
+        self._chunks, _ = merge_shards(
+            (
+                [Chunk(c.begin + cut, c.end + cut, c.count) for c in shard]
+                for cut, shard in zip(self._cuts, self._shards)
+            ),
+            self._body_max_count,
+        )
+        dirty_begin, dirty_end = self._find_dirty(old_chunks, begin, edit_end, delta)
+        return self._update_groups(dirty_begin, dirty_end, delta)
+
+    def _update_shards(self, begin: int, edit_end: int, delta: int) -> None:
+        resources = self._resources
+        old_cuts = self._cuts
+        old_levels = self._cut_levels
+        if not resources:
+            self._cuts, self._cut_levels, self._shards = [], [], []
+            return
+
+        # the last cut before the edit is not affected by it; shards are
+        # segmented again from there until the cuts line up with the old ones
+        first = max(bisect_right(old_cuts, begin - 1) - 1, 0)
+        cuts = old_cuts[: first + 1] or [0]
+        levels = old_levels[: first + 1] or [None]
+        resync: int | None = None
+        for index, level in iter_cuts(resources, cuts[-1], levels[-1]):
+            if index >= edit_end:
+                old_index = bisect_left(old_cuts, index - delta)
+                if (
+                    old_index < len(old_cuts)
+                    and old_cuts[old_index] == index - delta
+                    and old_levels[old_index] == level
+                ):
+                    resync = old_index
+                    break
+            cuts.append(index)
+            levels.append(level)
+
+        fresh_cuts = cuts[first:]
+        fresh_ends = [*cuts[first + 1 :]]
+        shards = self._shards[:first]
+        if resync is None:
+            fresh_ends.append(len(resources))
+        else:
+            fresh_ends.append(old_cuts[resync] + delta)
+            cuts.extend(cut + delta for cut in old_cuts[resync:])
+            levels.extend(old_levels[resync:])
+        shards.extend(
+            _segment_shard(resources, cut, cut_end, self._body_max_count)
+            for cut, cut_end in zip(fresh_cuts, fresh_ends)
+        )
+        if resync is not None:
+            shards.extend(self._shards[resync:])
+
+        self._cuts = cuts
+        self._cut_levels = levels
+        self._shards = shards
+
+    def _find_dirty(
+        self, old_chunks: list[Chunk], begin: int, edit_end: int, delta: int
+    ) -> tuple[int, int]:
+        # chunks before `dirty_begin` and after `dirty_end` are the old ones
+        # and hold no edited resource
+        chunks = self._chunks
+        size = min(len(chunks), len(old_chunks))
+        head = 0
+        while (
+            head < size
+            and chunks[head].end <= begin
+            and chunks[head] == old_chunks[head]
+        ):
+            head += 1
+        tail = 0
+        while head + tail < size:
+            chunk = chunks[-1 - tail]
+            old_chunk = old_chunks[-1 - tail]
+            if (
+                chunk.begin < edit_end
+                or chunk.begin != old_chunk.begin + delta
+                or chunk.end != old_chunk.end + delta
+                or chunk.count != old_chunk.count
+            ):
+                break
+            tail += 1
+        dirty_begin = min(begin, chunks[head].begin) if head < len(chunks) else begin
+        dirty_end = chunks[-tail].begin if tail > 0 else len(self._resources)
+        return dirty_begin, dirty_end
+
+    def _update_groups(
+        self, dirty_begin: int, dirty_end: int, delta: int
+    ) -> GroupEdit[P]:
+        old_marks = self._marks
+        # the last group reads up to the end of the input, so unless there was
+        # no group at all, some group is always found
+        first = bisect_right(old_marks, dirty_begin, key=lambda mark: mark.read_end)
+        start = (
+            old_marks[first].start
+            if first < len(old_marks)
+            else GroupStart(begin=0, head=(), head_sealed=True)
+        )
+
+        groups: list[Group[P]] = []
+        marks: list[_GroupMark] = []
+        resync: int | None = None
+        for group, next_start in group_from(
+            chunks=self._chunks,
+            start=start,
+            stop=len(self._chunks),
+            max_count=self._max_segment_count,
+            gap_rate=self._gap_rate,
+            tail_rate=self._tail_rate,
+        ):
+            groups.append(truncate_gap(self._to_group(group.report())))
+            last = group.tail[-1] if group.tail.has_any else group.body[-1]
+            marks.append(_GroupMark(start, next_start, self._read_end(last.end)))
+            start = next_start
+            resync = self._find_old_start(start, dirty_end, delta)
+            if resync is not None:
+                break
+
+        removed_end = len(old_marks) if resync is None else resync
+        edit = GroupEdit(begin=first, removed_count=removed_end - first, groups=groups)
+        self._groups[first:removed_end] = groups
+        self._marks = [
+            *old_marks[:first],
+            *marks,
+            *(_shift_mark(mark, delta) for mark in old_marks[removed_end:]),
+        ]
+        return edit
+
+    def _find_old_start(
+        self, start: GroupStart, dirty_end: int, delta: int
+    ) -> int | None:
+        if min(start.begin, *start.head) < dirty_end:
+            return None
+        old_marks = self._marks
+        index = bisect_left(
+            old_marks, start.begin - delta, key=lambda mark: mark.start.begin
+        )
+        if index < len(old_marks) and old_marks[index].start == _shift_start(
+            start, -delta
+        ):
+            return index
+        return None
+
+    def _read_end(self, end: int) -> int:
+        # a group ending at `end` was complete once the chunk after it
+        # overflowed it, or once the input ended
+        if end >= len(self._resources):
+            return len(self._resources) + 1
+        index = bisect_left(self._chunks, end, key=lambda chunk: chunk.begin)
+        return self._chunks[index].end
+
+    def _to_group(self, report: Group) -> Group[P]:
+        # `report` is a group of chunks, as reported by `_Group.report`
+        return Group(
+            head_remain_count=report.head_remain_count,
+            tail_remain_count=report.tail_remain_count,
+            head=[self._to_item(chunk) for chunk in cast(list[Chunk], report.head)],
+            body=[self._to_item(chunk) for chunk in cast(list[Chunk], report.body)],
+            tail=[self._to_item(chunk) for chunk in cast(list[Chunk], report.tail)],
+        )
+
+    def _to_item(self, chunk: Chunk) -> Resource[P] | Segment[P]:
+        if chunk.end - chunk.begin == 1:
+            return self._resources[chunk.begin]
+        return Segment(
+            count=chunk.count,
+            resources=self._resources[chunk.begin : chunk.end],
+        )
+
+
+def _segment_shard(
+    resources: list[Resource[P]], begin: int, end: int, max_count: int
+) -> list[Chunk]:
+    # chunks are relative to `begin`, so the shard can move with later edits
+    segmenter = Segmenter(max_count)
+    for index in range(begin, end):
+        resource = resources[index]
+        segmenter.feed(
+            count=resource.count,
+            start_incision=resource.start_incision,
+            end_incision=resource.end_incision,
+        )
+    segmenter.close()
+    return list(segmenter.chunks)
+
+
+def _shift_start(start: GroupStart, delta: int) -> GroupStart:
+    return GroupStart(
+        begin=start.begin + delta,
+        head=tuple(begin + delta for begin in start.head),
+        head_sealed=start.head_sealed,
+    )
+
+
+def _shift_mark(mark: _GroupMark, delta: int) -> _GroupMark:
+    return _GroupMark(
+        start=_shift_start(mark.start, delta),
+        next_start=_shift_start(mark.next_start, delta),
+        read_end=mark.read_end + delta,
+    )
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import mmap
+import os
+import shutil
+import tempfile
+from math import floor
+from struct import Struct
+from typing import BinaryIO, Generator, Iterable, Sequence, overload
+
+from .group import group_chunks
+from .segment import Chunk, Segmenter
+from .truncation import PrefixSums, truncate_bounds
+from .types import GroupSpan, Resource
+
+# A resource file is a header, then one fixed-width record per resource, then
+# the payloads back to back. Payload offsets are relative to where the
+# payloads begin, so records can be written before the resource count is known.
+_MAGIC = b"RSEGv001"
+# magic, resource count
+_HEADER = Struct("<8sQ")
+# count, start_incision, end_incision, payload offset, payload length
+_RECORD = Struct("<qqqQQ")
+
+
+def write_resources(
+    path: str | os.PathLike[str], resources: Iterable[Resource[bytes]]
+) -> int:
+    """Writes resources with `bytes` payloads to a file `split_file` can read.
+
+    Resources are written as they come, so the whole collection never has to be held in memory.
+
+    Args:
+      path (str | PathLike): The file to create or overwrite.
+      resources (Iterable[Resource[bytes]]): The resources to write, in order.
+
+    Returns:
+      int: The number of resources written.
+    """
+    resource_count = 0
+    payload_offset = 0
+    with open(path, "wb") as file, tempfile.TemporaryFile() as payloads:
+        file.write(_HEADER.pack(_MAGIC, 0))
+        for resource in resources:
+            payload = resource.payload
+            file.write(
+                _RECORD.pack(
+                    resource.count,
+                    resource.start_incision,
+                    resource.end_incision,
+                    payload_offset,
+                    len(payload),
+                )
+            )
+            payloads.write(payload)
+            payload_offset += len(payload)
+            resource_count += 1
+        payloads.seek(0)
+        shutil.copyfileobj(payloads, file)
+        file.seek(0)
+        file.write(_HEADER.pack(_MAGIC, resource_count))
+    return resource_count
+
+
+class MappedResources(Sequence[Resource[bytes]]):
+    """The resources of a file written by `write_resources`, memory-mapped.
+
+    Nothing is read up front: each `Resource` is decoded when accessed, and its payload copied out of the file only then. Use it with `GroupView` to read the groups yielded by `split_file`. Close it, or use it as a context manager, to unmap the file.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]):
+        with open(path, "rb") as file:
+            self._mmap: mmap.mmap = _map(file)
+        try:
+            self._size: int = _read_size(self._mmap)
+        except ValueError:
+            self._mmap.close()
+            raise
+        self._payloads_begin: int = _HEADER.size + _RECORD.size * self._size
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> MappedResources:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @overload
+    def __getitem__(self, index: int) -> Resource[bytes]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Resource[bytes]]: ...
+
+    def __getitem__(
+        self, index: int | slice
+    ) -> Resource[bytes] | list[Resource[bytes]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("resource index out of range")
+        count, start_incision, end_incision, offset, length = _RECORD.unpack_from(
+            self._mmap, _HEADER.size + _RECORD.size * index
+        )
+        begin = self._payloads_begin + offset
+        return Resource(
+            count=count,
+            start_incision=start_incision,
+            end_incision=end_incision,
+            payload=self._mmap[begin : begin + length],
+        )
+
+
+def split_file(
+    path: str | os.PathLike[str],
+    max_segment_count: int,
+    border_incision: int,
+    gap_rate: float = 0.0,
+    tail_rate: float = 0.5,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> Generator[GroupSpan, None, None]:
+    """Group the resources of a file written by `write_resources`, like `split_spans`.
+
+    The spans are exactly those `split_spans` gives for the same resources, so they share its heads: where `split` keeps a head that is not the resources right before the body, the span head differs from it (see `split_spans`).
+    The file is memory-mapped and its records are read one at a time: no `Resource` is created and no payload is read, so memory use does not grow with the number of resources. Open the file with `MappedResources` to read the resources of a group.
+
+    Args:
+      path (str | PathLike): The resource file.
+      max_segment_count (int): The maximum number of resource segments.
+      border_incision (int): Border incision level for segmentation.
+      gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
+      tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail. For an even distribution, use 0.5.
+      max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups, as in `split`.
+      max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups, as in `split`.
+
+    Yields:
+      Generator[GroupSpan, None, None]: A generator yielding the index ranges of each group.
+    """
+    _ = border_incision
+    gap_max_count = floor(max_segment_count * gap_rate)
+    body_max_count = max_segment_count - gap_max_count * 2
+    sums = PrefixSums()
+
+    with open(path, "rb") as file:
+        mapped = _map(file)
+    try:
+        size = _read_size(mapped)
+        with memoryview(mapped) as view:
+            with view[_HEADER.size : _HEADER.size + _RECORD.size * size] as records:
+                chunks_iter = _iter_chunks(
+                    records,
+                    Segmenter(
+                        body_max_count,
+                        max_buffered_items=max_buffered_items,
+                        max_buffered_count=max_buffered_count,
+                    ),
+                    sums,
+                )
+                try:
+                    for bounds in group_chunks(
+                        max_count=max_segment_count,
+                        gap_rate=gap_rate,
+                        tail_rate=tail_rate,
+                        chunks_iter=chunks_iter,
+                        max_buffered_items=max_buffered_items,
+                        max_buffered_count=max_buffered_count,
+                    ):
+                        yield truncate_bounds(bounds, sums)
+                        sums.forget_before(bounds[0])
+                finally:
+                    # the records stay exported until the reading stops
+                    chunks_iter.close()
+    finally:
+        mapped.close()
+
+
+def _iter_chunks(
+    records: memoryview, segmenter: Segmenter, sums: PrefixSums
+) -> Generator[Chunk, None, None]:
+    chunks = segmenter.chunks
+    for count, start_incision, end_incision, _, _ in _RECORD.iter_unpack(records):
+        sums.append(count)
+        segmenter.feed(count, start_incision, end_incision)
+        while chunks:
+            yield chunks.popleft()
+    segmenter.close()
+    yield from chunks
+
+
+def _map(file: BinaryIO) -> mmap.mmap:
+    if os.fstat(file.fileno()).st_size < _HEADER.size:
+        raise ValueError("not a resource file")
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _read_size(mapped: mmap.mmap) -> int:
+    magic, size = _HEADER.unpack_from(mapped)
+    if magic != _MAGIC:
+        raise ValueError("not a resource file")
+    if len(mapped) < _HEADER.size + _RECORD.size * size:
+        raise ValueError("resource file is truncated")
+    return size
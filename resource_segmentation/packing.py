@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import deque
+from math import floor
+from typing import Callable, Generator, Literal, Sequence
+
+from .group import _Attributes, _Countable, _Group, _I
+
+Packing = Literal["greedy", "min_groups", "balanced"]
+
+# whether items `[begin, end)` can make a body; always true for a single item
+_Fits = Callable[[int, int], bool]
+
+
+def pack_groups(
+    items: list[_I],
+    max_count: int,
+    gap_rate: float,
+    tail_rate: float,
+    packing: Packing,
+) -> Generator[_Group[_I], None, None]:
+    # The greedy grouper keeps `max_count - gap * 2` for the body of every
+    # group, and for a fixed body limit greedy packing is already optimal. What
+    # it gives away is the overlap it reserves where there is nothing to overlap
+    # with: before the first group, after the last one, and wherever less than
+    # a gap of context is left. Here a body `[begin, end)` only has to leave
+    # room for the head and tail it can actually have:
+    #
+    #   min(gap, sums[begin]) + body + min(gap, total - sums[end]) <= max_count
+    #
+    # and a single item always makes a body of its own.
+    gap_max_count = floor(max_count * gap_rate)
+    attr = _Attributes(
+        max_count=max_count,
+        gap_max_count=gap_max_count,
+        tail_rate=tail_rate,
+    )
+    sums = _prefix_sums(items)
+    total = sums[-1]
+
+    def fits(begin: int, end: int) -> bool:
+        return end == begin + 1 or (
+            min(gap_max_count, sums[begin])
+            + sums[end]
+            - sums[begin]
+            + min(gap_max_count, total - sums[end])
+            <= max_count
+        )
+
+    if packing == "min_groups":
+        bodies = _fewest_bodies(len(items), fits)
+    elif packing == "balanced":
+        bodies = _balanced_bodies(sums, fits)
+    else:
+        raise ValueError(f"unknown packing: {packing}")
+
+    for begin, end in bodies:
+        group: _Group[_I] = _Group(attr)
+        head_begin = _fit_backward(sums, begin, gap_max_count)
+        tail_end = _fit_forward(sums, end, gap_max_count)
+        group.head.extend(items[head_begin:begin], sums[begin] - sums[head_begin])
+        group.body.extend(items[begin:end], sums[end] - sums[begin])
+        group.tail.extend(items[end:tail_end], sums[tail_end] - sums[end])
+        yield group
+
+
+def _count_groups(size: int, fits: _Fits) -> tuple[list[int], list[int]]:
+    # The least number of bodies covering each prefix, and where the last of
+    # them begins. For a fixed end, `fits` only gets true as `begin` grows, and
+    # the lowest begin that fits only moves forward with `end`: the least count
+    # is a sliding window minimum, kept in a monotone deque.
+    group_counts: list[int] = [0] * (size + 1)
+    body_begins: list[int] = [0] * (size + 1)
+    candidates: deque[int] = deque()
+    lowest = 0
+    for end in range(1, size + 1):
+        begin = end - 1
+        # among begins that take as few groups, the latest one is kept
+        while candidates and group_counts[candidates[-1]] >= group_counts[begin]:
+            candidates.pop()
+        candidates.append(begin)
+        while not fits(lowest, end):
+            lowest += 1
+        while candidates[0] < lowest:
+            candidates.popleft()
+        body_begins[end] = candidates[0]
+        group_counts[end] = group_counts[candidates[0]] + 1
+    return group_counts, body_begins
+
+
+def _fewest_bodies(size: int, fits: _Fits) -> list[tuple[int, int]]:
+    _, body_begins = _count_groups(size, fits)
+    bodies: list[tuple[int, int]] = []
+    end = size
+    while end > 0:
+        bodies.append((body_begins[end], end))
+        end = body_begins[end]
+    bodies.reverse()
+    return bodies
+
+
+def _balanced_bodies(sums: list[int], fits: _Fits) -> list[tuple[int, int]]:
+    # As many groups as the fewest possible, with the largest body as small as
+    # it can be. Then each cut in turn goes where it comes closest to an even
+    # share of what is left, among the ends from which the rest can still be
+    # cut into the remaining number of bodies.
+    size = len(sums) - 1
+    group_count = _count_groups(size, fits)[0][size]
+    if group_count <= 1:
+        return [(0, size)] if size > 0 else []
+
+    def fits_under(limit: int) -> _Fits:
+        return lambda begin, end: (
+            end == begin + 1 or (sums[end] - sums[begin] <= limit and fits(begin, end))
+        )
+
+    # a single item makes a body whatever the limit, so no limit is too low
+    low = -1
+    high = max(sums[end] - sums[begin] for begin, end in _fewest_bodies(size, fits))
+    while high - low > 1:
+        limit = (low + high) // 2
+        if _count_groups(size, fits_under(limit))[0][size] <= group_count:
+            high = limit
+        else:
+            low = limit
+    fits_best = fits_under(high)
+
+    # `rest_counts[i]`: the least number of bodies covering items `[i, size)`
+    reversed_counts, _ = _count_groups(
+        size, lambda begin, end: fits_best(size - end, size - begin)
+    )
+    rest_counts = reversed_counts[::-1]
+
+    bodies: list[tuple[int, int]] = []
+    begin = 0
+    for index in range(group_count - 1):
+        rest_count = group_count - index - 1
+        ends = range(begin + 1, size + 1)
+        # the ends that fit are a prefix of `ends`, and the ends the rest can
+        # be cut from in `rest_count` bodies a suffix
+        high_end = begin + bisect_left(
+            ends, True, key=lambda e, begin=begin: not fits_best(begin, e)
+        )
+        low_end = (
+            begin
+            + 1
+            + bisect_left(
+                ends,
+                True,
+                key=lambda e, rest_count=rest_count: rest_counts[e] <= rest_count,
+            )
+        )
+        target = sums[begin] + (sums[size] - sums[begin]) / (rest_count + 1)
+        end = bisect_left(sums, target, low_end, high_end)
+        if end > low_end and target - sums[end - 1] <= sums[end] - target:
+            end -= 1
+        bodies.append((begin, end))
+        begin = end
+    bodies.append((begin, size))
+    return bodies
+
+
+def _prefix_sums(items: Sequence[_Countable]) -> list[int]:
+    sums = [0]
+    for item in items:
+        sums.append(sums[-1] + item.count)
+    return sums
+
+
+def _fit_backward(sums: list[int], end: int, max_count: int) -> int:
+    # like a head buffer: the item right before `end` always, then more while they fit
+    if end == 0:
+        return end
+    return min(bisect_left(sums, sums[end] - max_count, 0, end), end - 1)
+
+
+def _fit_forward(sums: list[int], begin: int, max_count: int) -> int:
+    if begin == len(sums) - 1:
+        return begin
+    end = bisect_right(sums, sums[begin] + max_count, begin, len(sums)) - 1
+    return max(end, begin + 1)
@@ -0,0 +1,452 @@
+from __future__ import annotations
+
+import os
+from array import array
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from itertools import islice
+from math import floor
+from typing import Generator, Iterable, Sequence, cast
+
+from .group import GroupStart, group_from
+from .segment import Chunk, Segmenter, iter_cuts, merge_shards
+from .splitter import split
+from .truncation import truncate_gap
+from .types import Group, P, Resource, Segment
+
+# A document as sent to a worker: counts, start incisions and end incisions.
+_Columns = tuple[array, array, array]
+
+# An item of a group as sent back: a resource index, or the `[begin, end)`
+# resource range of a segment.
+_ItemRef = int | tuple[int, int]
+
+# (head_remain_count, tail_remain_count, head, body, tail)
+_GroupRef = tuple[int, int, list[_ItemRef], list[_ItemRef], list[_ItemRef]]
+
+
+def split_many(
+    documents: Iterable[Iterable[Resource[P]]],
+    max_segment_count: int,
+    border_incision: int,
+    gap_rate: float = 0.0,
+    tail_rate: float = 0.5,
+    executor: Executor | None = None,
+    max_workers: int | None = None,
+    chunk_size: int = 16,
+    max_pending_chunks: int | None = None,
+    ordered: bool = True,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> Generator[tuple[int, list[Group[P]]], None, None]:
+    """Group many independent documents in parallel.
+
+    Each document is grouped exactly as `split` would group it. Documents are sent to the workers in chunks of `chunk_size`, and only their counts and incisions cross the process boundary: payloads never get pickled. Workers send back resource indexes, from which the groups are rebuilt with the original resources.
+
+    Args:
+      documents (Iterable[Iterable[Resource]]): The documents, each a collection of resources to be grouped on its own.
+      max_segment_count (int): The maximum number of resource segments.
+      border_incision (int): Border incision level for segmentation.
+      gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
+      tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail. For an even distribution, use 0.5.
+      executor (Executor | None): The pool to run on, e.g. a `ThreadPoolExecutor`. By default a `ProcessPoolExecutor` is created and shut down afterwards.
+      max_workers (int | None): Number of workers of the default pool. Ignored when `executor` is given.
+      chunk_size (int): Number of documents sent to a worker at once.
+      max_pending_chunks (int | None): Number of chunks in flight at any time, which bounds how many documents are held in memory. Defaults to twice the number of workers.
+      ordered (bool): If True, documents are yielded in input order; otherwise as soon as their chunk is done.
+      max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups while a worker splits a document, as in `split`.
+      max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups while a worker splits a document, as in `split`.
+
+    Yields:
+      Generator[tuple[int, list[Group]], None, None]: The index of each document in `documents` and its groups.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if max_pending_chunks is None:
+        max_pending_chunks = 2 * (max_workers or os.cpu_count() or 1)
+    if max_pending_chunks < 1:
+        raise ValueError("max_pending_chunks must be at least 1")
+
+    own_executor = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        yield from _run(
+            executor=executor,
+            documents=documents,
+            options=(
+                max_segment_count,
+                border_incision,
+                gap_rate,
+                tail_rate,
+                max_buffered_items,
+                max_buffered_count,
+            ),
+            chunk_size=chunk_size,
+            max_pending_chunks=max_pending_chunks,
+            ordered=ordered,
+        )
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+
+_Options = tuple[int, int, float, float, int | None, int | None]
+_Batch = tuple[int, list[list[Resource[P]]]]
+
+
+def _run(
+    executor: Executor,
+    documents: Iterable[Iterable[Resource[P]]],
+    options: _Options,
+    chunk_size: int,
+    max_pending_chunks: int,
+    ordered: bool,
+) -> Generator[tuple[int, list[Group[P]]], None, None]:
+    batches = _iter_batches(documents, chunk_size)
+    pending: deque[tuple[Future[list[list[_GroupRef]]], _Batch[P]]] = deque()
+
+    def submit() -> bool:
+        batch = next(batches, None)
+        if batch is None:
+            return False
+        _, docs = batch
+        columns = [_to_columns(doc) for doc in docs]
+        pending.append((executor.submit(_split_columns, columns, options), batch))
+        return True
+
+    while len(pending) < max_pending_chunks and submit():
+        pass
+
+    while pending:
+        if ordered:
+            future, batch = pending.popleft()
+        else:
+            wait([f for f, _ in pending], return_when=FIRST_COMPLETED)
+            index = next(i for i, (f, _) in enumerate(pending) if f.done())
+            future, batch = pending[index]
+            del pending[index]
+        submit()
+        first_index, docs = batch
+        for offset, (doc, group_refs) in enumerate(zip(docs, future.result())):
+            yield first_index + offset, [_to_group(ref, doc) for ref in group_refs]
+
+
+def _iter_batches(
+    documents: Iterable[Iterable[Resource[P]]], chunk_size: int
+) -> Generator[_Batch[P], None, None]:
+    documents_iter = iter(documents)
+    first_index = 0
+    while True:
+        docs = [list(doc) for doc in islice(documents_iter, chunk_size)]
+        if not docs:
+            break
+        yield first_index, docs
+        first_index += len(docs)
+
+
+def _to_columns(resources: Sequence[Resource[P]]) -> _Columns:
+    return (
+        array("q", (r.count for r in resources)),
+        array("q", (r.start_incision for r in resources)),
+        array("q", (r.end_incision for r in resources)),
+    )
+
+
+def _split_columns(
+    documents: list[_Columns], options: _Options
+) -> list[list[_GroupRef]]:
+    # runs in the worker: payloads are replaced by resource indexes
+    (
+        max_segment_count,
+        border_incision,
+        gap_rate,
+        tail_rate,
+        max_buffered_items,
+        max_buffered_count,
+    ) = options
+    results: list[list[_GroupRef]] = []
+    for counts, start_incisions, end_incisions in documents:
+        resources = (
+            Resource(count, start_incision, end_incision, index)
+            for index, (count, start_incision, end_incision) in enumerate(
+                zip(counts, start_incisions, end_incisions)
+            )
+        )
+        results.append(
+            [
+                (
+                    group.head_remain_count,
+                    group.tail_remain_count,
+                    [_to_item_ref(item) for item in group.head],
+                    [_to_item_ref(item) for item in group.body],
+                    [_to_item_ref(item) for item in group.tail],
+                )
+                for group in split(
+                    resources=resources,
+                    max_segment_count=max_segment_count,
+                    border_incision=border_incision,
+                    gap_rate=gap_rate,
+                    tail_rate=tail_rate,
+                    max_buffered_items=max_buffered_items,
+                    max_buffered_count=max_buffered_count,
+                )
+            ]
+        )
+    return results
+
+
+def _to_item_ref(item: Resource[int] | Segment[int]) -> _ItemRef:
+    if isinstance(item, Segment):
+        return (item.resources[0].payload, item.resources[-1].payload + 1)
+    return item.payload
+
+
+def _to_group(ref: _GroupRef, resources: Sequence[Resource[P]]) -> Group[P]:
+    head_remain_count, tail_remain_count, head, body, tail = ref
+    return Group(
+        head_remain_count=head_remain_count,
+        tail_remain_count=tail_remain_count,
+        head=[_to_item(item_ref, resources) for item_ref in head],
+        body=[_to_item(item_ref, resources) for item_ref in body],
+        tail=[_to_item(item_ref, resources) for item_ref in tail],
+    )
+
+
+def _to_item(
+    ref: _ItemRef, resources: Sequence[Resource[P]]
+) -> Resource[P] | Segment[P]:
+    if isinstance(ref, int):
+        return resources[ref]
+    begin, end = ref
+    segment_resources = list(resources[begin:end])
+    return Segment(
+        count=sum(r.count for r in segment_resources),
+        resources=segment_resources,
+    )
+
+
+def split_parallel(
+    resources: Sequence[Resource[P]],
+    max_segment_count: int,
+    border_incision: int,
+    gap_rate: float = 0.0,
+    tail_rate: float = 0.5,
+    executor: Executor | None = None,
+    max_workers: int | None = None,
+    shard_count: int | None = None,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> Generator[Group[P], None, None]:
+    """Group a single large document in parallel.
+
+    Gives the same groups as `split`, group for group. The document is cut into shards at its top-level cuts: resources whose incisions make them direct children of the outermost segment, so that nothing before them can be nested with anything after them. Shards are segmented on the workers, which also group them speculatively. The seams are then stitched sequentially: chunks meeting at a seam are merged where `split` would merge them, and grouping continues across the seam until it reaches a group a worker already found, from where that worker's groups are taken over.
+
+    A document without top-level cuts is grouped sequentially, and so is a document split with a buffer limit: where a forced cut falls depends on everything before it, so shards cannot be segmented on their own.
+
+    Args:
+      resources (Sequence[Resource]): The collection of resources to be grouped.
+      max_segment_count (int): The maximum number of resource segments.
+      border_incision (int): Border incision level for segmentation.
+      gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
+      tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail. For an even distribution, use 0.5.
+      executor (Executor | None): The pool to run on. By default a `ProcessPoolExecutor` is created and shut down afterwards.
+      max_workers (int | None): Number of workers of the default pool. Ignored when `executor` is given.
+      shard_count (int | None): Number of jobs the document is cut into. Defaults to the number of workers.
+      max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups, as in `split`.
+      max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups, as in `split`.
+
+    Yields:
+      Generator[Group, None, None]: A generator yielding grouped resource sets. Each group is a `Group` object.
+    """
+    if shard_count is None:
+        shard_count = max_workers or os.cpu_count() or 1
+    if shard_count < 1:
+        raise ValueError("shard_count must be at least 1")
+
+    is_limited = max_buffered_items is not None or max_buffered_count is not None
+    jobs: list[tuple[list[int], int]] = []
+    if not is_limited:
+        cuts = [0, *(index for index, _ in iter_cuts(resources))]
+        jobs = _plan_jobs(cuts, len(resources), shard_count)
+    if len(jobs) < 2:
+        yield from split(
+            resources=iter(resources),
+            max_segment_count=max_segment_count,
+            border_incision=border_incision,
+            gap_rate=gap_rate,
+            tail_rate=tail_rate,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        )
+        return
+
+    own_executor = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        options = (max_segment_count, border_incision, gap_rate, tail_rate, None, None)
+        futures = [
+            executor.submit(
+                _segment_shards,
+                _to_columns(resources[cuts[0] : end]),
+                cuts,
+                end == len(resources),
+                options,
+            )
+            for cuts, end in jobs
+        ]
+        yield from _stitch(
+            resources=resources,
+            results=[future.result() for future in futures],
+            options=options,
+        )
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def _plan_jobs(
+    cuts: list[int], size: int, job_count: int
+) -> list[tuple[list[int], int]]:
+    jobs: list[tuple[list[int], int]] = []
+    job_cuts: list[int] = []
+    for cut in cuts:
+        if job_cuts and cut >= size * (len(jobs) + 1) / job_count:
+            jobs.append((job_cuts, cut))
+            job_cuts = []
+        job_cuts.append(cut)
+    if size > 0:
+        jobs.append((job_cuts, size))
+    return jobs
+
+
+# A group found by a worker: where it starts, itself, and where the next starts.
+_Speculation = tuple[GroupStart, _GroupRef, GroupStart]
+
+
+def _segment_shards(
+    columns: _Columns,
+    cuts: list[int],
+    is_last: bool,
+    options: _Options,
+) -> tuple[list[array], list[_Speculation]]:
+    # runs in the worker: segments each shard of the job on its own, then
+    # groups the chunks that cannot change when the seams are merged
+    max_segment_count, _, gap_rate, tail_rate, _, _ = options
+    body_max_count = max_segment_count - floor(max_segment_count * gap_rate) * 2
+    offset = cuts[0]
+    counts, start_incisions, end_incisions = columns
+
+    shards: list[array] = []
+    for begin, end in zip(cuts, [*cuts[1:], offset + len(counts)]):
+        segmenter = Segmenter(body_max_count)
+        for index in range(begin - offset, end - offset):
+            segmenter.feed(
+                count=counts[index],
+                start_incision=start_incisions[index],
+                end_incision=end_incisions[index],
+            )
+        segmenter.close()
+        shards.append(
+            array(
+                "q",
+                (
+                    value
+                    for chunk in segmenter.chunks
+                    for value in (chunk.begin + begin, chunk.end + begin, chunk.count)
+                ),
+            )
+        )
+
+    # From the second chunk of the first shard that has several, the merged
+    # chunks no longer depend on what came before the job. Only the last one
+    # may still merge with the next job.
+    chunks, sync = merge_shards(map(_to_chunks, shards), body_max_count)
+    stop = len(chunks) if is_last else len(chunks) - 1
+    speculations: list[_Speculation] = []
+    if sync is not None and sync < stop:
+        start = GroupStart(begin=chunks[sync].begin, head=(), head_sealed=True)
+        for group, next_start in group_from(
+            chunks=chunks,
+            start=start,
+            stop=stop,
+            max_count=max_segment_count,
+            gap_rate=gap_rate,
+            tail_rate=tail_rate,
+        ):
+            speculations.append((start, _to_group_ref(group.report()), next_start))
+            start = next_start
+    return shards, speculations
+
+
+def _to_chunks(shard: array) -> Generator[Chunk, None, None]:
+    for index in range(0, len(shard), 3):
+        yield Chunk(shard[index], shard[index + 1], shard[index + 2])
+
+
+def _stitch(
+    resources: Sequence[Resource[P]],
+    results: list[tuple[list[array], list[_Speculation]]],
+    options: _Options,
+) -> Generator[Group[P], None, None]:
+    max_segment_count, _, gap_rate, tail_rate, _, _ = options
+    body_max_count = max_segment_count - floor(max_segment_count * gap_rate) * 2
+    chunks, _ = merge_shards(
+        (_to_chunks(shard) for shards, _ in results for shard in shards),
+        body_max_count,
+    )
+    speculations = {
+        speculation[0].begin: (job_speculations, index)
+        for _, job_speculations in results
+        for index, speculation in enumerate(job_speculations)
+    }
+
+    start = GroupStart(begin=0, head=(), head_sealed=True)
+    while True:
+        found = speculations.get(start.begin)
+        if found is not None and found[0][found[1]][0] == start:
+            # grouping has caught up with the worker: the rest of its groups follow
+            job_speculations, index = found
+            for _, group_ref, start in job_speculations[index:]:
+                yield truncate_gap(_to_group(group_ref, resources))
+            continue
+
+        step = next(
+            group_from(
+                chunks=chunks,
+                start=start,
+                stop=len(chunks),
+                max_count=max_segment_count,
+                gap_rate=gap_rate,
+                tail_rate=tail_rate,
+            ),
+            None,
+        )
+        if step is None:
+            break
+        group, start = step
+        yield truncate_gap(_to_group(_to_group_ref(group.report()), resources))
+
+
+def _to_group_ref(group: Group) -> _GroupRef:
+    # a group of chunks, as reported by `_Group.report`
+    return (
+        group.head_remain_count,
+        group.tail_remain_count,
+        [_chunk_to_item_ref(chunk) for chunk in cast(list[Chunk], group.head)],
+        [_chunk_to_item_ref(chunk) for chunk in cast(list[Chunk], group.body)],
+        [_chunk_to_item_ref(chunk) for chunk in cast(list[Chunk], group.tail)],
+    )
+
+
+def _chunk_to_item_ref(chunk: Chunk) -> _ItemRef:
+    if chunk.end - chunk.begin == 1:
+        return chunk.begin
+    return (chunk.begin, chunk.end)
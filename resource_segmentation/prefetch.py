@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from collections import deque
+from threading import Condition, Lock, Thread
+from typing import Generator, Generic, Iterable
+from weakref import finalize
+
+from .types import P, Resource
+
+
+def prefetch(
+    resources: Iterable[Resource[P]], max_pending: int = 256
+) -> Generator[Resource[P], None, None]:
+    """Produces resources on a background thread, ahead of whatever consumes them.
+
+    Pass the result to `split` to overlap producing resources (parsing, tokenizing) with splitting them. The thread starts when `prefetch` is called, so it also produces while the caller does other work before taking the first resource. The thread reads `count` of each resource, so a `LazyResource` is counted there too. The thread pauses while `max_pending` resources are ready, and the consumer takes those all at once, so at most twice that many are held ahead of it.
+    An exception raised while producing is raised again by this generator, after the resources produced before it. If the consumer stops early, the thread stops once it is done with the resource it is producing and closes the iterator of `resources` (if it has a `close`, like a generator), and the consumer waits for that before it stops. If the generator is dropped without being read, the thread stops the same way once the generator is garbage collected, but nothing waits for it.
+    Producing only runs in parallel while it does not hold the GIL, e.g. in tokenizers written in Rust or C.
+
+    Args:
+      resources (Iterable[Resource]): The resources to produce, in order.
+      max_pending (int): The most resources ready and not yet taken by the consumer.
+
+    Returns:
+      Generator[Resource, None, None]: The same resources, in the same order.
+
+    Raises:
+      ValueError: If `max_pending` is less than 1.
+    """
+    if max_pending < 1:
+        raise ValueError("max_pending must be at least 1")
+    pipe: _Pipe[Resource[P]] = _Pipe(max_pending)
+    thread = Thread(
+        target=_produce, args=(resources, pipe), name="prefetch", daemon=True
+    )
+    thread.start()
+    consumer = _consume(pipe, thread)
+    # closing a generator that never started skips its finally
+    finalize(consumer, pipe.close)
+    return consumer
+
+
+def _consume(
+    pipe: _Pipe[Resource[P]], thread: Thread
+) -> Generator[Resource[P], None, None]:
+    try:
+        while True:
+            batch = pipe.take()
+            if not batch:
+                break
+            yield from batch
+    finally:
+        pipe.close()
+        thread.join()
+
+
+def _produce(resources: Iterable[Resource[P]], pipe: _Pipe[Resource[P]]) -> None:
+    try:
+        iterator = iter(resources)
+        try:
+            for resource in iterator:
+                _ = resource.count
+                if not pipe.put(resource):
+                    return
+        finally:
+            # a generator can only be closed by the thread that runs it
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+    except BaseException as error:  # pylint: disable=broad-exception-caught
+        pipe.fail(error)
+    else:
+        pipe.finish()
+
+
+class _Pipe(Generic[P]):
+    # A bounded queue from one producer to one consumer. The consumer takes
+    # everything that is ready at once, so it locks once per batch, not per item.
+    def __init__(self, max_pending: int):
+        lock = Lock()
+        self._not_empty: Condition = Condition(lock)
+        self._not_full: Condition = Condition(lock)
+        self._items: deque[P] = deque()
+        self._max_pending: int = max_pending
+        self._is_finished: bool = False
+        self._is_closed: bool = False
+        self._error: BaseException | None = None
+
+    def put(self, item: P) -> bool:
+        # False once the consumer is gone
+        with self._not_full:
+            while len(self._items) >= self._max_pending and not self._is_closed:
+                self._not_full.wait()
+            if self._is_closed:
+                return False
+            self._items.append(item)
+            self._not_empty.notify()
+            return True
+
+    def finish(self) -> None:
+        with self._not_empty:
+            self._is_finished = True
+            self._not_empty.notify()
+
+    def fail(self, error: BaseException) -> None:
+        with self._not_empty:
+            self._error = error
+            self._is_finished = True
+            self._not_empty.notify()
+
+    def take(self) -> deque[P]:
+        # empty once everything was taken
+        with self._not_empty:
+            while not self._items and not self._is_finished:
+                self._not_empty.wait()
+            items = self._items
+            if not items and self._error is not None:
+                error = self._error
+                self._error = None
+                raise error
+            self._items = deque()
+            self._not_full.notify()
+            return items
+
+    def close(self) -> None:
+        with self._not_full:
+            self._is_closed = True
+            self._not_full.notify()
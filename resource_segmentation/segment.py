@@ -1,147 +1,609 @@
 from __future__ import annotations
 
+import warnings
+from bisect import bisect_right
+from collections import deque
 from dataclasses import dataclass
-from sys import maxsize
-from typing import Generator, Generic, Iterator, cast
+from typing import Generator, Generic, Iterable, Iterator, Sequence
 
-from .stream import Stream
 from .types import P, Resource, Segment
 
 
 def allocate_segments(
-    resources_iter: Iterator[Resource[P]], border_incision: int, max_count: int
+    resources_iter: Iterator[Resource[P]],
+    border_incision: int,
+    max_count: int,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
 ) -> Generator[Resource[P] | Segment[P], None, None]:
-    segment = _collect_segment(
-        stream=Stream(resources_iter),
-        border_incision=border_incision,
-        level=maxsize,
+    # border_incision only ever filled in the incisions of the outermost segment,
+    # which never take part in a level comparison.
+    _ = border_incision
+    allocator: SegmentAllocator[P] = SegmentAllocator(
+        max_count,
+        segmenter=Segmenter(
+            max_count,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        ),
     )
-    for item in segment.children:
-        if isinstance(item, _Segment):
-            for segment in _split_segment_if_need(item, max_count):
-                yield _transform_segment(segment)
-        elif isinstance(item, Resource):
-            yield item
-
-
-def _transform_segment(segment: _Segment):
-    children = list(_deep_iter_segment(segment))
-    if len(children) == 1:
-        return children[0]
-    else:
-        return Segment(
-            count=segment.count,
-            resources=children,
+    for resource in resources_iter:
+        yield from allocator.push(resource)
+    yield from allocator.close()
+
+
+class SegmentAllocator(Generic[P]):
+    # Push-based form of `allocate_segments`: resources are handed in one at a
+    # time and whatever items they complete come straight back, so the caller
+    # decides how the next resource is obtained (e.g. by awaiting it).
+    def __init__(self, max_count: int, segmenter: Segmenter | None = None):
+        self._segmenter: Segmenter = (
+            Segmenter(max_count) if segmenter is None else segmenter
         )
+        self._window: deque[Resource[P]] = deque()
+
+    def push(
+        self, resource: Resource[P]
+    ) -> Generator[Resource[P] | Segment[P], None, None]:
+        self._window.append(resource)
+        self._segmenter.feed(
+            count=resource.count,
+            start_incision=resource.start_incision,
+            end_incision=resource.end_incision,
+        )
+        return self._pop_chunks()
+
+    def close(self) -> Generator[Resource[P] | Segment[P], None, None]:
+        self._segmenter.close()
+        return self._pop_chunks()
+
+    def _pop_chunks(self) -> Generator[Resource[P] | Segment[P], None, None]:
+        chunks = self._segmenter.chunks
+        window = self._window
+        while chunks:
+            chunk = chunks.popleft()
+            size = chunk.end - chunk.begin
+            if size == 1:
+                yield window.popleft()
+            else:
+                yield Segment(
+                    count=chunk.count,
+                    resources=[window.popleft() for _ in range(size)],
+                )
+
+
+def iter_cuts(
+    resources: Sequence[Resource[P]], begin: int = 0, level: int | None = None
+) -> Generator[tuple[int, int], None, None]:
+    # Replays the frame levels of `Segmenter.feed` to find the resources that
+    # become a direct child of the outermost open segment. Everything before
+    # such a resource is closed for good, and everything up to the next one is
+    # nested below it, so each shard between them can be segmented on its own.
+    # Yields each cut after `begin` with the level of the outermost segment,
+    # which is all it takes to resume from there (`None` before the second
+    # resource, when there is no segment yet).
+    levels: list[int] = [] if level is None else [level]
+    for index in range(begin + 1, len(resources)):
+        resource = resources[index]
+        level = resources[index - 1].end_incision + resource.start_incision
+        while levels and level > levels[-1]:
+            levels.pop()
+            # a closed frame leaves the new resource's own incisions behind
+            level = resource.end_incision + resource.start_incision
+        if not levels:
+            levels.append(level)
+            yield index, level
+        elif level < levels[-1]:
+            levels.append(level)
+        elif len(levels) == 1:
+            yield index, level
+
+
+def merge_shards(
+    shards: Iterable[Iterable[Chunk]], max_count: int
+) -> tuple[list[Chunk], int | None]:
+    # Joins the chunks of shards segmented on their own. The outermost segment
+    # packs the chunks of its children greedily, like `Segmenter._pack`. Within
+    # a shard no two chunks fit together, so only chunks meeting at a seam can
+    # merge, and from the second chunk of a shard on the result no longer
+    # depends on the shards before: that index is returned as well.
+    chunks: list[Chunk] = []
+    sync: int | None = None
+    pending: Chunk | None = None
+    for shard in shards:
+        for index, chunk in enumerate(shard):
+            if pending is None:
+                pending = chunk
+            elif pending.count + chunk.count <= max_count:
+                pending = Chunk(pending.begin, chunk.end, pending.count + chunk.count)
+            else:
+                chunks.append(pending)
+                pending = chunk
+                if index == 1 and sync is None:
+                    sync = len(chunks)
+    if pending is not None:
+        chunks.append(pending)
+    return chunks, sync
+
+
+class BufferLimitWarning(UserWarning):
+    """Segmentation or grouping buffered more resources than its limit and cut them off.
+
+    Raised as a warning, not an exception: the resources before the cut are emitted as if the input had ended there, and splitting goes on from the next resource.
+    """
 
 
 @dataclass
-class _Segment(Generic[P]):
-    level: int
+class Chunk:
+    begin: int
+    end: int
     count: int
-    start_incision: int
-    end_incision: int
-    children: list[Resource[P] | _Segment[P]]
-
-
-def _collect_segment(
-    stream: Stream[Resource[P]], border_incision: int, level: int
-) -> _Segment:
-    start_incision: int = border_incision
-    end_incision: int = border_incision
-    children: list[Resource[P] | _Segment[P]] = []
-
-    while True:
-        resource = stream.get()
-        if resource is None:
-            break
-        if len(children) == 0:  # is the first
-            start_incision = resource.start_incision
-            children.append(resource)
+
+
+class _Frame:
+    # An open segment on the right spine of the segment tree. Every child is a
+    # contiguous range of resources, so a frame only has to remember offsets:
+    # `begin`/`base` are the index and the cumulative count where it starts.
+    def __init__(self, level: int, begin: int, base: int, parent: _Frame | None):
+        self.level: int = level
+        self.begin: int = begin
+        self.base: int = base
+        self.parent: _Frame | None = parent
+
+        # the last child is kept apart because a deeper segment may still swallow it
+        self.last_begin: int = begin
+        self.last_base: int = base
+        self.last_frame: _Frame | None = None
+        self.last_end_incision: int = 0
+
+        # ends of committed children, only tracked until the frame is oversize
+        self.child_ends: list[int] = []
+        self.child_end_bases: list[int] = []
+
+        # set once the frame is oversize; only up to date while the frame is the
+        # deepest member of its run
+        self.run: _Run | None = None
+
+
+class _Run:
+    # Pending chunks of consecutive oversize frames, outermost first.
+    # Once a frame has emitted a chunk to its parent, every later chunk of that
+    # frame overflows the parent's pending chunk and simply takes its place. A
+    # chain of such frames therefore behaves like a shift register, and keeping
+    # their pending chunks in one deque makes the shift O(1) whatever the depth.
+    def __init__(self, frame: _Frame):
+        self.head: _Frame = frame
+        self.bottom: _Frame = frame
+        self.slots: deque[tuple[int, int, int]] = deque(
+            ((frame.begin, frame.begin, 0),)
+        )
+
+
+class Segmenter:
+    # Builds the segment tree incrementally with an explicit stack of open frames.
+    # A segment whose count exceeds `max_count` is split by packing its children
+    # greedily; such packing never revisits a chunk once the next item overflows
+    # it, so chunks are emitted as soon as that happens instead of at the end of
+    # the input. Emitted chunks are ranges of resource indexes.
+    # Without `pack`, the pieces of an oversize segment are emitted one by one:
+    # every chunk is then a segment that fits, or a resource.
+    # Input that keeps segments open without end (e.g. ever lower incisions, or
+    # endless resources of count 0) is held until they close. Past
+    # `max_buffered_items` resources or `max_buffered_count` count held, every
+    # open segment is closed where the input stands, as if it ended there.
+    def __init__(
+        self,
+        max_count: int,
+        pack: bool = True,
+        max_buffered_items: int | None = None,
+        max_buffered_count: int | None = None,
+    ):
+        self.chunks: deque[Chunk] = deque()
+        self._max_count: int = max_count
+        # pieces merge while they fit under this count; -1 keeps them apart
+        self._pack_max_count: int = max_count if pack else -1
+        self._max_buffered_items: int | None = max_buffered_items
+        self._max_buffered_count: int | None = max_buffered_count
+        self._root: _Frame = _Frame(level=0, begin=0, base=0, parent=None)
+        self._stack: list[_Frame] = [self._root]
+        self._oversize_depth: int = 1
+        self._index: int = 0
+        self._total: int = 0
+        # where the root started, moved by each forced cut
+        self._first_index: int = 0
+        # end and cumulative count of the chunks emitted so far
+        self._emitted_end: int = 0
+        self._emitted_base: int = 0
+
+    def __getstate__(self) -> dict:
+        # Frames refer to each other through parents, last frames and runs, all
+        # of which pickle would follow recursively, as deep as the stack goes.
+        # They are stored as flat records that refer to each other by position.
+        frames: list[_Frame] = []
+        runs: list[_Run] = []
+        frame_ids: dict[int, int] = {}
+        run_ids: dict[int, int] = {}
+
+        def frame_id(frame: _Frame | None) -> int | None:
+            if frame is None:
+                return None
+            if id(frame) not in frame_ids:
+                frame_ids[id(frame)] = len(frames)
+                frames.append(frame)
+            return frame_ids[id(frame)]
+
+        def run_id(run: _Run | None) -> int | None:
+            if run is None:
+                return None
+            if id(run) not in run_ids:
+                run_ids[id(run)] = len(runs)
+                runs.append(run)
+            return run_ids[id(run)]
+
+        stack = [frame_id(frame) for frame in self._stack]
+        frame_records: list[tuple] = []
+        run_records: list[tuple] = []
+        # records refer to frames and runs not seen yet, which are then recorded too
+        while len(frame_records) < len(frames) or len(run_records) < len(runs):
+            for frame in frames[len(frame_records) :]:
+                frame_records.append(
+                    (
+                        frame.level,
+                        frame.begin,
+                        frame.base,
+                        frame_id(frame.parent),
+                        frame.last_begin,
+                        frame.last_base,
+                        frame_id(frame.last_frame),
+                        frame.last_end_incision,
+                        frame.child_ends,
+                        frame.child_end_bases,
+                        run_id(frame.run),
+                    )
+                )
+            for run in runs[len(run_records) :]:
+                run_records.append(
+                    (frame_id(run.head), frame_id(run.bottom), list(run.slots))
+                )
+
+        return {
+            "chunks": list(self.chunks),
+            "max_count": self._max_count,
+            "pack_max_count": self._pack_max_count,
+            "frames": frame_records,
+            "runs": run_records,
+            "stack": stack,
+            "oversize_depth": self._oversize_depth,
+            "index": self._index,
+            "total": self._total,
+            "max_buffered_items": self._max_buffered_items,
+            "max_buffered_count": self._max_buffered_count,
+            "first_index": self._first_index,
+            "emitted_end": self._emitted_end,
+            "emitted_base": self._emitted_base,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        frame_records: list[tuple] = state["frames"]
+        run_records: list[tuple] = state["runs"]
+        frames = [
+            _Frame(level=level, begin=begin, base=base, parent=None)
+            for level, begin, base, *_ in frame_records
+        ]
+        runs: list[_Run] = []
+        for head, bottom, slots in run_records:
+            run = _Run(frames[head])
+            run.bottom = frames[bottom]
+            run.slots = deque(slots)
+            runs.append(run)
+        for frame, record in zip(frames, frame_records):
+            (
+                _,
+                _,
+                _,
+                parent,
+                frame.last_begin,
+                frame.last_base,
+                last_frame,
+                frame.last_end_incision,
+                frame.child_ends,
+                frame.child_end_bases,
+                run,
+            ) = record
+            frame.parent = None if parent is None else frames[parent]
+            frame.last_frame = None if last_frame is None else frames[last_frame]
+            frame.run = None if run is None else runs[run]
+
+        self.chunks = deque(state["chunks"])
+        self._max_count = state["max_count"]
+        self._pack_max_count = state["pack_max_count"]
+        self._stack = [frames[index] for index in state["stack"]]
+        self._root = self._stack[0]
+        self._oversize_depth = state["oversize_depth"]
+        self._index = state["index"]
+        self._total = state["total"]
+        self._max_buffered_items = state["max_buffered_items"]
+        self._max_buffered_count = state["max_buffered_count"]
+        self._first_index = state["first_index"]
+        self._emitted_end = state["emitted_end"]
+        self._emitted_base = state["emitted_base"]
+
+    def feed(self, count: int, start_incision: int, end_incision: int) -> None:
+        index = self._index
+        total = self._total
+        stack = self._stack
+        root = self._root
+
+        if index == self._first_index:
+            root.last_end_incision = end_incision
         else:
-            pre_resource = children[-1]
-            incision_level = _to_level(
-                pre_resource.end_incision,
-                resource.start_incision,
+            while True:
+                top = stack[-1]
+                level = top.last_end_incision + start_incision
+                if top is not root and level > top.level:
+                    self._commit_last(top, index, total)
+                    stack.pop()
+                    parent = stack[-1]
+                    parent.last_frame = top if top.run is not None else None
+                    parent.last_end_incision = end_incision
+                elif top is root or level < top.level:
+                    frame = _Frame(
+                        level=level,
+                        begin=top.last_begin,
+                        base=top.last_base,
+                        parent=top,
+                    )
+                    child = top.last_frame
+                    if child is None:
+                        self._commit_last(frame, index, total)
+                    else:
+                        # the new frame takes over the closed frame's pending chunk
+                        top.last_frame = None
+                        run = child.run
+                        assert run is not None
+                        if run.head is child:
+                            run.head = frame
+                        run.bottom = frame
+                        frame.run = run
+                    stack.append(frame)
+                    frame.last_begin = index
+                    frame.last_base = total
+                    frame.last_end_incision = end_incision
+                    break
+                else:
+                    self._commit_last(top, index, total)
+                    top.last_begin = index
+                    top.last_base = total
+                    top.last_end_incision = end_incision
+                    break
+
+        self._index = index + 1
+        self._total = total + count
+        self._check_oversize()
+        if (
+            self._max_buffered_items is not None
+            and self._index - self._emitted_end > self._max_buffered_items
+        ) or (
+            self._max_buffered_count is not None
+            and self._total - self._emitted_base > self._max_buffered_count
+        ):
+            self._force_cut()
+
+    @property
+    def fed_count(self) -> int:
+        return self._index
+
+    @property
+    def open_level(self) -> int | None:
+        top = self._stack[-1]
+        return None if top is self._root else top.level
+
+    def extend(self, bases: Sequence[int], stop: int, end_incision: int) -> None:
+        # Feeds the resources up to `stop` in bulk. `bases[i]` is the cumulative
+        # count before resource `i` and the caller guarantees that every incision
+        # met on the way equals `open_level`, so they all join the innermost
+        # frame and only the points where a frame becomes oversize or a chunk
+        # overflows have to be located, both by bisection. Buffer limits are
+        # not checked on the way.
+        stack = self._stack
+        top = stack[-1]
+        assert top is not self._root
+        index = self._index
+
+        while index < stop and top.run is None:
+            frame = stack[min(self._oversize_depth, len(stack))]
+            limit = bisect_right(
+                bases, frame.base + self._max_count, index + 1, stop + 1
             )
-            if incision_level > level:
-                stream.recover(resource)
-                end_incision = resource.end_incision
-                break
-            elif incision_level < level:
-                stream.recover(resource)
-                stream.recover(cast(Resource, pre_resource))
-                segment = _collect_segment(
-                    stream=stream,
-                    border_incision=border_incision,
-                    level=incision_level,
-                )
-                children[-1] = segment
-            else:
-                children.append(resource)
-
-    count: int = 0
-    for child in children:
-        count += child.count
-
-    return _Segment(
-        level=level,
-        count=count,
-        start_incision=start_incision,
-        end_incision=end_incision,
-        children=children,
-    )
+            last = min(limit, stop) - 1
+            top.child_ends.extend(range(index, last + 1))
+            top.child_end_bases.extend(bases[index : last + 1])
+            top.last_begin = last
+            top.last_base = bases[last]
+            index = last + 1
+            self._index = index
+            self._total = bases[index]
+            self._check_oversize()
 
+        if index < stop:
+            self._commit_last(top, index, bases[index])
+            self._pack_resources(top, index, stop - 1, bases)
+            top.last_begin = stop - 1
+            top.last_base = bases[stop - 1]
+            self._index = stop
+            self._total = bases[stop]
+
+        top.last_end_incision = end_incision
+
+    def close(self) -> None:
+        stack = self._stack
+        while len(stack) > 1:
+            top = stack.pop()
+            self._commit_last(top, self._index, self._total)
+            stack[-1].last_frame = top if top.run is not None else None
+        if self._index > self._first_index:
+            self._commit_last(self._root, self._index, self._total)
+
+    def _force_cut(self) -> None:
+        warnings.warn(
+            f"{self._index - self._emitted_end} resources counting "
+            f"{self._total - self._emitted_base} were held in open segments; "
+            f"cutting them off at resource {self._index}",
+            BufferLimitWarning,
+            stacklevel=2,
+        )
+        self.close()
+        self._root = _Frame(level=0, begin=self._index, base=self._total, parent=None)
+        self._stack = [self._root]
+        self._oversize_depth = 1
+        self._first_index = self._index
 
-def _split_segment_if_need(segment: _Segment[P], max_count: int):
-    if segment.count <= max_count:
-        yield segment
-    else:
-        count: int = 0
-        children: list[Resource[P] | _Segment[P]] = []
-
-        for item in _unfold_segments(segment, max_count):
-            if len(children) > 0 and count + item.count > max_count:
-                yield _create_segment(count, children, segment.level)
-                count = 0
-                children = []
-            count += item.count
-            children.append(item)
-
-        if len(children) > 0:
-            yield _create_segment(count, children, segment.level)
-
-
-def _unfold_segments(
-    segment: _Segment, max_count: int
-) -> Generator[Resource[P] | _Segment[P]]:
-    for item in segment.children:
-        if item.count > max_count and isinstance(item, _Segment):
-            for sub_item in _split_segment_if_need(item, max_count):
-                yield sub_item
+    def _check_oversize(self) -> None:
+        stack = self._stack
+        depth = min(self._oversize_depth, len(stack))
+        while depth < len(stack):
+            frame = stack[depth]
+            if frame.run is None:
+                if self._total - frame.base <= self._max_count:
+                    break
+                self._become_oversize(frame)
+            depth += 1
+        self._oversize_depth = depth
+
+    def _become_oversize(self, frame: _Frame) -> None:
+        # The committed children are packed greedily, so each chunk ends at the
+        # last child end within reach of where it begins, found by bisection
+        # over their cumulative counts instead of packing child by child.
+        frame.run = _Run(frame)
+        ends = frame.child_ends
+        end_bases = frame.child_end_bases
+        max_count = self._pack_max_count
+        begin = frame.begin
+        base = frame.base
+        index = 0
+        while index < len(ends):
+            index = max(bisect_right(end_bases, base + max_count, index), index + 1)
+            end = ends[index - 1]
+            end_base = end_bases[index - 1]
+            self._pack(frame, begin, end, end_base - base)
+            begin = end
+            base = end_base
+        ends.clear()
+        end_bases.clear()
+
+    def _commit_last(self, frame: _Frame, end: int, end_base: int) -> None:
+        child = frame.last_frame
+        if child is not None:
+            frame.last_frame = None
+            self._commit_frame(frame, child)
+        elif frame.run is not None or frame is self._root:
+            self._pack(frame, frame.last_begin, end, end_base - frame.last_base)
         else:
-            yield item
-
-
-def _create_segment(
-    count: int, children: list[Resource[P] | _Segment[P]], level: int
-) -> _Segment[P]:
-    return _Segment(
-        level=level,
-        count=count,
-        children=children,
-        start_incision=children[0].start_incision,
-        end_incision=children[-1].end_incision,
-    )
+            frame.child_ends.append(end)
+            frame.child_end_bases.append(end_base)
+
+    def _commit_frame(self, frame: _Frame, child: _Frame) -> None:
+        run = child.run
+        assert run is not None
+        if run.head is child:
+            begin, end, count = run.slots[0]
+            self._pack(frame, begin, end, count)
+        else:
+            # the parent's pending chunk is pushed out by the child's one
+            run.bottom = frame
+            frame.run = run
+            self._shift_out(run)
+
+    def _pack(self, frame: _Frame, begin: int, end: int, count: int) -> None:
+        if frame is self._root:
+            self._emit(Chunk(begin, end, count))
+            return
+        run = frame.run
+        assert run is not None
+        slots = run.slots
+        pending_begin, pending_end, pending_count = slots[-1]
+        if pending_end == pending_begin:
+            slots[-1] = (begin, end, count)
+        elif pending_count + count <= self._pack_max_count:
+            slots[-1] = (pending_begin, end, pending_count + count)
+        else:
+            slots.append((begin, end, count))
+            self._shift_out(run)
+
+    def _pack_resources(
+        self, frame: _Frame, begin: int, end: int, bases: Sequence[int]
+    ) -> None:
+        max_count = self._pack_max_count
+        while begin < end:
+            run = frame.run
+            assert run is not None
+            slots = run.slots
+            pending_begin, pending_end, pending_count = slots[-1]
+            fit_end = (
+                bisect_right(
+                    bases,
+                    bases[begin] + max_count - pending_count,
+                    begin + 1,
+                    end + 1,
+                )
+                - 1
+            )
+            if pending_end == pending_begin:
+                fit_end = max(fit_end, begin + 1)
+                slots[-1] = (begin, fit_end, bases[fit_end] - bases[begin])
+            elif fit_end > begin:
+                slots[-1] = (
+                    pending_begin,
+                    fit_end,
+                    pending_count + bases[fit_end] - bases[begin],
+                )
+            else:
+                fit_end = begin + 1
+                slots.append((begin, fit_end, bases[fit_end] - bases[begin]))
+                self._shift_out(run)
+            begin = fit_end
 
+    def _shift_out(self, run: _Run) -> None:
+        linked_runs: list[_Run] = []
+        while True:
+            chunk = run.slots.popleft()
+            parent = run.head.parent
+            assert parent is not None
+            if parent is self._root:
+                self._emit(Chunk(*chunk))
+                break
+            linked_runs.append(run)
+            upper = parent.run
+            assert upper is not None
+            slots = upper.slots
+            _, end, count = chunk
+            pending_begin, pending_end, pending_count = slots[-1]
+            if pending_end == pending_begin:
+                slots[-1] = chunk
+                break
+            if pending_count + count <= self._pack_max_count:
+                slots[-1] = (pending_begin, end, pending_count + count)
+                break
+            slots.append(chunk)
+            run = upper
 
-def _deep_iter_segment(segment: _Segment[P]) -> Generator[Resource, None, None]:
-    for child in segment.children:
-        if isinstance(child, _Segment):
-            yield from _deep_iter_segment(child)
-        elif isinstance(child, Resource):
-            yield child
+        for run in reversed(linked_runs):
+            self._link(run)
 
+    def _emit(self, chunk: Chunk) -> None:
+        self.chunks.append(chunk)
+        self._emitted_end = chunk.end
+        self._emitted_base += chunk.count
 
-def _to_level(left_incision: int, right_incision: int) -> int:
-    return left_incision + right_incision
+    def _link(self, lower: _Run) -> None:
+        parent = lower.head.parent
+        assert parent is not None
+        upper = parent.run
+        assert upper is not None
+        if len(upper.slots) >= len(lower.slots):
+            upper.slots.extend(lower.slots)
+            upper.bottom = lower.bottom
+            lower.bottom.run = upper
+        else:
+            lower.slots.extendleft(reversed(upper.slots))
+            lower.head = upper.head
@@ -1,10 +1,13 @@
 from math import floor
-from typing import Generator, Iterator
+from time import perf_counter
+from typing import AsyncGenerator, AsyncIterable, Generator, Iterable, Iterator
 
-from .group import group_items
-from .segment import allocate_segments
-from .truncation import truncate_gap
-from .types import Group, P, Resource
+from .group import Grouper, _iter_groups, group_chunks
+from .packing import Packing, pack_groups
+from .segment import Chunk, SegmentAllocator, Segmenter, allocate_segments
+from .stats import ObservedSegmenter, SplitStats
+from .truncation import PrefixSums, report_truncated, truncate_bounds
+from .types import Group, GroupSpan, P, Resource, Segment
 
 
 def split(
@@ -13,6 +16,10 @@ def split(
     border_incision: int,
     gap_rate: float = 0.0,
     tail_rate: float = 0.5,
+    stats: SplitStats | None = None,
+    packing: Packing = "greedy",
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
 ) -> Generator[Group[P], None, None]:
     """Group resources.
 
@@ -26,14 +33,44 @@ def split(
       gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
       tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail. For an even distribution, use 0.5.
       max_segment_count (int): The maximum number of resource segments.
+      stats (SplitStats | None): Filled in with counters and timings as the split goes, if given. Without it, nothing is measured.
+      packing (str): How bodies are cut. "greedy" fills each body up to the limit that leaves a full gap on both sides, group by group. "min_groups" gives the fewest groups possible, by only leaving room for the overlap there is to take (none before the first group or after the last). "balanced" gives as many groups as "min_groups", with bodies as even as it can: the largest one as small as possible and each cut as close to an even share as it can be. Both read all resources before yielding the first group.
+      max_buffered_items (int | None): The most resources segmentation may hold in segments that are still open, and grouping in groups that are not complete yet. Input that never returns to a low incision level, or that never fills a body (e.g. resources of count 0), would otherwise be held until it does; past the limit, every open segment or group is closed where the input stands, as if it ended there, with a `BufferLimitWarning`, and the split goes on. Only segmentation is limited with non-greedy packing, which reads all resources anyway. No limit if None.
+      max_buffered_count (int | None): Same limit, on the count of the resources held.
 
     Yields:
       Generator[Group, None, None]: A generator yielding grouped resource sets. Each group is a `Group` object.
     """
+    if packing != "greedy":
+        if stats is not None:
+            raise ValueError("stats are only recorded with greedy packing")
+        yield from _split_packed(
+            resources,
+            max_segment_count,
+            gap_rate,
+            tail_rate,
+            packing,
+            max_buffered_items,
+            max_buffered_count,
+        )
+        return
+
+    if stats is not None:
+        yield from _split_observed(
+            resources,
+            max_segment_count,
+            gap_rate,
+            tail_rate,
+            stats,
+            max_buffered_items,
+            max_buffered_count,
+        )
+        return
+
     gap_max_count = floor(max_segment_count * gap_rate)
     body_max_count = max_segment_count - gap_max_count * 2
 
-    for group in group_items(
+    for group in _iter_groups(
         max_count=max_segment_count,
         gap_rate=gap_rate,
         tail_rate=tail_rate,
@@ -41,6 +78,228 @@ def split(
             resources_iter=resources,
             max_count=body_max_count,
             border_incision=border_incision,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        ),
+        max_buffered_items=max_buffered_items,
+        max_buffered_count=max_buffered_count,
+    ):
+        yield report_truncated(group)
+
+
+def _split_packed(
+    resources: Iterator[Resource[P]],
+    max_segment_count: int,
+    gap_rate: float,
+    tail_rate: float,
+    packing: Packing,
+    max_buffered_items: int | None,
+    max_buffered_count: int | None,
+) -> Generator[Group[P], None, None]:
+    # Packs the segments themselves: segments that fit stay whole, but the
+    # pieces of an oversize one are not packed greedily into chunks first.
+    gap_max_count = floor(max_segment_count * gap_rate)
+    body_max_count = max_segment_count - gap_max_count * 2
+    allocator: SegmentAllocator[P] = SegmentAllocator(
+        max_count=body_max_count,
+        segmenter=Segmenter(
+            body_max_count,
+            pack=False,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        ),
+    )
+    items = [item for resource in resources for item in allocator.push(resource)]
+    items.extend(allocator.close())
+    for group in pack_groups(items, max_segment_count, gap_rate, tail_rate, packing):
+        yield report_truncated(group)
+
+
+def _split_observed(
+    resources: Iterable[Resource[P]],
+    max_segment_count: int,
+    gap_rate: float,
+    tail_rate: float,
+    stats: SplitStats,
+    max_buffered_items: int | None,
+    max_buffered_count: int | None,
+) -> Generator[Group[P], None, None]:
+    # Same pipeline as `asplit`, with a clock between the stages. The segmenter
+    # is swapped for a subclass that counts what happens inside.
+    gap_max_count = floor(max_segment_count * gap_rate)
+    body_max_count = max_segment_count - gap_max_count * 2
+    allocator: SegmentAllocator[P] = SegmentAllocator(
+        max_count=body_max_count,
+        segmenter=ObservedSegmenter(
+            body_max_count, stats, max_buffered_items, max_buffered_count
+        ),
+    )
+    grouper: Grouper[Resource[P] | Segment[P]] = Grouper(
+        max_count=max_segment_count,
+        gap_rate=gap_rate,
+        tail_rate=tail_rate,
+        stats=stats,
+        max_buffered_items=max_buffered_items,
+        max_buffered_count=max_buffered_count,
+    )
+    seconds = stats.stage_seconds
+    # reading is timed one resource at a time, so any iterable has to be iterated
+    resources_iter = iter(resources)
+
+    while True:
+        began_at = perf_counter()
+        resource = next(resources_iter, None)
+        read_at = perf_counter()
+        seconds["read"] += read_at - began_at
+
+        if resource is None:
+            items = list(allocator.close())
+        else:
+            stats.resources_read += 1
+            items = list(allocator.push(resource))
+        segmented_at = perf_counter()
+        seconds["segment"] += segmented_at - read_at
+        stats.items_segmented += len(items)
+
+        groups = [group for item in items for group in grouper.push(item)]
+        if resource is None:
+            groups.extend(grouper.close())
+        seconds["group"] += perf_counter() - segmented_at
+
+        for group in groups:
+            began_at = perf_counter()
+            truncated = report_truncated(group)
+            seconds["truncate"] += perf_counter() - began_at
+            stats.head_items += len(group.head)
+            stats.groups += 1
+            yield truncated
+
+        if resource is None:
+            break
+
+
+async def asplit(
+    resources: AsyncIterable[Resource[P]],
+    max_segment_count: int,
+    border_incision: int,
+    gap_rate: float = 0.0,
+    tail_rate: float = 0.5,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> AsyncGenerator[Group[P], None]:
+    """Asynchronous version of `split`.
+
+    Takes an async iterator of resources (e.g. from an async tokenizer or file reader) and yields the same groups as `split`, as an async generator.
+    Each resource is segmented as soon as it arrives, and each group is yielded as soon as it is complete, so the work in between never waits for the whole input.
+
+    Args:
+      resources (AsyncIterable[Resource]): The collection of resources to be grouped.
+      max_segment_count (int): The maximum number of resource segments.
+      border_incision (int): Border incision level for segmentation.
+      gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
+      tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail. For an even distribution, use 0.5.
+      max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups, as in `split`.
+      max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups, as in `split`.
+
+    Yields:
+      AsyncGenerator[Group, None]: An async generator yielding grouped resource sets. Each group is a `Group` object.
+    """
+    _ = border_incision
+    gap_max_count = floor(max_segment_count * gap_rate)
+    body_max_count = max_segment_count - gap_max_count * 2
+    allocator: SegmentAllocator[P] = SegmentAllocator(
+        body_max_count,
+        segmenter=Segmenter(
+            body_max_count,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        ),
+    )
+    grouper: Grouper[Resource[P] | Segment[P]] = Grouper(
+        max_count=max_segment_count,
+        gap_rate=gap_rate,
+        tail_rate=tail_rate,
+        max_buffered_items=max_buffered_items,
+        max_buffered_count=max_buffered_count,
+    )
+    async for resource in resources:
+        for item in allocator.push(resource):
+            for group in grouper.push(item):
+                yield report_truncated(group)
+
+    for item in allocator.close():
+        for group in grouper.push(item):
+            yield report_truncated(group)
+    for group in grouper.close():
+        yield report_truncated(group)
+
+
+def split_spans(
+    resources: Iterable[Resource[P]],
+    max_segment_count: int,
+    border_incision: int,
+    gap_rate: float = 0.0,
+    tail_rate: float = 0.5,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> Generator[GroupSpan, None, None]:
+    """Group resources like `split`, but describe each group by resource indexes.
+
+    Each `GroupSpan` holds half-open `[begin, end)` index ranges over `resources` for its head, body and tail (already truncated) instead of copies of the resources, so a group costs O(1) to report whatever its size.
+    Only counts and incisions are read; payloads can stay in the caller's own storage. Use `GroupView` to look resources up lazily from a sequence.
+    Groups, bodies and tails are the same as those of `split`, and so are heads whenever `split` gives the resources right before the body, in order. It does not always: a head that takes in the whole previous body (a body no larger than the gap, e.g. when `gap_rate` is above 1/3) is kept by `split` in the order it was taken and truncated from its far end, so it can skip resources or stop short of the body. A span head is instead always the resources right before the body, kept from the back while their count is below `head_remain_count`, down to the lowest resource `split`'s head held before truncation.
+
+    Args:
+      resources (Iterable[Resource]): The collection of resources to be grouped.
+      max_segment_count (int): The maximum number of resource segments.
+      border_incision (int): Border incision level for segmentation.
+      gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
+      tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail. For an even distribution, use 0.5.
+      max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups, as in `split`.
+      max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups, as in `split`.
+
+    Yields:
+      Generator[GroupSpan, None, None]: A generator yielding the index ranges of each group.
+    """
+    _ = border_incision
+    gap_max_count = floor(max_segment_count * gap_rate)
+    body_max_count = max_segment_count - gap_max_count * 2
+    sums = PrefixSums()
+
+    for bounds in group_chunks(
+        max_count=max_segment_count,
+        gap_rate=gap_rate,
+        tail_rate=tail_rate,
+        chunks_iter=_allocate_chunks(
+            resources=resources,
+            segmenter=Segmenter(
+                body_max_count,
+                max_buffered_items=max_buffered_items,
+                max_buffered_count=max_buffered_count,
+            ),
+            sums=sums,
         ),
+        max_buffered_items=max_buffered_items,
+        max_buffered_count=max_buffered_count,
     ):
-        yield truncate_gap(group)
+        yield truncate_bounds(bounds, sums)
+        # later heads are taken from this group's head and body, so they never
+        # reach further back than its lowest resource
+        sums.forget_before(bounds[0])
+
+
+def _allocate_chunks(
+    resources: Iterable[Resource[P]], segmenter: Segmenter, sums: PrefixSums
+) -> Generator[Chunk, None, None]:
+    chunks = segmenter.chunks
+    for resource in resources:
+        sums.append(resource.count)
+        segmenter.feed(
+            count=resource.count,
+            start_incision=resource.start_incision,
+            end_incision=resource.end_incision,
+        )
+        while chunks:
+            yield chunks.popleft()
+    segmenter.close()
+    yield from chunks
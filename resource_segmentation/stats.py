@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+
+from .segment import Segmenter, _Frame
+
+STAGES = ("read", "segment", "group", "truncate")
+
+
+@dataclass
+class SplitStats:
+    """Counters of what `split` did, filled in when passed as its `stats`.
+
+    Attributes:
+      resources_read (int): Resources pulled from the source iterator.
+      items_segmented (int): Resources and segments handed from segmentation to grouping.
+      pushbacks (int): Items the grouping had to read again: the item that overflowed a group and the tail it left for the next one.
+      head_items (int): Items copied from a group into the head of the next one.
+      max_pushback_buffer (int): The most items waiting to be read again at once.
+      max_depth (int): The most segments open at once, i.e. the depth of the segment tree.
+      oversize_segments (int): Segments over the count limit, which had to be split into chunks.
+      forced_cuts (int): Times segmentation or grouping held more than its buffer limits and closed every open segment or group.
+      groups (int): Groups yielded.
+      stage_seconds (dict[str, float]): Time spent reading the source, segmenting, grouping and truncating gaps.
+    """
+
+    resources_read: int = 0
+    items_segmented: int = 0
+    pushbacks: int = 0
+    head_items: int = 0
+    max_pushback_buffer: int = 0
+    max_depth: int = 0
+    oversize_segments: int = 0
+    forced_cuts: int = 0
+    groups: int = 0
+    stage_seconds: dict[str, float] = field(
+        default_factory=lambda: dict.fromkeys(STAGES, 0.0)
+    )
+
+    def to_dict(self) -> dict[str, int | float]:
+        """Flat metric names and values, e.g. to export to a metrics system."""
+        values = asdict(self)
+        stage_seconds: dict[str, float] = values.pop("stage_seconds")
+        for stage, seconds in stage_seconds.items():
+            values[f"{stage}_seconds"] = seconds
+        return values
+
+
+class ObservedSegmenter(Segmenter):
+    # Only used when stats are wanted, so a plain `Segmenter` pays nothing.
+    def __init__(
+        self,
+        max_count: int,
+        stats: SplitStats,
+        max_buffered_items: int | None = None,
+        max_buffered_count: int | None = None,
+    ):
+        super().__init__(
+            max_count,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        )
+        self._stats: SplitStats = stats
+
+    def feed(self, count: int, start_incision: int, end_incision: int) -> None:
+        super().feed(count, start_incision, end_incision)
+        depth = len(self._stack) - 1
+        if depth > self._stats.max_depth:
+            self._stats.max_depth = depth
+
+    def _become_oversize(self, frame: _Frame) -> None:
+        self._stats.oversize_segments += 1
+        super()._become_oversize(frame)
+
+    def _force_cut(self) -> None:
+        self._stats.forced_cuts += 1
+        super()._force_cut()
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from math import floor
+from typing import Generator, Iterable
+
+from .group import group_chunks
+from .segment import Chunk, Segmenter
+from .truncation import PrefixSums, truncate_bounds
+from .types import GroupSpan, Resource
+
+
+@dataclass
+class LevelStats:
+    # the segments whose children are cut at `level`
+    level: int
+    segment_count: int
+    max_count: int
+    total_count: int
+
+
+class SegmentTree:
+    """The segment structure of a resource sequence, built once and grouped many times.
+
+    Only counts and incisions are kept, in flat integer arrays, so the tree is small and can be pickled, e.g. to build it where the resources are read and group it in workers. Groups are reported as `GroupSpan` index ranges over the original resources, the same as `split_spans` gives, heads included: like those of `split_spans`, they can differ from the heads of `split` when a head takes in the whole previous body.
+    """
+
+    def __init__(self, resources: Iterable[Resource]):
+        bases = array("q", (0,))
+        starts = array("q")
+        ends = array("q")
+        total = 0
+        for resource in resources:
+            total += resource.count
+            bases.append(total)
+            starts.append(resource.start_incision)
+            ends.append(resource.end_incision)
+
+        # `levels[i]` is the incision level between resources i - 1 and i. Where
+        # it repeats, resources join the innermost open segment one after
+        # another, and grouping feeds them in bulk up to the next change.
+        levels = array("q", (0,)) if ends else array("q")
+        levels.extend(end + start for end, start in zip(ends, starts[1:]))
+        changes = array(
+            "q", (i for i in range(2, len(levels)) if levels[i] != levels[i - 1])
+        )
+
+        self._bases: array[int] = bases
+        self._starts: array[int] = starts
+        self._ends: array[int] = ends
+        self._levels: array[int] = levels
+        self._changes: array[int] = changes
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    @property
+    def total_count(self) -> int:
+        return self._bases[-1]
+
+    def count(self, begin: int, end: int) -> int:
+        """The count of the resources `[begin, end)`."""
+        if not 0 <= begin <= end <= len(self):
+            raise IndexError("range out of bounds")
+        return self._bases[end] - self._bases[begin]
+
+    def index_at(self, count: int) -> int:
+        """The index of the resource that holds the `count`-th unit, counting from 0."""
+        if not 0 <= count < self.total_count:
+            raise IndexError("count out of bounds")
+        return bisect_right(self._bases, count) - 1
+
+    def levels(self) -> list[LevelStats]:
+        """How many segments each incision level makes, and how large they are.
+
+        The segments are those segmentation builds before cutting the oversize ones: after a nested segment closes, its parent compares the next resource by that resource's own incisions, as `split` does, so a level can hold segments nested in each other.
+        """
+        bases = self._bases
+        stats: dict[int, LevelStats] = {}
+        for level, begin, end in self._iter_segments():
+            count = bases[end] - bases[begin]
+            level_stats = stats.get(level)
+            if level_stats is None:
+                stats[level] = LevelStats(level, 1, count, count)
+            else:
+                level_stats.segment_count += 1
+                level_stats.max_count = max(level_stats.max_count, count)
+                level_stats.total_count += count
+        return sorted(stats.values(), key=lambda level_stats: level_stats.level)
+
+    def _iter_segments(self) -> Generator[tuple[int, int, int], None, None]:
+        # Replays the frames of `Segmenter.feed`, yielding (level, begin, end)
+        # of each segment as it closes. An open segment is [level, begin, begin
+        # of its last child, end incision of its last child], innermost last;
+        # the first is the root, which is not a segment.
+        starts = self._starts
+        ends = self._ends
+        if not ends:
+            return
+        stack: list[list[int]] = [[0, 0, 0, ends[0]]]
+        for index in range(1, len(ends)):
+            start_incision = starts[index]
+            end_incision = ends[index]
+            while True:
+                top = stack[-1]
+                level = top[3] + start_incision
+                if len(stack) > 1 and level > top[0]:
+                    yield top[0], top[1], index
+                    stack.pop()
+                    # a closed segment leaves the resource's own incisions behind
+                    stack[-1][3] = end_incision
+                elif len(stack) == 1 or level < top[0]:
+                    stack.append([level, top[2], index, end_incision])
+                    break
+                else:
+                    top[2] = index
+                    top[3] = end_incision
+                    break
+        while len(stack) > 1:
+            top = stack.pop()
+            yield top[0], top[1], len(ends)
+
+    def group(
+        self,
+        max_segment_count: int,
+        border_incision: int,
+        gap_rate: float = 0.0,
+        tail_rate: float = 0.5,
+        max_buffered_items: int | None = None,
+        max_buffered_count: int | None = None,
+    ) -> Generator[GroupSpan, None, None]:
+        """Group the resources like `split_spans` would.
+
+        The spans, heads included, are exactly those of `split_spans`; see there for where its heads differ from `split`.
+
+        Args:
+          max_segment_count (int): The maximum number of resource segments.
+          border_incision (int): Border incision level for segmentation.
+          gap_rate (float): A value between 0.0 and 1.0, representing the proportion of overlapping quantity between groups relative to the total.
+          tail_rate (float): A value between 0.0 and 1.0, representing the proportion of the overlapping portion concentrated at the tail. For an even distribution, use 0.5.
+          max_buffered_items (int | None): The most resources segmentation and grouping may hold in open segments and groups, as in `split`. With a limit, resources are fed one by one instead of in bulk.
+          max_buffered_count (int | None): The most count segmentation and grouping may hold in open segments and groups, as in `split`.
+
+        Yields:
+          Generator[GroupSpan, None, None]: A generator yielding the index ranges of each group.
+        """
+        _ = border_incision
+        gap_max_count = floor(max_segment_count * gap_rate)
+        body_max_count = max_segment_count - gap_max_count * 2
+        bases = self._bases.tolist()
+        sums = PrefixSums(bases)
+        for bounds in group_chunks(
+            chunks_iter=self._iter_chunks(
+                bases,
+                Segmenter(
+                    body_max_count,
+                    max_buffered_items=max_buffered_items,
+                    max_buffered_count=max_buffered_count,
+                ),
+                bulk=max_buffered_items is None and max_buffered_count is None,
+            ),
+            max_count=max_segment_count,
+            gap_rate=gap_rate,
+            tail_rate=tail_rate,
+            max_buffered_items=max_buffered_items,
+            max_buffered_count=max_buffered_count,
+        ):
+            yield truncate_bounds(bounds, sums)
+
+    def _iter_chunks(
+        self, bases: list[int], segmenter: Segmenter, bulk: bool
+    ) -> Generator[Chunk, None, None]:
+        # the same walk as `split_arrays`, over the arrays of the tree
+        size = len(self)
+        starts = self._starts.tolist()
+        ends = self._ends.tolist()
+        levels = self._levels.tolist()
+        changes = self._changes.tolist()
+
+        index = 0
+        while index < size:
+            segmenter.feed(bases[index + 1] - bases[index], starts[index], ends[index])
+            index += 1
+            if bulk and index < size and segmenter.open_level == levels[index]:
+                position = bisect_right(changes, index)
+                stop = changes[position] if position < len(changes) else size
+                segmenter.extend(bases, stop, ends[stop - 1])
+                index = stop
+            while segmenter.chunks:
+                yield segmenter.chunks.popleft()
+
+        segmenter.close()
+        yield from segmenter.chunks
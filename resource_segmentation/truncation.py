@@ -1,6 +1,8 @@
-from typing import cast
+from bisect import bisect_left, bisect_right
+from typing import Reversible, Sequence, overload
 
-from .types import Group, P, Resource, Segment
+from .group import GroupBounds, _Group
+from .types import Group, GroupSpan, P, Resource, Segment
 
 
 def truncate_gap(group: Group[P]) -> Group[P]:
@@ -21,8 +23,30 @@ def truncate_gap(group: Group[P]) -> Group[P]:
     )
 
 
+def report_truncated(group: _Group[Resource[P] | Segment[P]]) -> Group[P]:
+    # `truncate_gap(group.report())` in one pass: head and tail are truncated
+    # straight from the buffers instead of from copies of them, and the body
+    # list, built once for this group, is handed over as it is
+    head_remain_count, tail_remain_count = group.remain_counts()
+    return Group(
+        head_remain_count=head_remain_count,
+        tail_remain_count=tail_remain_count,
+        body=group.body.items,
+        head=_truncate_group_parts(
+            parts=group.head,
+            remain_count=head_remain_count,
+            remain_head=False,
+        ),
+        tail=_truncate_group_parts(
+            parts=group.tail,
+            remain_count=tail_remain_count,
+            remain_head=True,
+        ),
+    )
+
+
 def _truncate_group_parts(
-    parts: list[Resource[P] | Segment[P]],
+    parts: Reversible[Resource[P] | Segment[P]],
     remain_count: int,
     remain_head: bool,
 ) -> list[Resource[P] | Segment[P]]:
@@ -34,6 +58,10 @@ def _truncate_group_parts(
         if isinstance(part, Resource):
             truncated.append(part)
             remain_count -= part.count
+        elif part.count < remain_count:
+            # a segment kept whole is kept as it is
+            truncated.append(part)
+            remain_count -= part.count
         elif isinstance(part, Segment):
             truncated_resources = _truncate_resources(
                 resources=part.resources,
@@ -51,7 +79,7 @@ def _truncate_group_parts(
         truncated.reverse()
 
     if len(truncated) == 1 and isinstance(truncated[0], Segment):
-        return cast(list[Resource[P] | Segment[P]], truncated[0].resources)
+        return list(truncated[0].resources)
     else:
         return truncated
 
@@ -70,3 +98,79 @@ def _truncate_resources(
     if not remain_head:
         truncated.reverse()
     return truncated
+
+
+class PrefixSums(Sequence[int]):
+    # Cumulative counts of a sliding window of resources, addressed by the
+    # absolute resource index: `self[i]` is the count of all resources before `i`.
+    # Slices take plain `[begin:end]` bounds within the window, so the sums can
+    # be handed to `Segmenter.extend` like a list.
+    def __init__(self, sums: list[int] | None = None):
+        self._sums: list[int] = [0] if sums is None else sums
+        self._offset: int = 0
+
+    @overload
+    def __getitem__(self, index: int) -> int: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[int]: ...
+
+    def __getitem__(self, index: int | slice) -> int | list[int]:
+        offset = self._offset
+        if isinstance(index, slice):
+            return self._sums[index.start - offset : index.stop - offset]
+        return self._sums[index - offset]
+
+    def __len__(self) -> int:
+        return self._offset + len(self._sums)
+
+    def append(self, count: int):
+        self._sums.append(self._sums[-1] + count)
+
+    def forget_before(self, index: int):
+        drop_count = index - self._offset
+        if drop_count > len(self._sums) // 2:
+            del self._sums[:drop_count]
+            self._offset = index
+
+    def bisect_left(self, value: int, lo: int, hi: int) -> int:
+        offset = self._offset
+        return bisect_left(self._sums, value, lo - offset, hi - offset) + offset
+
+    def bisect_right(self, value: int, lo: int, hi: int) -> int:
+        offset = self._offset
+        return bisect_right(self._sums, value, lo - offset, hi - offset) + offset
+
+
+def truncate_bounds(bounds: GroupBounds, sums: PrefixSums) -> GroupSpan:
+    # Same rule as `truncate_gap` on flat resources: head keeps resources from its
+    # back while the kept count is below `head_remain_count`, tail from its front.
+    (
+        head_begin,
+        body_begin,
+        body_end,
+        tail_end,
+        head_remain_count,
+        tail_remain_count,
+    ) = bounds
+    head_begin = (
+        sums.bisect_right(
+            sums[body_begin] - head_remain_count,
+            head_begin + 1,
+            body_begin + 1,
+        )
+        - 1
+    )
+    tail_end = sums.bisect_left(
+        sums[body_end] + tail_remain_count,
+        body_end,
+        tail_end,
+    )
+    return GroupSpan(
+        head_remain_count=head_remain_count,
+        tail_remain_count=tail_remain_count,
+        head_begin=head_begin,
+        body_begin=body_begin,
+        body_end=body_end,
+        tail_end=tail_end,
+    )
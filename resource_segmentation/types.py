@@ -25,3 +25,21 @@ class Group(Generic[P]):
     head: list[Resource[P] | Segment[P]]
     body: list[Resource[P] | Segment[P]]
     tail: list[Resource[P] | Segment[P]]
+
+
+@dataclass
+class GroupSpan:
+    head_remain_count: int
+    tail_remain_count: int
+    head_begin: int
+    body_begin: int
+    body_end: int
+    tail_end: int
+
+    @property
+    def head_end(self) -> int:
+        return self.body_begin
+
+    @property
+    def tail_begin(self) -> int:
+        return self.body_end
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import Generic, Iterator, Sequence, overload
+
+from .types import GroupSpan, P, Resource
+
+
+class ResourceSpan(Sequence[Resource[P]]):
+    """A read-only window `[begin, end)` over a sequence of resources.
+
+    Nothing is copied: each resource is looked up in the underlying sequence when accessed.
+    """
+
+    def __init__(self, resources: Sequence[Resource[P]], begin: int, end: int):
+        self._resources: Sequence[Resource[P]] = resources
+        self._begin: int = begin
+        self._end: int = end
+
+    @property
+    def begin(self) -> int:
+        return self._begin
+
+    @property
+    def end(self) -> int:
+        return self._end
+
+    def __len__(self) -> int:
+        return self._end - self._begin
+
+    @overload
+    def __getitem__(self, index: int) -> Resource[P]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> ResourceSpan[P]: ...
+
+    def __getitem__(self, index: int | slice) -> Resource[P] | ResourceSpan[P]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("ResourceSpan only supports contiguous slices")
+            stop = max(start, stop)
+            return ResourceSpan(
+                self._resources, self._begin + start, self._begin + stop
+            )
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ResourceSpan index out of range")
+        return self._resources[self._begin + index]
+
+    def __iter__(self) -> Iterator[Resource[P]]:
+        resources = self._resources
+        for index in range(self._begin, self._end):
+            yield resources[index]
+
+
+class GroupView(Generic[P]):
+    """Lazy view of a `GroupSpan` over the sequence the resources came from."""
+
+    def __init__(self, span: GroupSpan, resources: Sequence[Resource[P]]):
+        self._span: GroupSpan = span
+        self._resources: Sequence[Resource[P]] = resources
+
+    @property
+    def span(self) -> GroupSpan:
+        return self._span
+
+    @property
+    def head_remain_count(self) -> int:
+        return self._span.head_remain_count
+
+    @property
+    def tail_remain_count(self) -> int:
+        return self._span.tail_remain_count
+
+    @property
+    def head(self) -> ResourceSpan[P]:
+        return ResourceSpan(self._resources, self._span.head_begin, self._span.head_end)
+
+    @property
+    def body(self) -> ResourceSpan[P]:
+        return ResourceSpan(self._resources, self._span.body_begin, self._span.body_end)
+
+    @property
+    def tail(self) -> ResourceSpan[P]:
+        return ResourceSpan(self._resources, self._span.tail_begin, self._span.tail_end)
@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+from random import Random
+from typing import Any, Generator
+
+from resource_segmentation.types import Resource, Segment
+
+# Every entry point that promises the groups of `split` (or the spans of
+# `split_spans`) is checked against it on these cases. Gap rates above 1/3 make
+# heads take in the whole previous body, and the tail rates are the extremes
+# where all of the overlap goes to one side.
+GAP_RATES = (0.0, 0.1, 0.25, 0.4, 0.45)
+TAIL_RATES = (0.0, 0.5, 1.0)
+
+
+@dataclass
+class SplitCase:
+    resources: list[Resource[int]]
+    max_segment_count: int
+    gap_rate: float
+    tail_rate: float
+
+    @property
+    def kwargs(self) -> dict[str, Any]:
+        return {
+            "max_segment_count": self.max_segment_count,
+            "border_incision": 0,
+            "gap_rate": self.gap_rate,
+            "tail_rate": self.tail_rate,
+        }
+
+
+def split_cases(
+    seed: int,
+    per_setting: int,
+    max_size: int = 80,
+    max_segment_counts: tuple[int, int] = (40, 400),
+) -> Generator[SplitCase, None, None]:
+    # `per_setting` cases for each pair of gap and tail rates
+    random = Random(seed)
+    for gap_rate in GAP_RATES:
+        for tail_rate in TAIL_RATES:
+            for _ in range(per_setting):
+                yield SplitCase(
+                    resources=random_resources(random, random.randint(0, max_size)),
+                    max_segment_count=random.randint(*max_segment_counts),
+                    gap_rate=gap_rate,
+                    tail_rate=tail_rate,
+                )
+
+
+def random_resources(random: Random, size: int) -> list[Resource[int]]:
+    return [
+        Resource(
+            count=random.choice((0, 1, 5, 20, 60, 150)),
+            start_incision=random.randint(-1, 3),
+            end_incision=random.randint(-1, 3),
+            payload=i,
+        )
+        for i in range(size)
+    ]
+
+
+def payloads(items: list[Resource[int] | Segment[int]]) -> list[int]:
+    # the payloads of a head, body or tail, segments flattened
+    result: list[int] = []
+    for item in items:
+        if isinstance(item, Segment):
+            result.extend(r.payload for r in item.resources)
+        else:
+            result.append(item.payload)
+    return result
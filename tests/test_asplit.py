@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+from typing import AsyncGenerator, Iterable
+
+from resource_segmentation import asplit, split
+from resource_segmentation.types import Group, Resource, Segment
+from tests.split_cases import split_cases
+
+
+class TestAsyncSplit(unittest.TestCase):
+    def test_same_as_split(self):
+        for case in split_cases(seed=11, per_setting=14):
+            groups = asyncio.run(
+                _collect(asplit(_aiter(case.resources), **case.kwargs))
+            )
+            self.assertEqual(
+                [_to_json(group) for group in groups],
+                [
+                    _to_json(group)
+                    for group in split(iter(case.resources), **case.kwargs)
+                ],
+            )
+
+    def test_yields_before_input_ends(self):
+        """测试：上游还在等待时，已完成的分组就应当产出"""
+
+        async def run() -> list[int]:
+            queue: asyncio.Queue[Resource[int] | None] = asyncio.Queue()
+
+            async def source():
+                while (resource := await queue.get()) is not None:
+                    yield resource
+
+            for i in range(8):
+                queue.put_nowait(Resource(100, 0, 0, i))
+            groups = asplit(source(), max_segment_count=200, border_incision=0)
+            first = await anext(groups)
+            queue.put_nowait(None)
+            rest = await _collect(groups)
+            return [sum(item.count for item in group.body) for group in (first, *rest)]
+
+        self.assertEqual(asyncio.run(run()), [200, 200, 200, 200])
+
+
+async def _aiter(resources: Iterable[Resource[int]]):
+    for resource in resources:
+        await asyncio.sleep(0)
+        yield resource
+
+
+async def _collect(groups: AsyncGenerator[Group[int], None]) -> list[Group[int]]:
+    return [group async for group in groups]
+
+
+def _to_json(group: Group[int]) -> dict:
+    return {
+        "head_remain_count": group.head_remain_count,
+        "tail_remain_count": group.tail_remain_count,
+        "head": [_item_to_json(item) for item in group.head],
+        "body": [_item_to_json(item) for item in group.body],
+        "tail": [_item_to_json(item) for item in group.tail],
+    }
+
+
+def _item_to_json(item: Resource[int] | Segment[int]):
+    if isinstance(item, Segment):
+        return [r.payload for r in item.resources]
+    return item.payload
@@ -0,0 +1,113 @@
+import unittest
+import warnings
+from random import Random
+from typing import Any, Generator
+
+from resource_segmentation import BufferLimitWarning, Budget, split, split_budgets
+from resource_segmentation.types import Group, Resource, Segment
+from tests.split_cases import split_cases
+
+
+class TestSplitBudgets(unittest.TestCase):
+    def test_same_as_split_for_each_budget(self):
+        for case in split_cases(seed=67, per_setting=3, max_size=150):
+            resources = case.resources
+            budgets: list[Budget | int] = [
+                case.max_segment_count,
+                Budget(400, gap_rate=0.25),
+                Budget(1600, tail_rate=0.0),
+                case.max_segment_count,
+            ]
+            groups: list[list[Group[int]]] = [[] for _ in budgets]
+            for index, group in split_budgets(
+                iter(resources), budgets, 0, case.gap_rate, case.tail_rate
+            ):
+                groups[index].append(group)
+            self.assertEqual(groups[0], list(split(iter(resources), **case.kwargs)))
+            self.assertEqual(
+                groups[1],
+                list(split(iter(resources), 400, 0, 0.25, case.tail_rate)),
+            )
+            self.assertEqual(
+                groups[2],
+                list(split(iter(resources), 1600, 0, case.gap_rate, 0.0)),
+            )
+            self.assertEqual(groups[3], groups[0])
+
+    def test_long_runs(self):
+        """测试：同一切口等级连续出现很长时，批量读入的结果仍与 split 一致"""
+        random = Random(83)
+        resources = [
+            Resource(
+                count=random.choice((0, 1, 5, 20)),
+                start_incision=3 if i % 1500 == 0 else 1,
+                end_incision=1,
+                payload=i,
+            )
+            for i in range(5000)
+        ]
+        budgets = [60, 1000, 20000]
+        groups: list[list[Group[int]]] = [[] for _ in budgets]
+        for index, group in split_budgets(iter(resources), budgets, 0, 0.2):
+            groups[index].append(group)
+        self.assertEqual(
+            groups,
+            [list(split(iter(resources), budget, 0, 0.2)) for budget in budgets],
+        )
+
+    def test_same_budget_twice(self):
+        """测试：设置相同的预算各自得到独立的分组，修改其一不影响另一个"""
+        resources = [Resource(10, 1 if i % 4 == 0 else 0, 0, i) for i in range(40)]
+        groups: list[list[Group[int]]] = [[], []]
+        for index, group in split_budgets(iter(resources), [60, 60], 0, 0.2):
+            groups[index].append(group)
+        self.assertEqual(groups[0], groups[1])
+        expected = list(split(iter(resources), 60, 0, 0.2))
+        for first, second in zip(groups[0], groups[1]):
+            self.assertIsNot(first, second)
+            self.assertIsNot(first.body, second.body)
+            first.body.clear()
+            first.head.clear()
+        self.assertEqual(groups[1], expected)
+        segment = next(item for item in groups[1][0].body if isinstance(item, Segment))
+        self.assertIs(segment.resources[0], resources[segment.resources[0].payload])
+
+    def test_buffer_limits(self):
+        """测试：设置缓冲上限时，每个预算的分组与带同样上限的 split 一致"""
+        resources = [
+            Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, i) for i in range(300)
+        ]
+        limits: dict[str, Any] = {"max_buffered_items": 25, "max_buffered_count": 200}
+        groups: list[list[Group[int]]] = [[], []]
+        with self.assertWarns(BufferLimitWarning):
+            for index, group in split_budgets(
+                iter(resources), [100, 400], 0, 0.25, **limits
+            ):
+                groups[index].append(group)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            self.assertEqual(
+                groups,
+                [
+                    list(split(iter(resources), 100, 0, 0.25, **limits)),
+                    list(split(iter(resources), 400, 0, 0.25, **limits)),
+                ],
+            )
+            self.assertNotEqual(groups[0], list(split(iter(resources), 100, 0, 0.25)))
+
+    def test_source_read_once(self):
+        """测试：多个预算共享同一次对资源的读取"""
+        pulled: list[int] = []
+
+        def source() -> Generator[Resource[int], None, None]:
+            for i in range(100):
+                pulled.append(i)
+                yield Resource(10, 0, 0, i)
+
+        groups = list(split_budgets(source(), [50, 200, 800], 0))
+        self.assertEqual(pulled, list(range(100)))
+        self.assertEqual(list(split_budgets(source(), [], 0)), [])
+        self.assertEqual(
+            [sum(1 for index, _ in groups if index == i) for i in range(3)],
+            [20, 5, 2],
+        )
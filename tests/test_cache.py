@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+import warnings
+from hashlib import blake2b
+from random import Random
+from struct import Struct
+from typing import Any
+from unittest.mock import patch
+
+from resource_segmentation import BufferLimitWarning, SplitCache, split_spans
+from resource_segmentation.cache import _fingerprint
+from resource_segmentation.types import Resource
+from tests.split_cases import random_resources, split_cases
+
+
+class TestSplitCache(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_same_as_split_spans(self):
+        cache = SplitCache(self._dir.name)
+        for case in split_cases(seed=47, per_setting=2, max_size=100):
+            expected = list(split_spans(case.resources, **case.kwargs))
+            self.assertEqual(
+                cache.split_spans(iter(case.resources), **case.kwargs), expected
+            )
+            self.assertEqual(cache.split_spans(case.resources, **case.kwargs), expected)
+
+    def test_buffer_limits(self):
+        """测试：缓冲上限是缓存键的一部分，带与不带上限的结果分别缓存"""
+        resources = [
+            Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, i) for i in range(300)
+        ]
+        limits: dict[str, Any] = {"max_buffered_items": 25, "max_buffered_count": 200}
+        cache = SplitCache(self._dir.name)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            limited = list(split_spans(resources, 100, 0, 0.25, **limits))
+            for _ in range(2):
+                self.assertEqual(
+                    cache.split_spans(resources, 100, 0, 0.25, **limits), limited
+                )
+                self.assertEqual(
+                    cache.split_spans(resources, 100, 0, 0.25),
+                    list(split_spans(resources, 100, 0, 0.25)),
+                )
+        self.assertNotEqual(limited, list(split_spans(resources, 100, 0, 0.25)))
+
+    def test_key_is_little_endian(self):
+        """测试：缓存键按小端序计算，与主机字节序无关"""
+        resources = random_resources(Random(89), 2000)
+        digest = blake2b(digest_size=20)
+        digest.update(Struct("<qqqddqq").pack(1, 300, 0, 0.2, 0.5, -1, -1))
+        record = Struct("<qqq")
+        for resource in resources:
+            digest.update(
+                record.pack(
+                    resource.count, resource.start_incision, resource.end_incision
+                )
+            )
+        self.assertEqual(
+            _fingerprint(resources, 300, 0, 0.2, 0.5, None, None), digest.hexdigest()
+        )
+
+    def test_unchanged_document_is_not_split_again(self):
+        """测试：内容未变的文档直接使用缓存，不再分段与分组"""
+        resources = random_resources(Random(53), 200)
+        spans = SplitCache(self._dir.name).split_spans(resources, 300, 0, 0.2)
+        # payloads are not part of the key; a new process sees the same entries
+        renamed = [
+            Resource(r.count, r.start_incision, r.end_incision, -r.payload)
+            for r in resources
+        ]
+        with patch("resource_segmentation.cache.split_spans") as split_mock:
+            cache = SplitCache(self._dir.name)
+            self.assertEqual(cache.split_spans(renamed, 300, 0, 0.2), spans)
+            split_mock.assert_not_called()
+            # other parameters are another entry
+            cache.split_spans(renamed, 300, 0, 0.1)
+            split_mock.assert_called_once()
+
+    def test_least_recently_used_are_removed(self):
+        # documents of the same shape, so entries take the same room
+        documents = [
+            [Resource(10, level, level, i) for i in range(200)] for level in range(3)
+        ]
+        cache = SplitCache(self._dir.name)
+        cache.split_spans(documents[0], 100, 0)
+        entry_bytes = _directory_bytes(self._dir.name)
+
+        cache = SplitCache(self._dir.name, max_bytes=entry_bytes * 5 // 2)
+        cache.split_spans(documents[1], 100, 0)
+        cache.split_spans(documents[0], 100, 0)
+        cache.split_spans(documents[2], 100, 0)
+        self.assertEqual(_directory_bytes(self._dir.name), entry_bytes * 2)
+        with patch("resource_segmentation.cache.split_spans") as split_mock:
+            split_mock.return_value = []
+            cache.split_spans(documents[0], 100, 0)
+            cache.split_spans(documents[2], 100, 0)
+            split_mock.assert_not_called()
+            cache.split_spans(documents[1], 100, 0)
+            split_mock.assert_called_once()
+
+
+def _directory_bytes(directory: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+    )
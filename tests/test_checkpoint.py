@@ -0,0 +1,115 @@
+import pickle
+import unittest
+import warnings
+
+from resource_segmentation import (
+    BufferLimitWarning,
+    SplitCheckpoint,
+    split,
+    split_checkpointed,
+)
+from resource_segmentation.types import Resource
+from tests.split_cases import split_cases
+
+
+class TestCheckpoint(unittest.TestCase):
+    def test_resume_from_every_checkpoint(self):
+        for index, case in enumerate(split_cases(seed=5, per_setting=10, max_size=120)):
+            resources = case.resources
+            kwargs = case.kwargs
+            expected = list(split(iter(resources), **kwargs))
+            checkpoints: list[SplitCheckpoint] = []
+            groups = list(
+                split_checkpointed(
+                    resources,
+                    **kwargs,
+                    checkpoint_every=index % 3 + 1,
+                    on_checkpoint=lambda c, saved=checkpoints: saved.append(
+                        pickle.loads(pickle.dumps(c))
+                    ),
+                )
+            )
+            self.assertEqual(groups, expected)
+            for checkpoint in checkpoints:
+                resumed = split_checkpointed(
+                    resources[checkpoint.offset :],
+                    **kwargs,
+                    resume_from=checkpoint,
+                )
+                self.assertEqual(list(resumed), expected[checkpoint.group_count :])
+
+    def test_deep_nesting(self):
+        """测试：嵌套很深的段落也能被保存和恢复"""
+        resources = [
+            Resource(count=1, start_incision=-i, end_incision=0, payload=i)
+            for i in range(2000)
+        ]
+        resources.extend(Resource(20, -2000, 0, i) for i in range(2000, 14000))
+        expected = list(
+            split(iter(resources), max_segment_count=100, border_incision=0)
+        )
+        checkpoints: list[SplitCheckpoint] = []
+        groups = split_checkpointed(
+            resources,
+            max_segment_count=100,
+            border_incision=0,
+            checkpoint_every=100,
+            on_checkpoint=checkpoints.append,
+        )
+        self.assertEqual(list(groups), expected)
+        checkpoint = checkpoints[len(checkpoints) // 2]
+        resumed = split_checkpointed(
+            resources[checkpoint.offset :],
+            max_segment_count=100,
+            border_incision=0,
+            resume_from=checkpoint,
+        )
+        self.assertEqual(list(resumed), expected[checkpoint.group_count :])
+
+    def test_buffer_limits(self):
+        """测试：强制切分的状态也能被保存和恢复"""
+        resources = [
+            Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, i) for i in range(300)
+        ]
+        kwargs = {
+            "max_segment_count": 100,
+            "border_incision": 0,
+            "gap_rate": 0.25,
+            "max_buffered_items": 25,
+            "max_buffered_count": 200,
+        }
+        checkpoints: list[SplitCheckpoint] = []
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            expected = list(split(iter(resources), **kwargs))
+            groups = split_checkpointed(
+                resources, **kwargs, on_checkpoint=checkpoints.append
+            )
+            self.assertEqual(list(groups), expected)
+            for checkpoint in checkpoints:
+                resumed = split_checkpointed(
+                    resources[checkpoint.offset :], **kwargs, resume_from=checkpoint
+                )
+                self.assertEqual(list(resumed), expected[checkpoint.group_count :])
+
+    def test_resources_end_too_early(self):
+        checkpoints: list[SplitCheckpoint] = []
+        resources = [Resource(60, 0, 0, i) for i in range(20)]
+        list(
+            split_checkpointed(
+                resources,
+                max_segment_count=100,
+                border_incision=0,
+                on_checkpoint=checkpoints.append,
+            )
+        )
+        checkpoint = checkpoints[0]
+        with self.assertRaises(ValueError):
+            list(
+                split_checkpointed(
+                    [],
+                    max_segment_count=100,
+                    border_incision=0,
+                    resume_from=checkpoint,
+                )
+            )
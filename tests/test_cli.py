@@ -0,0 +1,203 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import warnings
+from contextlib import redirect_stderr
+from dataclasses import asdict
+from io import StringIO
+from random import Random
+from typing import Any
+
+from resource_segmentation import (
+    BufferLimitWarning,
+    split,
+    split_spans,
+    write_resources,
+)
+from resource_segmentation.__main__ import main
+from resource_segmentation.types import Group, Resource, Segment
+
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        random = Random(43)
+        self._resources = [
+            Resource(
+                count=random.choice((1, 5, 20, 60)),
+                start_incision=random.randint(0, 2),
+                end_incision=random.randint(0, 2),
+                payload=f"r{i}",
+            )
+            for i in range(300)
+        ]
+        self._input = self._path("resources.jsonl")
+        with open(self._input, "w", encoding="utf-8") as file:
+            for resource in self._resources:
+                file.write(json.dumps(asdict(resource)) + "\n")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_groups(self):
+        self.assertEqual(
+            self._main(self._input, "--max-segment-count", "200", "--gap-rate", "0.2"),
+            [
+                _group_to_json(group)
+                for group in split(iter(self._resources), 200, 0, 0.2)
+            ],
+        )
+
+    def test_gzip_and_spans(self):
+        """测试：自动识别 gzip 压缩的输入，并只输出索引范围"""
+        compressed = self._path("resources.jsonl.gz")
+        with open(self._input, "rb") as file, gzip.open(compressed, "wb") as output:
+            output.write(file.read())
+        self.assertEqual(
+            self._main(compressed, "--max-segment-count", "200", "--spans"),
+            [asdict(span) for span in split_spans(self._resources, 200, 0)],
+        )
+
+    def test_binary_input(self):
+        binary = self._path("resources.bin")
+        write_resources(
+            binary,
+            (
+                Resource(r.count, r.start_incision, r.end_incision, r.payload.encode())
+                for r in self._resources
+            ),
+        )
+        args = ("--format", "binary", "--max-segment-count", "200", "--gap-rate", "0.1")
+        self.assertEqual(
+            self._main(binary, *args),
+            [
+                _group_to_json(group)
+                for group in split(iter(self._resources), 200, 0, 0.1)
+            ],
+        )
+        self.assertEqual(
+            self._main(binary, *args, "--spans"),
+            [asdict(span) for span in split_spans(self._resources, 200, 0, 0.1)],
+        )
+
+    def test_bad_line(self):
+        with open(self._input, "a", encoding="utf-8") as file:
+            file.write('{"payload": "no count"}\n')
+        with redirect_stderr(StringIO()) as stderr:
+            exit_code = main(
+                [self._input, "--max-segment-count", "200", "-o", self._path("out")]
+            )
+        self.assertEqual(exit_code, 1)
+        self.assertIn("line 301", stderr.getvalue())
+
+    def test_missing_or_foreign_file(self):
+        """测试：输入文件不存在或不是 write_resources 写出的文件时报错退出"""
+        for args in (
+            (self._path("missing.jsonl"),),
+            (self._input, "--format", "binary"),
+        ):
+            with redirect_stderr(StringIO()) as stderr:
+                exit_code = main(
+                    [*args, "--max-segment-count", "200", "-o", self._path("out")]
+                )
+            self.assertEqual(exit_code, 1)
+            self.assertTrue(stderr.getvalue().startswith("error: "))
+
+    def test_buffer_limits(self):
+        resources = [
+            Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, f"r{i}")
+            for i in range(300)
+        ]
+        with open(self._input, "w", encoding="utf-8") as file:
+            for resource in resources:
+                file.write(json.dumps(asdict(resource)) + "\n")
+        args = ("--max-segment-count", "100", "--gap-rate", "0.25")
+        limits = ("--max-buffered-items", "25", "--max-buffered-count", "200")
+        kwargs: dict[str, Any] = {"max_buffered_items": 25, "max_buffered_count": 200}
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            self.assertEqual(
+                self._main(self._input, *args, *limits),
+                [
+                    _group_to_json(group)
+                    for group in split(iter(resources), 100, 0, 0.25, **kwargs)
+                ],
+            )
+            self.assertEqual(
+                self._main(self._input, *args, *limits, "--spans"),
+                [
+                    asdict(span)
+                    for span in split_spans(resources, 100, 0, 0.25, **kwargs)
+                ],
+            )
+            self.assertNotEqual(
+                self._main(self._input, *args, *limits), self._main(self._input, *args)
+            )
+
+    def test_bad_options(self):
+        """测试：参数不合法时通过 argparse 报错，而不是抛出异常"""
+        for args in (
+            ("--max-segment-count", "0"),
+            ("--max-segment-count", "200", "--gap-rate", "1.5"),
+            ("--max-segment-count", "200", "--gap-rate", "-0.1"),
+            ("--max-segment-count", "200", "--gap-rate", "0.5"),
+            ("--max-segment-count", "200", "--tail-rate", "2"),
+            ("--max-segment-count", "200", "--max-buffered-items", "0"),
+        ):
+            with redirect_stderr(StringIO()) as stderr, self.assertRaises(SystemExit):
+                main([self._input, *args, "-o", self._path("out")])
+            self.assertIn("error: --", stderr.getvalue())
+
+    def test_broken_pipe(self):
+        """测试：读取端提前关闭时安静退出，退出码为 0 且不输出异常"""
+        read_end, write_end = os.pipe()
+        os.close(read_end)
+        # a pipe nobody reads: writing to it raises BrokenPipeError
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "resource_segmentation",
+                self._input,
+                "--max-segment-count",
+                "200",
+            ],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stdout=write_end,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+        os.close(write_end)
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(process.stderr, b"")
+
+    def _main(self, *args: str) -> list[dict]:
+        output = self._path("groups.jsonl")
+        self.assertEqual(main([*args, "-o", output]), 0)
+        with open(output, encoding="utf-8") as file:
+            return [json.loads(line) for line in file]
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._dir.name, name)
+
+
+def _group_to_json(group: Group[str]) -> dict:
+    def item_to_json(item: Resource[str] | Segment[str]) -> dict:
+        if isinstance(item, Segment):
+            return {
+                "count": item.count,
+                "resources": [asdict(resource) for resource in item.resources],
+            }
+        return asdict(item)
+
+    return {
+        "head_remain_count": group.head_remain_count,
+        "tail_remain_count": group.tail_remain_count,
+        "head": [item_to_json(item) for item in group.head],
+        "body": [item_to_json(item) for item in group.body],
+        "tail": [item_to_json(item) for item in group.tail],
+    }
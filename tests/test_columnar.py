@@ -0,0 +1,110 @@
+import unittest
+import warnings
+
+from resource_segmentation import BufferLimitWarning, split_arrays, split_spans
+from resource_segmentation.types import Resource
+from tests.split_cases import split_cases
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestColumnar(unittest.TestCase):
+    def test_uniform_resources(self):
+        arrays = split_arrays(
+            counts=[100, 100, 100, 100, 100],
+            start_incisions=[0, 0, 0, 0, 0],
+            end_incisions=[0, 0, 0, 0, 0],
+            max_segment_count=400,
+            border_incision=0,
+            gap_rate=0.25,
+            tail_rate=0.5,
+        )
+        self.assertEqual(
+            [
+                arrays.head_begin.tolist(),
+                arrays.body_begin.tolist(),
+                arrays.body_end.tolist(),
+                arrays.tail_end.tolist(),
+                arrays.head_remain_count.tolist(),
+                arrays.tail_remain_count.tolist(),
+            ],
+            [
+                [0, 1, 2],
+                [0, 2, 4],
+                [2, 4, 5],
+                [4, 5, 5],
+                [0, 100, 200],
+                [200, 100, 0],
+            ],
+        )
+
+    def test_empty_input(self):
+        arrays = split_arrays([], [], [], max_segment_count=100, border_incision=0)
+        self.assertEqual(len(arrays.body_begin), 0)
+
+    def test_buffer_limits(self):
+        resources = [
+            Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, i) for i in range(300)
+        ]
+        with self.assertWarns(BufferLimitWarning):
+            arrays = split_arrays(
+                counts=[r.count for r in resources],
+                start_incisions=[r.start_incision for r in resources],
+                end_incisions=[r.end_incision for r in resources],
+                max_segment_count=100,
+                border_incision=0,
+                gap_rate=0.25,
+                max_buffered_items=25,
+                max_buffered_count=200,
+            )
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            spans = list(
+                split_spans(
+                    resources,
+                    max_segment_count=100,
+                    border_incision=0,
+                    gap_rate=0.25,
+                    max_buffered_items=25,
+                    max_buffered_count=200,
+                )
+            )
+        self.assertEqual(
+            list(zip(arrays.body_begin.tolist(), arrays.body_end.tolist())),
+            [(span.body_begin, span.body_end) for span in spans],
+        )
+        self.assertEqual(
+            list(zip(arrays.head_begin.tolist(), arrays.tail_end.tolist())),
+            [(span.head_begin, span.tail_end) for span in spans],
+        )
+
+    def test_same_as_split_spans(self):
+        for case in split_cases(seed=42, per_setting=20):
+            resources = case.resources
+            arrays = split_arrays(
+                counts=[r.count for r in resources],
+                start_incisions=[r.start_incision for r in resources],
+                end_incisions=[r.end_incision for r in resources],
+                **case.kwargs,
+            )
+            spans = split_spans(resources=resources, **case.kwargs)
+            self.assertEqual(
+                list(zip(*(array.tolist() for array in arrays))),
+                [
+                    (
+                        span.head_begin,
+                        span.head_end,
+                        span.body_begin,
+                        span.body_end,
+                        span.tail_begin,
+                        span.tail_end,
+                        span.head_remain_count,
+                        span.tail_remain_count,
+                    )
+                    for span in spans
+                ],
+            )
@@ -0,0 +1,97 @@
+import unittest
+from itertools import count, islice
+from typing import Iterable
+
+from resource_segmentation import (
+    LazyResource,
+    LRUCountCache,
+    payload_fingerprint,
+    split,
+)
+from resource_segmentation.types import Group, Resource, Segment
+
+
+class TestCount(unittest.TestCase):
+    def test_counts_on_demand(self):
+        """测试：只有被切分流程读到的资源才会计数"""
+        counted: list[int] = []
+
+        def counter(payload: int) -> int:
+            counted.append(payload)
+            return 10
+
+        resources = (LazyResource(counter, 0, 0, i) for i in count())
+        groups = split(resources, max_segment_count=30, border_incision=0)
+        self.assertEqual(len(list(islice(groups, 2))), 2)
+        self.assertLess(len(counted), 20)
+        self.assertEqual(counted, sorted(set(counted)))
+
+    def test_same_groups_as_eager_counts(self):
+        payloads = ["a" * (i % 7 + 1) for i in range(50)]
+        lazy = [
+            LazyResource(len, i % 3, i % 2, payload)
+            for i, payload in enumerate(payloads)
+        ]
+        eager = [
+            Resource(len(payload), i % 3, i % 2, payload)
+            for i, payload in enumerate(payloads)
+        ]
+        self.assertEqual(
+            _to_json(split(iter(lazy), max_segment_count=12, border_incision=0)),
+            _to_json(split(iter(eager), max_segment_count=12, border_incision=0)),
+        )
+
+    def test_cache_shared_across_documents(self):
+        counted: list[str] = []
+
+        def counter(payload: str) -> int:
+            counted.append(payload)
+            return len(payload)
+
+        cache = LRUCountCache()
+        for _ in range(3):
+            document = [
+                LazyResource(counter, 0, 0, text, cache)
+                for text in ("header", "body", "footer")
+            ]
+            list(split(iter(document), max_segment_count=100, border_incision=0))
+        self.assertEqual(counted, ["header", "body", "footer"])
+
+    def test_unhashable_payload(self):
+        self.assertEqual(payload_fingerprint(("a", 1)), ("a", 1))
+        self.assertEqual(payload_fingerprint("text"), payload_fingerprint(b"text"))
+        with self.assertRaises(TypeError):
+            payload_fingerprint(["a", 1])
+        resource = LazyResource(len, 0, 0, ["a", 1], LRUCountCache())
+        with self.assertRaises(TypeError):
+            _ = resource.count
+
+    def test_lru_eviction(self):
+        cache = LRUCountCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+
+def _to_json(groups: Iterable[Group[str]]) -> list[dict]:
+    return [
+        {
+            "head_remain_count": group.head_remain_count,
+            "tail_remain_count": group.tail_remain_count,
+            "head": [_item_to_json(item) for item in group.head],
+            "body": [_item_to_json(item) for item in group.body],
+            "tail": [_item_to_json(item) for item in group.tail],
+        }
+        for group in groups
+    ]
+
+
+def _item_to_json(item: Resource[str] | Segment[str]):
+    if isinstance(item, Segment):
+        return [item.count, [r.payload for r in item.resources]]
+    return [item.count, item.payload]
@@ -0,0 +1,102 @@
+import unittest
+import warnings
+from random import Random
+from typing import Any
+
+from resource_segmentation import (
+    BufferLimitWarning,
+    PackedGroup,
+    split,
+    split_documents,
+)
+from resource_segmentation.types import Group, Resource
+from tests.split_cases import split_cases
+
+
+class TestSplitDocuments(unittest.TestCase):
+    def test_small_documents_share_groups(self):
+        """测试：小文档被装入同一个分组，并记录各自所属的文档"""
+        documents = [
+            [Resource(30, 0, 0, "a0"), Resource(20, 0, 0, "a1")],
+            [Resource(40, 0, 0, "b0")],
+            [Resource(60, 0, 0, "c0")],
+            [],
+            [Resource(10, 0, 0, "e0")],
+        ]
+        packed = list(split_documents(documents, 100, 0))
+        self.assertEqual(
+            [[index for index, _ in group.parts] for group in packed],
+            [[0, 1, 4], [2]],
+        )
+        self.assertEqual([group.count for group in packed], [100, 60])
+
+    def test_every_group_once(self):
+        random = Random(17)
+        for case in split_cases(seed=17, per_setting=4, max_size=300):
+            # the resources of the case, cut into documents of up to 12
+            documents: list[list[Resource[int]]] = []
+            begin = 0
+            while begin < len(case.resources):
+                end = begin + random.randint(0, 12)
+                documents.append(case.resources[begin:end])
+                begin = end
+            packed = list(
+                split_documents(
+                    iter(documents), **case.kwargs, lookahead=random.randint(1, 8)
+                )
+            )
+            parts: dict[int, list[Group[int]]] = {}
+            for group in packed:
+                self.assertEqual(group.count, sum(_count(g) for _, g in group.parts))
+                if len(group.parts) > 1:
+                    self.assertLessEqual(group.count, case.max_segment_count)
+                for index, part in group.parts:
+                    parts.setdefault(index, []).append(part)
+            for index, document in enumerate(documents):
+                self.assertEqual(
+                    parts.get(index, []), list(split(iter(document), **case.kwargs))
+                )
+
+    def test_fewer_requests(self):
+        random = Random(23)
+        documents = [
+            [
+                Resource(random.randint(1, 50), 0, 0, i)
+                for i in range(random.randint(1, 8))
+            ]
+            for _ in range(200)
+        ]
+        packed: list[PackedGroup[int]] = list(split_documents(documents, 1000, 0))
+        self.assertLess(len(packed), len(documents) // 3)
+
+    def test_buffer_limits(self):
+        """测试：缓冲上限作用于每个文档，结果与带同样上限的 split 一致"""
+        resources = [
+            Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, i) for i in range(300)
+        ]
+        limits: dict[str, Any] = {"max_buffered_items": 25, "max_buffered_count": 200}
+        documents = [resources, resources[:40]]
+        with self.assertWarns(BufferLimitWarning):
+            packed = list(split_documents(documents, 100, 0, 0.25, **limits))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            for index, document in enumerate(documents):
+                self.assertEqual(
+                    [
+                        group
+                        for packed_group in packed
+                        for part_index, group in packed_group.parts
+                        if part_index == index
+                    ],
+                    list(split(iter(document), 100, 0, 0.25, **limits)),
+                )
+
+    def test_lookahead_at_least_one(self):
+        with self.assertRaises(ValueError):
+            list(split_documents([], 100, 0, lookahead=0))
+
+
+def _count(group: Group) -> int:
+    return sum(
+        item.count for part in (group.head, group.body, group.tail) for item in part
+    )
@@ -1,7 +1,22 @@
 import unittest
+import warnings
+from itertools import count, islice
+from math import floor
+from random import Random
+from typing import Generator
 
-from resource_segmentation.group import group_items
-from resource_segmentation.segment import allocate_segments
+from resource_segmentation.group import (
+    Grouper,
+    GroupStart,
+    _Group,
+    group_from,
+    group_items,
+)
+from resource_segmentation.segment import (
+    BufferLimitWarning,
+    Chunk,
+    allocate_segments,
+)
 from resource_segmentation.types import Group, Resource, Segment
 
 
@@ -173,6 +188,124 @@ class TestGroup(unittest.TestCase):
             ],
         )
 
+    def test_same_as_appending_items(self):
+        """测试：滑动窗口分组与逐个追加、重建头部的分组结果一致"""
+        random = Random(23)
+        for _ in range(500):
+            chunks: list[Chunk] = []
+            for i in range(random.randint(0, 60)):
+                chunks.append(Chunk(i, i + 1, random.choice((0, 1, 2, 5, 10, 40, 100))))
+            max_count = random.randint(5, 200)
+            gap_rate = random.choice((0.0, 0.1, 0.3, 0.45))
+            if max_count - floor(max_count * gap_rate) * 2 <= 0:
+                continue
+            kwargs = {
+                "max_count": max_count,
+                "gap_rate": gap_rate,
+                "tail_rate": random.choice((0.0, 0.5, 1.0)),
+            }
+            expected = [
+                _group_to_bounds(group)
+                for group, _ in group_from(
+                    chunks=chunks,
+                    start=GroupStart(begin=0, head=(), head_sealed=True),
+                    stop=len(chunks),
+                    **kwargs,
+                )
+            ]
+            grouper: Grouper[Chunk] = Grouper(**kwargs)
+            groups = [group for chunk in chunks for group in grouper.push(chunk)]
+            groups.extend(grouper.close())
+            self.assertEqual([_group_to_bounds(group) for group in groups], expected)
+
+    def test_buffer_limit_cuts_open_groups(self):
+        """测试：永远填不满主体的分组超过缓冲上限时被强制切开，并发出警告"""
+        pulled: list[int] = []
+
+        def endless() -> Generator[Resource[int], None, None]:
+            for i in count():
+                pulled.append(i)
+                yield Resource(0, 0, 0, i)
+
+        with self.assertWarns(BufferLimitWarning):
+            groups = list(
+                islice(
+                    group_items(
+                        allocate_segments(endless(), 0, 100, max_buffered_items=1000),
+                        max_count=100,
+                        gap_rate=0.1,
+                        tail_rate=0.5,
+                        max_buffered_items=1000,
+                    ),
+                    2,
+                )
+            )
+        self.assertEqual(
+            [
+                [r.payload for item in group.body for r in _flatten(item)]
+                for group in groups
+            ],
+            [list(range(0, 1001)), list(range(1001, 2002))],
+        )
+        self.assertEqual([group.head for group in groups], [[], []])
+        self.assertLessEqual(len(pulled), 2003)
+
+        chunks = [Chunk(i, i + 1, 1) for i in range(200)]
+        grouper: Grouper[Chunk] = Grouper(1000, 0.0, 0.5, max_buffered_count=50)
+        with self.assertWarns(BufferLimitWarning):
+            groups = [group for chunk in chunks for group in grouper.push(chunk)]
+        groups.extend(grouper.close())
+        self.assertEqual(
+            [[chunk.begin for chunk in group.body] for group in groups],
+            [list(range(i, min(i + 51, 200))) for i in range(0, 200, 51)],
+        )
+
+    def test_buffer_limit_not_reached(self):
+        random = Random(83)
+        for _ in range(200):
+            chunks: list[Chunk] = []
+            end = 0
+            for _ in range(random.randint(0, 60)):
+                size = random.randint(1, 3)
+                chunks.append(Chunk(end, end + size, random.choice((0, 1, 5, 40))))
+                end += size
+            kwargs = {
+                "max_count": random.randint(20, 200),
+                "gap_rate": random.choice((0.0, 0.1, 0.3, 0.45)),
+                "tail_rate": random.choice((0.0, 0.5, 1.0)),
+            }
+            grouper: Grouper[Chunk] = Grouper(**kwargs)
+            expected = [group for chunk in chunks for group in grouper.push(chunk)]
+            expected.extend(grouper.close())
+            grouper = Grouper(
+                **kwargs,
+                max_buffered_items=end,
+                max_buffered_count=sum(chunk.count for chunk in chunks),
+            )
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", BufferLimitWarning)
+                groups = [group for chunk in chunks for group in grouper.push(chunk)]
+                groups.extend(grouper.close())
+            self.assertEqual(
+                [_group_to_bounds(group) for group in groups],
+                [_group_to_bounds(group) for group in expected],
+            )
+
+
+def _flatten(item: Resource | Segment) -> list[Resource]:
+    if isinstance(item, Segment):
+        return item.resources
+    return [item]
+
+
+def _group_to_bounds(group: _Group[Chunk]) -> tuple:
+    return (
+        group.remain_counts(),
+        [chunk.begin for chunk in group.head],
+        [chunk.begin for chunk in group.body],
+        [chunk.begin for chunk in group.tail],
+    )
+
 
 def _group_to_json(item: Group) -> dict:
     return {
@@ -0,0 +1,88 @@
+import unittest
+from random import Random
+
+from resource_segmentation import IncrementalSplit, split
+from resource_segmentation.types import Group, Resource, Segment
+from tests.split_cases import random_resources, split_cases
+
+
+class TestIncrementalSplit(unittest.TestCase):
+    def test_edit_reuses_far_groups(self):
+        resources = [
+            Resource(10, 1 if i % 5 == 0 else 0, 0, str(i)) for i in range(200)
+        ]
+        incremental = IncrementalSplit(
+            resources, max_segment_count=100, border_incision=0
+        )
+        old_groups = list(incremental.groups)
+        self.assertEqual(len(old_groups), 20)
+
+        edit = incremental.replace(102, 103, [Resource(10, 0, 0, "new")])
+        # every group that read the edited chunk is rebuilt, even when it only
+        # read it to find out that it overflows
+        self.assertEqual((edit.begin, edit.removed_count, len(edit.groups)), (8, 4, 4))
+        self.assertEqual(
+            [_item_to_json(item) for item in edit.groups[2].body],
+            [["100", "101", "new", "103", "104", "105", "106", "107", "108", "109"]],
+        )
+        for index, group in enumerate(incremental.groups):
+            if not 8 <= index <= 11:
+                self.assertIs(group, old_groups[index])
+
+    def test_same_as_split_after_edits(self):
+        random = Random(23)
+        for case in split_cases(seed=23, per_setting=7, max_size=150):
+            incremental = IncrementalSplit(case.resources, **case.kwargs)
+            for _ in range(5):
+                size = len(incremental.resources)
+                begin = random.randint(0, size)
+                end = random.randint(begin, min(size, begin + 4))
+                old_groups = list(incremental.groups)
+                edit = incremental.replace(
+                    begin, end, random_resources(random, random.randint(0, 4))
+                )
+                expected = [
+                    _to_json(group)
+                    for group in split(iter(incremental.resources), **case.kwargs)
+                ]
+                self.assertEqual([_to_json(g) for g in incremental.groups], expected)
+                old_groups[edit.begin : edit.begin + edit.removed_count] = edit.groups
+                self.assertEqual([_to_json(g) for g in old_groups], expected)
+
+    def test_insert_and_delete(self):
+        incremental = IncrementalSplit(
+            [Resource(10, 0, 0, str(i)) for i in range(10)],
+            max_segment_count=30,
+            border_incision=0,
+        )
+        incremental.insert(0, [Resource(10, 0, 0, "a")])
+        incremental.delete(5, 11)
+        self.assertEqual(
+            [[_item_to_json(item) for item in g.body] for g in incremental.groups],
+            [[["a", "0", "1"]], [["2", "3"]]],
+        )
+        with self.assertRaises(IndexError):
+            incremental.delete(3, 10)
+
+
+def _to_json(group: Group) -> dict:
+    # resources are compared by identity, since reused groups must hold the same objects
+    return {
+        "head_remain_count": group.head_remain_count,
+        "tail_remain_count": group.tail_remain_count,
+        "head": [_item_to_ids(item) for item in group.head],
+        "body": [_item_to_ids(item) for item in group.body],
+        "tail": [_item_to_ids(item) for item in group.tail],
+    }
+
+
+def _item_to_ids(item: Resource | Segment):
+    if isinstance(item, Segment):
+        return [id(r) for r in item.resources]
+    return id(item)
+
+
+def _item_to_json(item: Resource | Segment):
+    if isinstance(item, Segment):
+        return [r.payload for r in item.resources]
+    return item.payload
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+import warnings
+from random import Random
+
+from resource_segmentation import (
+    BufferLimitWarning,
+    GroupView,
+    MappedResources,
+    split_file,
+    split_spans,
+    write_resources,
+)
+from resource_segmentation.types import Resource
+from tests.split_cases import split_cases
+
+
+class TestMapped(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "resources.bin")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_same_as_split_spans(self):
+        random = Random(41)
+        for case in split_cases(seed=41, per_setting=2, max_size=200):
+            resources = [
+                Resource(
+                    r.count,
+                    r.start_incision,
+                    r.end_incision,
+                    random.randbytes(random.randint(0, 6)),
+                )
+                for r in case.resources
+            ]
+            self.assertEqual(
+                write_resources(self._path, iter(resources)), len(resources)
+            )
+            self.assertEqual(
+                list(split_file(self._path, **case.kwargs)),
+                list(split_spans(resources, **case.kwargs)),
+            )
+            with MappedResources(self._path) as mapped:
+                self.assertEqual(list(mapped), resources)
+
+    def test_read_payloads_of_a_group(self):
+        """测试：只在需要时从文件中读取分组的内容"""
+        resources = [Resource(100, 0, 0, f"r{i}".encode()) for i in range(5)]
+        write_resources(self._path, resources)
+        spans = list(split_file(self._path, 400, 0, gap_rate=0.25))
+        with MappedResources(self._path) as mapped:
+            view = GroupView(spans[1], mapped)
+            self.assertEqual([r.payload for r in view.head], [b"r1"])
+            self.assertEqual([r.payload for r in view.body], [b"r2", b"r3"])
+            self.assertEqual([r.payload for r in view.tail], [b"r4"])
+            self.assertEqual(mapped[-1].payload, b"r4")
+            self.assertEqual([r.payload for r in mapped[1:3]], [b"r1", b"r2"])
+            with self.assertRaises(IndexError):
+                _ = mapped[5]
+
+    def test_large_incisions(self):
+        """测试：超出 32 位整数范围的切口能原样写入和读出"""
+        resources = [
+            Resource(10, -(2**40), 2**40, b"a"),
+            Resource(20, 2**40, 3, b"b"),
+            Resource(30, 2**62, -(2**62), b"c"),
+        ]
+        write_resources(self._path, resources)
+        with MappedResources(self._path) as mapped:
+            self.assertEqual(list(mapped), resources)
+        self.assertEqual(
+            list(split_file(self._path, 40, 0)),
+            list(split_spans(resources, 40, 0)),
+        )
+
+    def test_buffer_limits(self):
+        resources = [
+            Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, b"") for i in range(300)
+        ]
+        write_resources(self._path, resources)
+        with self.assertWarns(BufferLimitWarning):
+            spans = list(split_file(self._path, 100, 0, 0.25, 0.5, 25, 200))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            self.assertEqual(
+                spans, list(split_spans(resources, 100, 0, 0.25, 0.5, 25, 200))
+            )
+
+    def test_stop_early(self):
+        write_resources(self._path, (Resource(100, 0, 0, b"") for _ in range(50)))
+        groups = split_file(self._path, 200, 0)
+        next(groups)
+        groups.close()
+        os.remove(self._path)
+
+    def test_not_a_resource_file(self):
+        with open(self._path, "wb") as file:
+            file.write(b"resource segmentation")
+        with self.assertRaises(ValueError):
+            list(split_file(self._path, 100, 0))
+        with self.assertRaises(ValueError):
+            MappedResources(self._path)
@@ -0,0 +1,182 @@
+import unittest
+from math import floor
+from random import Random
+
+from resource_segmentation import split
+from resource_segmentation.segment import SegmentAllocator, Segmenter
+from resource_segmentation.types import Resource, Segment
+
+
+class TestMinGroupsPacking(unittest.TestCase):
+    def test_no_overlap_room_at_the_ends(self):
+        """测试：首尾分组没有可重叠的内容，不必为其预留空间"""
+        resources = [
+            Resource(40, 0, 0, 0),
+            Resource(40, 0, 0, 1),
+            Resource(10, 0, 0, 2),
+        ]
+        kwargs = {"max_segment_count": 100, "border_incision": 0, "gap_rate": 0.2}
+        self.assertEqual(len(list(split(iter(resources), **kwargs))), 2)
+        groups = list(split(iter(resources), **kwargs, packing="min_groups"))
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(_payloads(groups[0].body), [0, 1, 2])
+
+    def test_fewest_groups(self):
+        random = Random(29)
+        for _ in range(300):
+            resources = [
+                Resource(
+                    count=random.choice((0, 1, 5, 20, 60, 150, 400)),
+                    start_incision=random.randint(0, 3),
+                    end_incision=random.randint(0, 3),
+                    payload=i,
+                )
+                for i in range(random.randint(0, 50))
+            ]
+            max_count = random.randint(40, 600)
+            gap_rate = random.choice((0.0, 0.1, 0.25, 0.4))
+            gap_max_count = floor(max_count * gap_rate)
+            if max_count - gap_max_count * 2 <= 0:
+                continue
+            groups = list(
+                split(
+                    iter(resources),
+                    max_segment_count=max_count,
+                    border_incision=0,
+                    gap_rate=gap_rate,
+                    tail_rate=random.choice((0.0, 0.5, 1.0)),
+                    packing="min_groups",
+                )
+            )
+            self.assertEqual(
+                [p for group in groups for p in _payloads(group.body)],
+                [resource.payload for resource in resources],
+            )
+            items = _segments(resources, max_count - gap_max_count * 2)
+            self.assertEqual(
+                len(groups), _fewest_groups(items, max_count, gap_max_count)
+            )
+            for group in groups:
+                if len(group.body) > 1:
+                    self.assertLessEqual(_count(group.body), max_count)
+
+    def test_balanced(self):
+        random = Random(31)
+        for _ in range(200):
+            resources = [
+                Resource(
+                    count=random.choice((1, 5, 20, 60, 150)),
+                    start_incision=random.randint(0, 3),
+                    end_incision=random.randint(0, 3),
+                    payload=i,
+                )
+                for i in range(random.randint(0, 40))
+            ]
+            max_count = random.randint(60, 600)
+            gap_rate = random.choice((0.0, 0.1, 0.25))
+            gap_max_count = floor(max_count * gap_rate)
+            groups = list(
+                split(iter(resources), max_count, 0, gap_rate, packing="balanced")
+            )
+            self.assertEqual(
+                [p for group in groups for p in _payloads(group.body)],
+                [resource.payload for resource in resources],
+            )
+            fewest = list(
+                split(iter(resources), max_count, 0, gap_rate, packing="min_groups")
+            )
+            self.assertEqual(len(groups), len(fewest))
+            items = _segments(resources, max_count - gap_max_count * 2)
+            self.assertEqual(
+                max((_count(group.body) for group in groups), default=0),
+                _smallest_largest_body(items, max_count, gap_max_count),
+            )
+
+    def test_balanced_evens_out_the_last_group(self):
+        """测试：均衡模式不会留下很小的最后一组"""
+        resources = [Resource(10, 0, 0, i) for i in range(21)]
+        fewest = list(split(iter(resources), 100, 0, packing="min_groups"))
+        self.assertEqual([_count(g.body) for g in fewest], [100, 100, 10])
+        groups = list(split(iter(resources), 100, 0, packing="balanced"))
+        self.assertEqual([_count(g.body) for g in groups], [70, 70, 70])
+
+    def test_unknown_packing(self):
+        with self.assertRaises(ValueError):
+            list(split(iter([Resource(1, 0, 0, 0)]), 10, 0, packing="best"))  # pyright: ignore[reportArgumentType]
+
+
+def _fewest_groups(
+    items: list[Resource[int] | Segment[int]], max_count: int, gap_max_count: int
+) -> int:
+    # every body [begin, end) that fits, tried exhaustively
+    sums = [0]
+    for item in items:
+        sums.append(sums[-1] + item.count)
+    fewest = [0] + [len(items)] * len(items)
+    for end in range(1, len(items) + 1):
+        for begin in range(end):
+            head = min(gap_max_count, sums[begin])
+            tail = min(gap_max_count, sums[-1] - sums[end])
+            if end == begin + 1 or head + sums[end] - sums[begin] + tail <= max_count:
+                fewest[end] = min(fewest[end], fewest[begin] + 1)
+    return fewest[-1]
+
+
+def _smallest_largest_body(
+    items: list[Resource[int] | Segment[int]], max_count: int, gap_max_count: int
+) -> int:
+    # the largest body of every cut into the fewest groups, tried exhaustively
+    sums = [0]
+    for item in items:
+        sums.append(sums[-1] + item.count)
+    group_count = _fewest_groups(items, max_count, gap_max_count)
+    size = len(items)
+    best: dict[tuple[int, int], int | None] = {}
+
+    def smallest(begin: int, count: int) -> int | None:
+        # the smallest largest body cutting `[begin, size)` into `count` bodies
+        if begin == size:
+            return 0 if count == 0 else None
+        if count == 0:
+            return None
+        if (begin, count) not in best:
+            candidates: list[int] = []
+            for end in range(begin + 1, size + 1):
+                head = min(gap_max_count, sums[begin])
+                tail = min(gap_max_count, sums[-1] - sums[end])
+                body = sums[end] - sums[begin]
+                if end != begin + 1 and head + body + tail > max_count:
+                    break
+                rest = smallest(end, count - 1)
+                if rest is not None:
+                    candidates.append(max(body, rest))
+            best[begin, count] = min(candidates, default=None)
+        return best[begin, count]
+
+    return smallest(0, group_count) or 0
+
+
+def _segments(
+    resources: list[Resource[int]], max_count: int
+) -> list[Resource[int] | Segment[int]]:
+    # what the packing modes pack: segments that fit, not chunks of them
+    allocator: SegmentAllocator[int] = SegmentAllocator(
+        max_count, segmenter=Segmenter(max_count, pack=False)
+    )
+    items = [item for resource in resources for item in allocator.push(resource)]
+    items.extend(allocator.close())
+    return items
+
+
+def _count(items: list[Resource[int] | Segment[int]]) -> int:
+    return sum(item.count for item in items)
+
+
+def _payloads(items: list[Resource[int] | Segment[int]]) -> list[int]:
+    payloads: list[int] = []
+    for item in items:
+        if isinstance(item, Segment):
+            payloads.extend(resource.payload for resource in item.resources)
+        else:
+            payloads.append(item.payload)
+    return payloads
@@ -0,0 +1,197 @@
+import unittest
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from random import Random
+
+from resource_segmentation import BufferLimitWarning, split, split_many, split_parallel
+from resource_segmentation.types import Group, Resource, Segment
+from tests.split_cases import random_resources, split_cases
+
+
+class TestSplitMany(unittest.TestCase):
+    def test_same_as_split_in_processes(self):
+        documents = _random_documents(Random(3), 40)
+        results = list(
+            split_many(
+                documents,
+                max_segment_count=200,
+                border_incision=0,
+                gap_rate=0.1,
+                max_workers=2,
+                chunk_size=3,
+            )
+        )
+        self.assertEqual([index for index, _ in results], list(range(40)))
+        for index, groups in results:
+            self.assertEqual(
+                [_to_json(group) for group in groups],
+                _split_to_json(documents[index], 200, 0.1),
+            )
+
+    def test_as_completed_in_threads(self):
+        documents = _random_documents(Random(5), 30)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                split_many(
+                    iter(documents),
+                    max_segment_count=150,
+                    border_incision=0,
+                    gap_rate=0.25,
+                    executor=executor,
+                    chunk_size=2,
+                    max_pending_chunks=3,
+                    ordered=False,
+                )
+            )
+        self.assertEqual(sorted(index for index, _ in results), list(range(30)))
+        for index, groups in results:
+            self.assertEqual(
+                [_to_json(group) for group in groups],
+                _split_to_json(documents[index], 150, 0.25),
+            )
+
+    def test_payloads_are_the_original_objects(self):
+        resources = [Resource(10, 0, 0, object()) for _ in range(5)]
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            ((_, groups),) = split_many(
+                [resources],
+                max_segment_count=100,
+                border_incision=0,
+                executor=executor,
+            )
+        (group,) = groups
+        (segment,) = group.body
+        assert isinstance(segment, Segment)
+        self.assertEqual(segment.count, 50)
+        for item, resource in zip(segment.resources, resources, strict=True):
+            self.assertIs(item, resource)
+
+    def test_buffer_limits(self):
+        documents = [
+            [Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, i) for i in range(size)]
+            for size in (300, 40, 0)
+        ]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(
+                    split_many(
+                        documents,
+                        max_segment_count=100,
+                        border_incision=0,
+                        gap_rate=0.25,
+                        executor=executor,
+                        chunk_size=1,
+                        max_buffered_items=25,
+                        max_buffered_count=200,
+                    )
+                )
+            for index, groups in results:
+                self.assertEqual(
+                    [_to_json(group) for group in groups],
+                    _split_to_json(documents[index], 100, 0.25, 25, 200),
+                )
+
+
+class TestSplitParallel(unittest.TestCase):
+    def test_same_as_split_in_processes(self):
+        random = Random(13)
+        resources = [
+            Resource(
+                count=random.randint(1, 60),
+                start_incision=3 if i % 500 == 0 else (1 if i % 20 == 0 else 0),
+                end_incision=0,
+                payload=i,
+            )
+            for i in range(3000)
+        ]
+        groups = split_parallel(
+            resources,
+            max_segment_count=800,
+            border_incision=0,
+            gap_rate=0.1,
+            max_workers=2,
+            shard_count=3,
+        )
+        self.assertEqual(
+            [_to_json(group) for group in groups],
+            _split_to_json(resources, 800, 0.1),
+        )
+
+    def test_same_as_split_on_random_levels(self):
+        random = Random(17)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for case in split_cases(seed=17, per_setting=20, max_size=60):
+                groups = split_parallel(
+                    case.resources,
+                    **case.kwargs,
+                    executor=executor,
+                    shard_count=random.randint(1, 5),
+                )
+                self.assertEqual(
+                    [_to_json(group) for group in groups],
+                    [
+                        _to_json(group)
+                        for group in split(iter(case.resources), **case.kwargs)
+                    ],
+                )
+
+    def test_buffer_limits(self):
+        """测试：设置缓冲上限时按顺序分组，与 split 一致"""
+        resources = [
+            Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, i) for i in range(3000)
+        ]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                groups = split_parallel(
+                    resources,
+                    max_segment_count=100,
+                    border_incision=0,
+                    gap_rate=0.25,
+                    executor=executor,
+                    max_buffered_items=25,
+                    max_buffered_count=200,
+                )
+                self.assertEqual(
+                    [_to_json(group) for group in groups],
+                    _split_to_json(resources, 100, 0.25, 25, 200),
+                )
+
+
+def _random_documents(random: Random, size: int) -> list[list[Resource[int]]]:
+    return [random_resources(random, random.randint(0, 60)) for _ in range(size)]
+
+
+def _split_to_json(
+    resources: list[Resource[int]],
+    max_segment_count: int,
+    gap_rate: float,
+    max_buffered_items: int | None = None,
+    max_buffered_count: int | None = None,
+) -> list[dict]:
+    groups = split(
+        resources=iter(resources),
+        max_segment_count=max_segment_count,
+        border_incision=0,
+        gap_rate=gap_rate,
+        max_buffered_items=max_buffered_items,
+        max_buffered_count=max_buffered_count,
+    )
+    return [_to_json(group) for group in groups]
+
+
+def _to_json(group: Group[int]) -> dict:
+    return {
+        "head_remain_count": group.head_remain_count,
+        "tail_remain_count": group.tail_remain_count,
+        "head": [_item_to_json(item) for item in group.head],
+        "body": [_item_to_json(item) for item in group.body],
+        "tail": [_item_to_json(item) for item in group.tail],
+    }
+
+
+def _item_to_json(item: Resource[int] | Segment[int]):
+    if isinstance(item, Segment):
+        return ["segment", item.count, [r.payload for r in item.resources]]
+    return item.payload
@@ -0,0 +1,127 @@
+import threading
+import time
+import unittest
+from itertools import count, islice
+from random import Random
+from typing import Callable, Generator
+
+from resource_segmentation import LazyResource, prefetch, split
+from resource_segmentation.types import Resource
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_same_as_split(self):
+        random = Random(61)
+        resources = [
+            Resource(
+                count=random.choice((1, 5, 20, 60)),
+                start_incision=random.randint(0, 3),
+                end_incision=random.randint(0, 3),
+                payload=i,
+            )
+            for i in range(2000)
+        ]
+        for max_pending in (1, 7, 256):
+            self.assertEqual(
+                list(split(prefetch(resources, max_pending), 200, 0, 0.2)),
+                list(split(iter(resources), 200, 0, 0.2)),
+            )
+
+    def test_counted_on_the_producer_thread(self):
+        counted_on: set[str] = set()
+
+        def counter(text: str) -> int:
+            counted_on.add(threading.current_thread().name)
+            return len(text)
+
+        resources = [LazyResource(counter, 0, 0, "x" * i) for i in range(1, 50)]
+        list(split(prefetch(resources), 100, 0))
+        self.assertEqual(counted_on, {"prefetch"})
+
+    def test_producer_error(self):
+        """测试：生产者抛出的异常在已生产的资源之后传给消费者"""
+
+        def failing() -> Generator[Resource[int], None, None]:
+            for i in range(5):
+                yield Resource(10, 0, 0, i)
+            raise KeyError("broken")
+
+        produced: list[int] = []
+        with self.assertRaises(KeyError):
+            for resource in prefetch(failing()):
+                produced.append(resource.payload)
+        self.assertEqual(produced, [0, 1, 2, 3, 4])
+
+    def test_backpressure_and_early_stop(self):
+        """测试：消费者未读取时生产者暂停，提前结束时生产者线程退出"""
+        pulled: list[int] = []
+
+        def endless() -> Generator[Resource[int], None, None]:
+            for i in count():
+                pulled.append(i)
+                yield Resource(10, 0, 0, i)
+
+        resources = prefetch(endless(), max_pending=8)
+        self.assertEqual([r.payload for r in islice(resources, 3)], [0, 1, 2])
+        time.sleep(0.05)
+        self.assertLessEqual(len(pulled), 8 * 2 + 1)
+        resources.close()
+        pulled_count = len(pulled)
+        time.sleep(0.05)
+        self.assertEqual(len(pulled), pulled_count)
+        self.assertFalse(
+            any(thread.name == "prefetch" for thread in threading.enumerate())
+        )
+
+    def test_early_stop_closes_source(self):
+        """测试：消费者提前结束时关闭资源的迭代器，并在返回前等待生产者线程退出"""
+        for max_pending in (1, 8):
+            source = _Closable()
+            resources = prefetch(source, max_pending)
+            self.assertEqual(next(resources).payload, 0)
+            resources.close()
+            self.assertTrue(source.is_closed)
+
+        source = _Closable()
+        for resource in prefetch(source):
+            if resource.payload == 20:
+                break
+        self.assertTrue(source.is_closed)
+
+    def test_max_pending_at_least_one(self):
+        with self.assertRaises(ValueError):
+            prefetch([], max_pending=0)
+
+    def test_starts_when_called(self):
+        """测试：调用 prefetch 时即开始生产，丢弃未读取的生成器后生产者线程退出"""
+        source = _Closable()
+        resources = prefetch(source, max_pending=4)
+        self.assertTrue(_wait_until(lambda: source.pulled == 4 + 1))
+        del resources
+        self.assertTrue(_wait_until(lambda: source.is_closed))
+
+
+class _Closable:
+    # an endless source that, unlike a generator, is not closed when dropped
+    def __init__(self):
+        self.is_closed: bool = False
+        self.pulled: int = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Resource[int]:
+        self.pulled += 1
+        return Resource(10, 0, 0, self.pulled - 1)
+
+    def close(self) -> None:
+        self.is_closed = True
+
+
+def _wait_until(condition: Callable[[], bool]) -> bool:
+    deadline = time.monotonic() + 5
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
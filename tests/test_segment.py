@@ -1,7 +1,10 @@
 import unittest
-from typing import Iterable
+import warnings
+from itertools import count, islice
+from random import Random
+from typing import Generator, Iterable
 
-from resource_segmentation.segment import allocate_segments
+from resource_segmentation.segment import BufferLimitWarning, allocate_segments
 from resource_segmentation.types import Resource, Segment
 
 
@@ -156,6 +159,107 @@ class TestSegment(unittest.TestCase):
             ),
         )
 
+    def test_streaming_with_bounded_lookahead(self) -> None:
+        """测试：流式输出，不必读完全部输入"""
+        pulled: list[int] = []
+
+        def endless() -> Generator[Resource[int], None, None]:
+            for i in count():
+                pulled.append(i)
+                yield Resource(100, 2, 1 if i % 3 == 0 else 2, i)
+
+        items = list(islice(allocate_segments(endless(), 2, 300), 3))
+        self.assertEqual(
+            [item.count for item in items],
+            [300, 300, 300],
+        )
+        self.assertLessEqual(len(pulled), 12)
+
+    def test_deeply_nested_levels(self) -> None:
+        """测试：大量不同 incision 级别嵌套时不会触发递归上限"""
+        for sign in (1, -1):
+            resources = [Resource(1, sign * i, sign * i, i) for i in range(5000)]
+            items = list(allocate_segments(iter(resources), 0, 10))
+            self.assertEqual(
+                [item.count for item in items],
+                [10] * 500,
+            )
+            self.assertEqual(
+                [r.payload for item in items for r in _flatten(item)],
+                list(range(5000)),
+            )
+
+    def test_oversize_segment_packs_children_greedily(self) -> None:
+        """测试：超限段的子节点被贪心地装入分段，零数量的子节点跟随前一段"""
+        counts = [1, 3, 0, 4, 2, 0, 5, 1, 6, 0, 0]
+        resources = [Resource(c, -1, -1, i) for i, c in enumerate(counts)]
+        items = list(allocate_segments(iter(resources), 0, 10))
+        self.assertEqual(
+            [[r.payload for r in _flatten(item)] for item in items],
+            [[0, 1, 2, 3, 4, 5], [6, 7], [8, 9, 10]],
+        )
+
+    def test_buffer_limit_cuts_open_segments(self) -> None:
+        """测试：永不闭合的段超过缓冲上限时被强制切开，并发出警告"""
+        pulled: list[int] = []
+
+        def endless() -> Generator[Resource[int], None, None]:
+            for i in count():
+                pulled.append(i)
+                yield Resource(0, 1, 1, i)
+
+        with self.assertWarns(BufferLimitWarning):
+            items = list(
+                islice(allocate_segments(endless(), 0, 10, max_buffered_items=100), 2)
+            )
+        self.assertEqual(
+            [[r.payload for r in _flatten(item)] for item in items],
+            [list(range(0, 101)), list(range(101, 202))],
+        )
+        self.assertLessEqual(len(pulled), 203)
+
+        resources = [Resource(1, -i, -i, i) for i in range(1000)]
+        with self.assertWarns(BufferLimitWarning):
+            items = list(
+                allocate_segments(iter(resources), 0, 10, max_buffered_count=50)
+            )
+        self.assertEqual(
+            [r.payload for item in items for r in _flatten(item)],
+            list(range(1000)),
+        )
+        self.assertLessEqual(max(item.count for item in items), 10)
+
+    def test_buffer_limit_not_reached(self) -> None:
+        random = Random(79)
+        for _ in range(100):
+            resources = [
+                Resource(
+                    random.choice((0, 1, 5, 20)),
+                    random.randint(-1, 3),
+                    random.randint(-1, 3),
+                    i,
+                )
+                for i in range(random.randint(0, 60))
+            ]
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", BufferLimitWarning)
+                limited = list(
+                    allocate_segments(
+                        iter(resources),
+                        0,
+                        50,
+                        max_buffered_items=len(resources),
+                        max_buffered_count=sum(r.count for r in resources),
+                    )
+                )
+            self.assertEqual(limited, list(allocate_segments(iter(resources), 0, 50)))
+
+
+def _flatten(item: Resource | Segment) -> list[Resource]:
+    if isinstance(item, Segment):
+        return item.resources
+    return [item]
+
 
 def _to_json(items: Iterable[Resource | Segment]) -> list[dict]:
     json_list: list[dict] = []
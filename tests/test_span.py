@@ -0,0 +1,164 @@
+import unittest
+import warnings
+
+from resource_segmentation import BufferLimitWarning, GroupView, split, split_spans
+from resource_segmentation.types import Resource
+from tests.split_cases import payloads, split_cases
+
+
+class TestSpan(unittest.TestCase):
+    def test_uniform_resources(self):
+        resources = [
+            Resource(count=100, start_incision=0, end_incision=0, payload=i)
+            for i in range(5)
+        ]
+        spans = list(
+            split_spans(
+                resources=iter(resources),
+                max_segment_count=400,
+                border_incision=0,
+                gap_rate=0.25,
+                tail_rate=0.5,
+            )
+        )
+        self.assertEqual(
+            [_span_to_bounds(span) for span in spans],
+            [
+                (0, 0, 2, 4, 0, 200),
+                (1, 2, 4, 5, 100, 100),
+                (2, 4, 5, 5, 200, 0),
+            ],
+        )
+        view = GroupView(spans[1], resources)
+        self.assertEqual([r.payload for r in view.head], [1])
+        self.assertEqual([r.payload for r in view.body], [2, 3])
+        self.assertEqual([r.payload for r in view.tail], [4])
+        self.assertEqual(sum(r.count for r in view.body), 200)
+        self.assertIs(view.body[-1], resources[3])
+        self.assertEqual([r.payload for r in view.body[1:]], [3])
+        self.assertEqual(view.head_remain_count, 100)
+        self.assertEqual(view.tail_remain_count, 100)
+
+    def test_empty_input(self):
+        spans = split_spans(iter([]), max_segment_count=100, border_incision=0)
+        self.assertEqual(list(spans), [])
+
+    def test_head_reaching_back(self):
+        """测试：下一组的头部可以比上一组报告的头部开始得更早"""
+        resources = [
+            Resource(count=count, start_incision=start, end_incision=end, payload=i)
+            for i, (count, start, end) in enumerate(
+                [(30, 2, 3), (2, 3, 3), (5, 1, 2), (2, 2, 1)]
+                + [(1, 0, 2), (2, 3, 0), (5, 3, 3), (2, 3, 2)]
+            )
+        ]
+        spans = split_spans(
+            resources=iter(resources),
+            max_segment_count=20,
+            border_incision=0,
+            gap_rate=0.4,
+        )
+        self.assertEqual(
+            [_span_to_bounds(span) for span in spans],
+            [
+                (0, 0, 1, 1, 0, 0),
+                (0, 1, 2, 5, 10, 8),
+                (1, 2, 3, 6, 2, 5),
+                (1, 3, 5, 7, 7, 7),
+                (2, 5, 6, 8, 5, 7),
+                (2, 6, 7, 8, 7, 2),
+                (5, 7, 8, 8, 7, 0),
+            ],
+        )
+
+    def test_head_right_before_body(self):
+        """测试：split 的头部跳过了资源时，span 的头部仍是紧挨着主体的资源"""
+        resources = [
+            Resource(count=count, start_incision=start, end_incision=end, payload=i)
+            for i, (count, start, end) in enumerate(
+                [(20, 3, 1), (60, 2, 0), (20, 0, 3), (0, 2, 2), (60, 2, 0)]
+            )
+        ]
+        groups = list(split(iter(resources), 75, 0, gap_rate=0.4))
+        self.assertEqual(payloads(groups[-1].head), [2])
+        self.assertEqual(payloads(groups[-1].body), [4])
+        spans = list(split_spans(resources, 75, 0, gap_rate=0.4))
+        self.assertEqual(_span_to_bounds(spans[-1]), (2, 4, 5, 5, 15, 0))
+
+    def test_same_as_split(self):
+        for case in split_cases(seed=7, per_setting=20):
+            resources = case.resources
+            spans = list(split_spans(resources=iter(resources), **case.kwargs))
+            groups = list(split(resources=iter(resources), **case.kwargs))
+            self.assertEqual(len(spans), len(groups))
+            for span, group in zip(spans, groups):
+                self.assertEqual(
+                    _span_to_bounds(span)[4:],
+                    (group.head_remain_count, group.tail_remain_count),
+                )
+                self.assertEqual(
+                    list(range(span.body_begin, span.body_end)), payloads(group.body)
+                )
+                self.assertEqual(
+                    list(range(span.body_end, span.tail_end)), payloads(group.tail)
+                )
+                head = payloads(group.head)
+                span_head = list(range(span.head_begin, span.body_begin))
+                if head == list(range(span.body_begin - len(head), span.body_begin)):
+                    self.assertEqual(span_head, head)
+                else:
+                    # `split` kept a head out of order: the span keeps the
+                    # resources right before the body, by the same count rule
+                    self.assertLess(
+                        sum(resources[i].count for i in span_head[1:]),
+                        span.head_remain_count,
+                    )
+
+    def test_buffer_limits(self):
+        """测试：设置缓冲上限时，主体和尾部仍与 split 一致"""
+        resources = [
+            Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, i) for i in range(300)
+        ]
+        kwargs = {
+            "max_segment_count": 100,
+            "border_incision": 0,
+            "gap_rate": 0.25,
+            "max_buffered_items": 25,
+            "max_buffered_count": 200,
+        }
+        with self.assertWarns(BufferLimitWarning):
+            spans = list(split_spans(resources, **kwargs))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            groups = list(split(iter(resources), **kwargs))
+        self.assertEqual(
+            [
+                (
+                    list(range(span.body_begin, span.body_end)),
+                    list(range(span.body_end, span.tail_end)),
+                    span.head_remain_count,
+                    span.tail_remain_count,
+                )
+                for span in spans
+            ],
+            [
+                (
+                    payloads(group.body),
+                    payloads(group.tail),
+                    group.head_remain_count,
+                    group.tail_remain_count,
+                )
+                for group in groups
+            ],
+        )
+
+
+def _span_to_bounds(span) -> tuple[int, int, int, int, int, int]:
+    return (
+        span.head_begin,
+        span.body_begin,
+        span.body_end,
+        span.tail_end,
+        span.head_remain_count,
+        span.tail_remain_count,
+    )
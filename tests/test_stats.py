@@ -0,0 +1,98 @@
+import unittest
+
+from resource_segmentation import BufferLimitWarning, SplitStats, split
+from resource_segmentation.types import Resource, Segment
+from tests.split_cases import split_cases
+
+
+class TestSplitStats(unittest.TestCase):
+    def test_same_groups_as_without_stats(self):
+        for case in split_cases(seed=17, per_setting=14):
+            stats = SplitStats()
+            groups = list(split(iter(case.resources), **case.kwargs, stats=stats))
+            self.assertEqual(groups, list(split(iter(case.resources), **case.kwargs)))
+            self.assertEqual(stats.resources_read, len(case.resources))
+            self.assertEqual(stats.groups, len(groups))
+
+    def test_resources_in_a_list(self):
+        resources = [Resource(100, 0, 0, i) for i in range(5)]
+        stats = SplitStats()
+        # `split` iterates what it is given, with or without stats
+        groups = list(split(resources, 200, 0, stats=stats))  # pyright: ignore[reportArgumentType]
+        self.assertEqual(groups, list(split(iter(resources), 200, 0)))
+        self.assertEqual(stats.resources_read, 5)
+
+    def test_nested_resources(self):
+        """测试：层层嵌套的资源会记录树的深度与超长切分次数"""
+        resources = [Resource(10, -i, 0, i) for i in range(6)]
+        resources.extend(Resource(10, 5, 0, i) for i in range(6, 8))
+        stats = SplitStats()
+        groups = list(
+            split(iter(resources), max_segment_count=30, border_incision=0, stats=stats)
+        )
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(stats.resources_read, 8)
+        self.assertEqual(stats.items_segmented, 3)
+        self.assertEqual(stats.max_depth, 5)
+        self.assertEqual(stats.oversize_segments, 3)
+        self.assertEqual(stats.groups, 3)
+
+    def test_pushbacks(self):
+        resources = [Resource(100, 0, 0, i) for i in range(8)]
+        stats = SplitStats()
+        list(
+            split(
+                iter(resources),
+                max_segment_count=300,
+                border_incision=0,
+                gap_rate=0.2,
+                stats=stats,
+            )
+        )
+        # the resource that overflows a group is read again, and so is its tail
+        self.assertEqual(stats.pushbacks, 13)
+        self.assertEqual(stats.head_items, 7)
+        self.assertEqual(stats.max_pushback_buffer, 2)
+
+    def test_forced_cuts(self):
+        """测试：超过缓冲上限的强制切分会被计数"""
+        resources = [Resource(0, 1, 1, i) for i in range(250)]
+        stats = SplitStats()
+        with self.assertWarns(BufferLimitWarning):
+            groups = list(
+                split(
+                    iter(resources),
+                    max_segment_count=10,
+                    border_incision=0,
+                    stats=stats,
+                    max_buffered_items=100,
+                )
+            )
+        # segmentation cuts twice, and the 101 resources each cut leaves are
+        # over the limit of grouping on their own
+        self.assertEqual(stats.forced_cuts, 4)
+        self.assertEqual(
+            [
+                r.payload
+                for group in groups
+                for item in group.body
+                for r in _flatten(item)
+            ],
+            list(range(250)),
+        )
+
+    def test_to_dict(self):
+        stats = SplitStats()
+        list(split(iter([Resource(1, 0, 0, 0)]), 10, 0, stats=stats))
+        metrics = stats.to_dict()
+        self.assertEqual(metrics["groups"], 1)
+        self.assertEqual(
+            {key for key in metrics if key.endswith("_seconds")},
+            {"read_seconds", "segment_seconds", "group_seconds", "truncate_seconds"},
+        )
+
+
+def _flatten(item: Resource[int] | Segment[int]) -> list[Resource[int]]:
+    if isinstance(item, Segment):
+        return item.resources
+    return [item]
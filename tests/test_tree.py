@@ -0,0 +1,137 @@
+import pickle
+import unittest
+import warnings
+from random import Random
+
+from resource_segmentation import (
+    BufferLimitWarning,
+    LevelStats,
+    SegmentTree,
+    split_spans,
+)
+from resource_segmentation.segment import Segmenter
+from resource_segmentation.types import Resource
+from tests.split_cases import split_cases
+
+
+class TestSegmentTree(unittest.TestCase):
+    def test_same_as_split_spans(self):
+        for case in split_cases(seed=71, per_setting=20):
+            tree = pickle.loads(pickle.dumps(SegmentTree(case.resources)))
+            self.assertEqual(len(tree), len(case.resources))
+            expected = list(split_spans(case.resources, **case.kwargs))
+            # grouping again reads nothing but the tree
+            self.assertEqual(list(tree.group(**case.kwargs)), expected)
+            self.assertEqual(list(tree.group(**case.kwargs)), expected)
+
+    def test_buffer_limits(self):
+        """测试：设置缓冲上限时逐个读入资源，与 split_spans 的强制切分一致"""
+        resources = [
+            Resource(0 if i % 7 else 30, -(i % 13), i % 5 - 2, i) for i in range(300)
+        ]
+        with self.assertWarns(BufferLimitWarning):
+            spans = list(SegmentTree(resources).group(100, 0, 0.25, 0.5, 25, 200))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BufferLimitWarning)
+            self.assertEqual(
+                spans, list(split_spans(resources, 100, 0, 0.25, 0.5, 25, 200))
+            )
+
+    def test_levels(self):
+        """测试：每个切口等级统计其切出的片段数、最大计数与总计数"""
+        resources = [
+            Resource(count, start_incision, end_incision, i)
+            for i, (count, start_incision, end_incision) in enumerate(
+                [(10, 0, 1), (20, 1, 0), (5, 0, 0), (5, 0, 2), (30, 2, 0), (40, 0, 0)]
+            )
+        ]
+        self.assertEqual(
+            SegmentTree(resources).levels(),
+            [
+                LevelStats(level=0, segment_count=2, max_count=70, total_count=100),
+                LevelStats(level=2, segment_count=1, max_count=110, total_count=110),
+            ],
+        )
+        self.assertEqual(SegmentTree([]).levels(), [])
+
+    def test_levels_after_nested_segment(self):
+        """测试：嵌套片段结束后，父片段的等级按当前资源自身的切口重新计算"""
+        resources = [Resource(1, 0, 0, 0), Resource(1, 0, 5, 1), Resource(1, 0, 0, 2)]
+        self.assertEqual(
+            SegmentTree(resources).levels(),
+            [LevelStats(level=0, segment_count=2, max_count=3, total_count=5)],
+        )
+
+    def test_levels_same_as_segmenter(self):
+        random = Random(73)
+        for _ in range(200):
+            resources = _random_resources(random)
+            segments = _segments(resources)
+            levels = SegmentTree(resources).levels()
+            self.assertEqual(
+                sum(level_stats.segment_count for level_stats in levels),
+                len(segments),
+            )
+            self.assertEqual(
+                sum(level_stats.total_count for level_stats in levels),
+                sum(count for _, _, count in segments),
+            )
+            self.assertEqual(
+                max((level_stats.max_count for level_stats in levels), default=0),
+                max((count for _, _, count in segments), default=0),
+            )
+            self.assertEqual(
+                {
+                    (begin, end)
+                    for _, begin, end in SegmentTree(resources)._iter_segments()  # pylint: disable=protected-access
+                },
+                {(begin, end) for begin, end, _ in segments},
+            )
+
+    def test_count_and_index_at(self):
+        resources = [Resource(count, 0, 0, None) for count in (3, 0, 5, 2)]
+        tree = SegmentTree(resources)
+        self.assertEqual(tree.total_count, 10)
+        self.assertEqual(tree.count(0, 4), 10)
+        self.assertEqual(tree.count(1, 3), 5)
+        self.assertEqual(tree.count(2, 2), 0)
+        self.assertEqual(
+            [tree.index_at(count) for count in range(10)], [0] * 3 + [2] * 5 + [3] * 2
+        )
+        with self.assertRaises(IndexError):
+            tree.count(3, 5)
+        with self.assertRaises(IndexError):
+            tree.index_at(10)
+
+
+def _random_resources(random: Random) -> list[Resource[int]]:
+    # positive counts, so a segment always counts more than any segment inside it
+    return [
+        Resource(
+            count=random.choice((1, 2, 5)),
+            start_incision=random.randint(-1, 3),
+            end_incision=random.randint(-1, 3),
+            payload=i,
+        )
+        for i in range(random.randint(0, 30))
+    ]
+
+
+def _segments(resources: list[Resource[int]]) -> set[tuple[int, int, int]]:
+    # Without packing, segmentation emits every segment that fits in the
+    # budget and whose parent does not, so each segment of the tree is emitted
+    # once the budget reaches its count.
+    segments: set[tuple[int, int, int]] = set()
+    for max_count in range(1, sum(r.count for r in resources) + 1):
+        segmenter = Segmenter(max_count, pack=False)
+        for resource in resources:
+            segmenter.feed(
+                resource.count, resource.start_incision, resource.end_incision
+            )
+        segmenter.close()
+        segments.update(
+            (chunk.begin, chunk.end, chunk.count)
+            for chunk in segmenter.chunks
+            if chunk.end - chunk.begin > 1
+        )
+    return segments
@@ -1,6 +1,9 @@
 import unittest
+from random import Random
 
-from resource_segmentation.truncation import truncate_gap
+from resource_segmentation.group import _iter_groups
+from resource_segmentation.segment import allocate_segments
+from resource_segmentation.truncation import report_truncated, truncate_gap
 from resource_segmentation.types import Group, Resource, Segment
 
 
@@ -192,6 +195,50 @@ class TestTruncation(unittest.TestCase):
             },
         )
 
+    def test_report_truncated(self):
+        """测试：一次完成报告与裁剪，结果与 truncate_gap(report()) 相同"""
+        random = Random(11)
+        for _ in range(100):
+            resources = [
+                Resource(
+                    count=random.choice((0, 1, 5, 20, 80)),
+                    start_incision=random.randint(0, 3),
+                    end_incision=random.randint(0, 3),
+                    payload=i,
+                )
+                for i in range(random.randint(0, 60))
+            ]
+            for group in _iter_groups(
+                allocate_segments(iter(resources), 0, 100),
+                max_count=200,
+                gap_rate=0.25,
+                tail_rate=random.choice((0.0, 0.5, 1.0)),
+            ):
+                self.assertEqual(report_truncated(group), truncate_gap(group.report()))
+
+    def test_report_truncated_hands_over_body(self):
+        """测试：报告分组时直接交出主体列表，不再复制"""
+        resources = [Resource(10, 0, 0, i) for i in range(30)]
+        for group in _iter_groups(
+            allocate_segments(iter(resources), 0, 60),
+            max_count=100,
+            gap_rate=0.2,
+            tail_rate=0.5,
+        ):
+            body = group.body.items
+            self.assertIs(report_truncated(group).body, body)
+
+    def test_segment_kept_whole_is_reused(self):
+        segment = Segment(20, [Resource(10, 1, 1, 1), Resource(10, 1, 1, 2)])
+        group = Group(
+            head_remain_count=100,
+            tail_remain_count=0,
+            head=[Resource(10, 0, 0, 0), segment],
+            body=[Resource(400, 0, 0, 3)],
+            tail=[],
+        )
+        self.assertIs(truncate_gap(group).head[1], segment)
+
 
 def _group_to_json(group: Group) -> dict:
     """Convert a Group to a JSON-like dict for snapshot testing."""